@@ -0,0 +1,280 @@
+"""
+Benchmarks of the core data paths on synthetic data.
+
+Covers diff parsing, hint evaluation, instance selection, per-instance
+JSON/Markdown output and excluded suffix matching, at split scale.
+Results can be saved as a baseline, and later runs are compared against it:
+a benchmark slower than the baseline by more than --threshold is flagged and
+the run exits with status 1.
+
+    python -m benchmarks.core --save-baseline
+    python -m benchmarks.core --threshold 0.25
+"""
+
+import contextlib
+import fnmatch
+import io
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable, Optional
+
+import typer
+
+from swe_bench_util.cache import cache_path, write_atomic
+
+DEFAULT_THRESHOLD = 0.25
+
+
+def synthetic_patch(files: int, hunks_per_file: int, lines_per_hunk: int) -> str:
+    """A unified diff touching `files` files"""
+    parts = []
+    for i in range(files):
+        path = f"src/pkg{i % 20}/module_{i}.py"
+        parts.append(
+            f"diff --git a/{path} b/{path}\nindex 1111111..2222222 100644\n"
+            f"--- a/{path}\n+++ b/{path}\n"
+        )
+        for h in range(hunks_per_file):
+            start = 1 + h * (lines_per_hunk + 10)
+            parts.append(
+                f"@@ -{start},{lines_per_hunk} +{start},{lines_per_hunk} @@ def f{h}():\n"
+            )
+            for line in range(lines_per_hunk):
+                if line % 3 == 0:
+                    parts.append(f"-    old_value_{line} = {line}\n")
+                    parts.append(f"+    new_value_{line} = {line + 1}\n")
+                else:
+                    parts.append(f"     context_{line} = {line}\n")
+    return "".join(parts)
+
+
+def synthetic_rows(instances: int, repos: int, seed: int = 0) -> list[dict]:
+    """Rows shaped like SWE-bench, with a small patch each"""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(instances):
+        repo = f"org{i % repos}/repo{i % repos}"
+        rows.append(
+            {
+                "repo": repo,
+                "instance_id": f"{repo.replace('/', '__')}-{i}",
+                "base_commit": f"{rng.getrandbits(160):040x}",
+                "patch": synthetic_patch(rng.randint(1, 4), 2, 6),
+                "test_patch": synthetic_patch(1, 1, 6),
+                "problem_statement": "Something is broken.\n" * rng.randint(5, 50),
+                "hints_text": "",
+                "created_at": "2023-01-01T00:00:00Z",
+                "version": "1.0",
+                "FAIL_TO_PASS": "[]",
+                "PASS_TO_PASS": "[]",
+                "environment_setup_commit": "",
+            }
+        )
+    return rows
+
+
+def synthetic_examples_and_hints(
+    instances: int, hints_per_instance: int, seed: int = 0
+):
+    from swe_bench_util.file_hint_eval import BenchExample, FileHint
+
+    rng = random.Random(seed)
+    examples = []
+    hints = []
+    for i in range(instances):
+        files = [f"src/module_{j}.py" for j in rng.sample(range(500), 4)]
+        examples.append(
+            BenchExample(
+                id=f"inst-{i}",
+                repo=f"org/repo{i % 12}",
+                base_commit="0" * 40,
+                patch_files=files[:3],
+                test_patch_files=files[3:],
+            )
+        )
+        ranked = [
+            f"src/module_{j}.py" for j in rng.sample(range(500), hints_per_instance)
+        ]
+        hints.append(FileHint(id=f"inst-{i}", hint_files=ranked))
+    rng.shuffle(hints)
+    return examples, hints
+
+
+def synthetic_paths(count: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    exts = [".py", ".js", ".min.js", ".png", ".md", ".txt", ".json", ".patch", ".c"]
+    return [f"dir{rng.randint(0, 99)}/file_{i}{rng.choice(exts)}" for i in range(count)]
+
+
+@dataclass
+class BenchResult:
+    name: str
+    # Seconds per call: best and median of the repeats
+    best: float
+    median: float
+    calls: int
+
+
+def measure(fn: Callable[[], object], repeat: int = 5, min_time: float = 0.2):
+    """Calls fn in rounds of at least min_time, returns (best, median, calls) per call"""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 2
+    times = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        times.append((time.perf_counter() - start) / number)
+    return min(times), statistics.median(times), number * repeat
+
+
+def benchmarks(scale: float, workdir: str) -> dict[str, Callable[[], object]]:
+    """Benchmark name -> zero argument callable, data prepared up front"""
+    from swe_bench_util.cli import diff_file_names, write_json, write_markdown
+    from swe_bench_util.file_hint_eval import eval_file_hints_vs_oracle
+    from swe_bench_util.index.file_selection import EXCLUDED_SUFFIXES
+    from swe_bench_util.instance_index import load_index, select_instances
+
+    def scaled(n: int) -> int:
+        return max(1, int(n * scale))
+
+    large_patch = synthetic_patch(scaled(200), 5, 20)
+    examples, hints = synthetic_examples_and_hints(scaled(2000), 30)
+    paths = synthetic_paths(scaled(50_000))
+    rows = synthetic_rows(scaled(2000), 12)
+    output_rows = rows[: scaled(200)]
+    output_dir = os.path.join(workdir, "examples")
+    os.makedirs(output_dir, exist_ok=True)
+
+    from datasets import Dataset
+
+    dataset = Dataset.from_list(rows)
+    # Build the instance index once, as a real run would have cached it
+    load_index(dataset)
+    selector_ids = ",".join(
+        row["instance_id"] for row in rows[:: max(1, len(rows) // 20)]
+    )
+
+    def write_outputs():
+        # The "was saved" line per file would flood the terminal
+        with contextlib.redirect_stderr(io.StringIO()):
+            for row_data in output_rows:
+                write_json(output_dir, row_data["instance_id"], row_data)
+                write_markdown(output_dir, row_data["instance_id"], row_data)
+
+    return {
+        "diff_file_names.large_patch": lambda: diff_file_names(large_patch),
+        "diff_file_names.many_instances": lambda: [
+            diff_file_names(row["patch"]) for row in rows
+        ],
+        "eval_file_hints_vs_oracle": lambda: eval_file_hints_vs_oracle(examples, hints),
+        "select_instances.ids": lambda: len(select_instances(dataset, id=selector_ids)),
+        "select_instances.repo_glob": lambda: len(
+            select_instances(dataset, repo="org1*")
+        ),
+        "write_json_markdown": write_outputs,
+        "excluded_suffixes": lambda: sum(map(EXCLUDED_SUFFIXES.matches, paths)),
+    }
+
+
+def compare(
+    results: list[BenchResult], baseline: dict[str, dict], threshold: float
+) -> list[str]:
+    """Names of benchmarks slower than baseline by more than threshold"""
+    regressions = []
+    for result in results:
+        previous = baseline.get(result.name)
+        if previous and result.best > previous["best"] * (1 + threshold):
+            regressions.append(result.name)
+    return regressions
+
+
+def run(
+    scale: float = 1.0,
+    only: Optional[str] = None,
+    repeat: int = 5,
+    min_time: float = 0.2,
+) -> list[BenchResult]:
+    with tempfile.TemporaryDirectory() as workdir:
+        # Keep the instance index cache out of the real cache dir
+        previous_cache = os.environ.get("SWE_BENCH_UTIL_CACHE_DIR")
+        os.environ["SWE_BENCH_UTIL_CACHE_DIR"] = os.path.join(workdir, "cache")
+        try:
+            results = []
+            for name, fn in benchmarks(scale, workdir).items():
+                if only and not any(
+                    fnmatch.fnmatch(name, pattern) for pattern in only.split(",")
+                ):
+                    continue
+                best, median, calls = measure(fn, repeat, min_time)
+                results.append(BenchResult(name, best, median, calls))
+            return results
+        finally:
+            if previous_cache is None:
+                del os.environ["SWE_BENCH_UTIL_CACHE_DIR"]
+            else:
+                os.environ["SWE_BENCH_UTIL_CACHE_DIR"] = previous_cache
+
+
+def main(
+    scale: float = typer.Option(1.0, help="Multiplies the synthetic data sizes."),
+    only: Optional[str] = typer.Option(
+        None, help="Comma separated benchmark names, globs allowed."
+    ),
+    repeat: int = 5,
+    baseline: Optional[str] = typer.Option(
+        None, help="Baseline JSON, defaults to cache/benchmarks/baseline-<scale>.json."
+    ),
+    save_baseline: bool = typer.Option(
+        False, help="Store these results as the new baseline."
+    ),
+    threshold: float = typer.Option(
+        DEFAULT_THRESHOLD, help="Flag benchmarks this much slower than the baseline."
+    ),
+    output: Optional[str] = typer.Option(None, help="Also write the results as JSON."),
+):
+    """Time the core data paths and compare with the saved baseline"""
+    # Before the benchmarks override the cache dir
+    baseline = baseline or cache_path("benchmarks", f"baseline-{scale:g}.json")
+    results = run(scale=scale, only=only, repeat=repeat)
+    previous = {}
+    if os.path.exists(baseline):
+        with open(baseline, "r") as f:
+            previous = json.load(f)
+    regressions = compare(results, previous, threshold)
+
+    print("\t".join(["benchmark", "best_ms", "median_ms", "baseline_ms", "change"]))
+    for result in results:
+        base = previous.get(result.name, {}).get("best")
+        change = f"{result.best / base - 1:+.1%}" if base else "-"
+        flag = "  REGRESSION" if result.name in regressions else ""
+        print(
+            f"{result.name}\t{result.best * 1e3:.3f}\t{result.median * 1e3:.3f}"
+            f"\t{base * 1e3 if base else float('nan'):.3f}\t{change}{flag}"
+        )
+
+    data = {result.name: asdict(result) for result in results}
+    if output:
+        write_atomic(output, json.dumps(data, indent=2))
+    if save_baseline:
+        write_atomic(baseline, json.dumps({**previous, **data}, indent=2))
+        print(f"Baseline '{baseline}' was saved")
+    elif regressions:
+        print(f"{len(regressions)} regressions beyond {threshold:.0%}")
+        raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    typer.run(main)
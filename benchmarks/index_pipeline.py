@@ -0,0 +1,148 @@
+"""
+Benchmark of the index astra-assistants pipeline against a local mock.
+
+Uploads a synthetic git repo with index_to_astra_assistants, creates the
+assistant and runs the streamed retrieval, all against the local mock
+server, then reports files/sec, server-side tail latency and 429 retries.
+No API keys are needed, but importing streaming_assistants fetches a
+tiktoken encoding unless it is already cached (see TIKTOKEN_CACHE_DIR).
+
+    python -m benchmarks.index_pipeline --files 2000 --engine async --rate-limit-probability 0.05
+"""
+
+import json
+import os
+import subprocess
+import tempfile
+import time
+from typing import Optional
+
+import typer
+
+from benchmarks.mock_assistants import MockAssistantsServer, MockConfig
+
+
+def make_repo(repo_dir: str, files: int, file_bytes: int):
+    """A git repo with `files` Python files of about file_bytes each"""
+    line = "value = 'x' * 60  # padding for the benchmark\n"
+    for i in range(files):
+        path = os.path.join(repo_dir, f"pkg{i % 50}", f"module_{i}.py")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(f"# module {i}\n" + line * max(1, file_bytes // len(line)))
+    subprocess.run(["git", "init", "-q"], cwd=repo_dir, check=True)
+    subprocess.run(["git", "add", "."], cwd=repo_dir, check=True)
+
+
+def percentiles(values: list[float]) -> dict[str, float]:
+    values = sorted(values)
+    if not values:
+        return {}
+    return {
+        f"p{p}": round(values[min(len(values) - 1, int(p / 100 * len(values)))], 4)
+        for p in (50, 95, 99)
+    }
+
+
+def run(
+    files: int = 500,
+    file_bytes: int = 2000,
+    engine: str = "threads",
+    rate: float = 50.0,
+    concurrency: int = 8,
+    min_latency: float = 0.01,
+    max_latency: float = 0.05,
+    rate_limit_probability: float = 0.0,
+    tokens: int = 50,
+    token_interval: float = 0.0,
+) -> dict:
+    config = MockConfig(
+        min_latency=min_latency,
+        max_latency=max_latency,
+        rate_limit_probability=rate_limit_probability,
+        tokens=tokens,
+        token_interval=token_interval,
+    )
+    with tempfile.TemporaryDirectory() as repo_dir, MockAssistantsServer(
+        config
+    ) as server:
+        make_repo(repo_dir, files, file_bytes)
+        os.environ["OPENAI_BASE_URL"] = server.base_url
+        os.environ.setdefault("OPENAI_API_KEY", "mock")
+        from swe_bench_util.index import astra_assistants
+
+        astra_assistants.OPENAI_CLIENT = None
+
+        start = time.perf_counter()
+        file_ids, excluded_files = astra_assistants.index_to_astra_assistants(
+            repo_dir, engine=engine, rate=rate, concurrency=concurrency
+        )
+        upload_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        assistant = astra_assistants.create_assistant(list(file_ids), "benchmark")
+        retrieval = astra_assistants.retrieve(
+            assistant.id,
+            {"instance_id": "benchmark", "problem_statement": "Fix the bug"},
+        )
+        inference_seconds = time.perf_counter() - start
+
+        # Not the binary, too large or excluded-extension files
+        failed = [
+            excluded
+            for excluded in excluded_files
+            if excluded["reason"] == "upload failed"
+        ]
+        stats = server.stats
+        return {
+            "engine": engine,
+            "files": len(file_ids),
+            "failed": len(failed),
+            "upload_seconds": round(upload_seconds, 3),
+            "files_per_sec": round(len(file_ids) / upload_seconds, 2),
+            "upload_latency": percentiles(stats.latencies.get("POST /v1/files", [])),
+            "retries_429": stats.rate_limited,
+            "retrieved_files": len(retrieval.file_ids),
+            "inference_seconds": round(inference_seconds, 3),
+            "run": retrieval.metrics,
+            "requests": stats.requests,
+        }
+
+
+def main(
+    files: int = 500,
+    file_bytes: int = 2000,
+    engine: str = typer.Option("threads", help="'threads' or 'async'"),
+    rate: float = typer.Option(50.0, help="Requests/s for the async engine."),
+    concurrency: int = typer.Option(
+        8, help="Initial concurrency for the async engine."
+    ),
+    min_latency: float = 0.01,
+    max_latency: float = 0.05,
+    rate_limit_probability: float = 0.0,
+    tokens: int = 50,
+    token_interval: float = 0.0,
+    output: Optional[str] = typer.Option(None, help="Also write the report as JSON."),
+):
+    """Benchmark index_to_astra_assistants and retrieval against the mock server"""
+    report = run(
+        files=files,
+        file_bytes=file_bytes,
+        engine=engine,
+        rate=rate,
+        concurrency=concurrency,
+        min_latency=min_latency,
+        max_latency=max_latency,
+        rate_limit_probability=rate_limit_probability,
+        tokens=tokens,
+        token_interval=token_interval,
+    )
+    text = json.dumps(report, indent=2)
+    print(text)
+    if output:
+        with open(output, "w") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,351 @@
+"""
+Local stand-in for the Assistants API endpoints the indexer uses:
+files, assistants, threads, messages and streamed runs.
+
+Responses follow the shapes the openai client and streaming-assistants
+expect, including retrieval tool calls with file_id and search_string
+chunks. Latency, 429 injection and the streamed text are configurable,
+so upload and inference throughput can be measured offline.
+
+    with MockAssistantsServer(MockConfig(rate_limit_probability=0.1)) as server:
+        client = OpenAI(base_url=server.base_url, api_key="mock")
+"""
+
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+@dataclass
+class MockConfig:
+    # Seconds per request, uniformly between min and max
+    min_latency: float = 0.0
+    max_latency: float = 0.0
+    # Share of requests answered with 429 and this Retry-After
+    rate_limit_probability: float = 0.0
+    retry_after: float = 0.05
+    # Streamed run: text deltas and the pause between them
+    tokens: int = 20
+    token_interval: float = 0.0
+    # Files returned by the retrieval tool call
+    retrieval_files: int = 5
+    seed: int = 0
+
+
+@dataclass
+class MockStats:
+    requests: dict[str, int] = field(default_factory=dict)
+    rate_limited: int = 0
+    # Seconds to handle each successful request, per route
+    latencies: dict[str, list[float]] = field(default_factory=dict)
+
+
+class MockState:
+    def __init__(self, config: MockConfig):
+        self.config = config
+        self.lock = threading.Lock()
+        self.random = random.Random(config.seed)
+        self.counter = 0
+        self.files = {}
+        self.assistants = {}
+        self.threads = {}
+        self.stats = MockStats()
+
+    def new_id(self, prefix: str) -> str:
+        with self.lock:
+            self.counter += 1
+            return f"{prefix}_{self.counter:08d}"
+
+    def should_rate_limit(self) -> bool:
+        with self.lock:
+            limited = self.random.random() < self.config.rate_limit_probability
+            if limited:
+                self.stats.rate_limited += 1
+            return limited
+
+    def latency(self) -> float:
+        with self.lock:
+            return self.random.uniform(self.config.min_latency, self.config.max_latency)
+
+
+def file_object(file_id: str, filename: str, size: int) -> dict:
+    return {
+        "id": file_id,
+        "object": "file",
+        "bytes": size,
+        "created_at": int(time.time()),
+        "filename": filename,
+        "purpose": "assistants",
+        "status": "processed",
+        "embedding_model": "text-embedding-3-large",
+    }
+
+
+def message_object(message_id, thread_id, role, text, run_id=None, assistant_id=None):
+    content = []
+    if text is not None:
+        content = [{"type": "text", "text": {"value": text, "annotations": []}}]
+    return {
+        "id": message_id,
+        "object": "thread.message",
+        "created_at": int(time.time()),
+        "thread_id": thread_id,
+        "role": role,
+        "content": content,
+        "file_ids": [],
+        "metadata": {},
+        "assistant_id": assistant_id,
+        "run_id": run_id,
+        "status": "completed",
+    }
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    state: MockState
+
+    def log_message(self, format, *args):
+        pass
+
+    def route(self) -> str:
+        """Path with ids replaced, e.g. /v1/threads/{id}/runs"""
+        return re.sub(r"/(file|asst|thread|msg)_\d+", "/{id}", self.path.split("?")[0])
+
+    def send_json(self, status: int, data: dict, headers: dict | None = None):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def handle_request(self, method: str):
+        state = self.state
+        start = time.monotonic()
+        route = self.route()
+        body = self.read_body()
+        with state.lock:
+            key = f"{method} {route}"
+            state.stats.requests[key] = state.stats.requests.get(key, 0) + 1
+        time.sleep(state.latency())
+        if state.should_rate_limit():
+            self.send_json(
+                429,
+                {"error": {"message": "Rate limit exceeded", "type": "rate_limit"}},
+                {"Retry-After": str(state.config.retry_after)},
+            )
+            return
+        handler = getattr(self, f"{method.lower()}_{route_name(route)}", None)
+        if handler is None:
+            self.send_json(404, {"error": {"message": f"No mock for {key}"}})
+            return
+        handler(body)
+        with state.lock:
+            state.stats.latencies.setdefault(key, []).append(time.monotonic() - start)
+
+    def do_GET(self):
+        self.handle_request("GET")
+
+    def do_POST(self):
+        self.handle_request("POST")
+
+    def path_id(self, index: int) -> str:
+        return self.path.split("?")[0].strip("/").split("/")[index]
+
+    def post_files(self, body: bytes):
+        match = re.search(rb'filename="([^"]*)"', body)
+        filename = match.group(1).decode() if match else "upload"
+        file = file_object(self.state.new_id("file"), filename, len(body))
+        with self.state.lock:
+            self.state.files[file["id"]] = file
+        self.send_json(200, file)
+
+    def get_files_id(self, body: bytes):
+        file = self.state.files.get(self.path_id(2))
+        if file is None:
+            self.send_json(404, {"error": {"message": "No such file"}})
+        else:
+            self.send_json(200, file)
+
+    def post_assistants(self, body: bytes):
+        request = json.loads(body)
+        assistant = {
+            "id": self.state.new_id("asst"),
+            "object": "assistant",
+            "created_at": int(time.time()),
+            "name": request.get("name"),
+            "description": None,
+            "model": request.get("model"),
+            "instructions": request.get("instructions"),
+            "tools": request.get("tools", []),
+            "file_ids": request.get("file_ids", []),
+            "metadata": {},
+        }
+        with self.state.lock:
+            self.state.assistants[assistant["id"]] = assistant
+        self.send_json(200, assistant)
+
+    def get_assistants_id(self, body: bytes):
+        assistant = self.state.assistants.get(self.path_id(2))
+        if assistant is None:
+            self.send_json(404, {"error": {"message": "No such assistant"}})
+        else:
+            self.send_json(200, assistant)
+
+    def post_threads(self, body: bytes):
+        thread = {
+            "id": self.state.new_id("thread"),
+            "object": "thread",
+            "created_at": int(time.time()),
+            "metadata": {},
+        }
+        with self.state.lock:
+            self.state.threads[thread["id"]] = thread
+        self.send_json(200, thread)
+
+    def post_threads_id_messages(self, body: bytes):
+        request = json.loads(body)
+        message = message_object(
+            self.state.new_id("msg"),
+            self.path_id(2),
+            request["role"],
+            request["content"],
+        )
+        self.send_json(200, message)
+
+    def post_threads_id_runs(self, body: bytes):
+        """A streamed run: one retrieval step, then the reply as text deltas"""
+        request = json.loads(body)
+        config = self.state.config
+        thread_id = self.path_id(2)
+        assistant = self.state.assistants.get(request["assistant_id"], {})
+        file_ids = assistant.get("file_ids", [])
+        with self.state.lock:
+            chosen = self.state.random.sample(
+                file_ids, min(config.retrieval_files, len(file_ids))
+            )
+        run_id = self.state.new_id("run")
+        message_id = self.state.new_id("msg")
+        run = {
+            "id": run_id,
+            "object": "thread.run",
+            "created_at": int(time.time()),
+            "thread_id": thread_id,
+            "assistant_id": request["assistant_id"],
+            "status": "queued",
+            "model": assistant.get("model"),
+            "instructions": assistant.get("instructions"),
+            "tools": assistant.get("tools", []),
+            "file_ids": file_ids,
+            "metadata": {},
+        }
+        step = {
+            "id": self.state.new_id("step"),
+            "object": "thread.run.step",
+            "created_at": int(time.time()),
+            "run_id": run_id,
+            "thread_id": thread_id,
+            "assistant_id": request["assistant_id"],
+            "type": "tool_calls",
+            "status": "in_progress",
+            "step_details": {"type": "tool_calls", "tool_calls": []},
+        }
+        retrieval = [
+            {"file_id": file_id, "search_string": f"query {i}"}
+            for i, file_id in enumerate(chosen)
+        ]
+        done_step = {
+            **step,
+            "status": "completed",
+            "step_details": {
+                "type": "tool_calls",
+                "tool_calls": [
+                    {"id": "call_1", "type": "retrieval", "retrieval": retrieval}
+                ],
+            },
+        }
+        tokens = [f"token{i} " for i in range(config.tokens)]
+        message = message_object(
+            message_id, thread_id, "assistant", None, run_id, request["assistant_id"]
+        )
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def send(event, data):
+            self.wfile.write(f"event: {event}\ndata: {json.dumps(data)}\n\n".encode())
+            self.wfile.flush()
+
+        send("thread.run.created", run)
+        send("thread.run.step.created", step)
+        send("thread.run.step.completed", done_step)
+        send("thread.message.created", message)
+        for token in tokens:
+            time.sleep(config.token_interval)
+            delta = {
+                "content": [{"index": 0, "type": "text", "text": {"value": token}}]
+            }
+            send(
+                "thread.message.delta",
+                {"id": message_id, "object": "thread.message.delta", "delta": delta},
+            )
+        send(
+            "thread.message.completed",
+            {
+                **message,
+                "content": [
+                    {
+                        "type": "text",
+                        "text": {"value": "".join(tokens), "annotations": []},
+                    }
+                ],
+            },
+        )
+        send("thread.run.completed", {**run, "status": "completed"})
+        self.wfile.write(b"event: done\ndata: [DONE]\n\n")
+
+
+def route_name(route: str) -> str:
+    """/v1/threads/{id}/runs -> threads_id_runs"""
+    parts = route.strip("/").split("/")[1:]
+    return "_".join("id" if part == "{id}" else part for part in parts)
+
+
+class MockAssistantsServer:
+    """Serves the mock on a free localhost port from a background thread"""
+
+    def __init__(self, config: MockConfig | None = None, port: int = 0):
+        self.state = MockState(config or MockConfig())
+        handler = type("Handler", (MockHandler,), {"state": self.state})
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    @property
+    def stats(self) -> MockStats:
+        return self.state.stats
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
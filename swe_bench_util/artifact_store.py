@@ -0,0 +1,110 @@
+"""
+Per-instance artifacts in one SQLite database, instead of files in checkouts.
+
+Artifacts are JSON values keyed by namespace (e.g. the retrieval backend),
+instance_id and name, such as "file_ids", "assistant_id" or "status".
+The database runs in WAL mode, so readers don't block the writer, and each
+write is a short IMMEDIATE transaction, so concurrent writers from threads
+and processes wait for each other instead of failing.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+
+from swe_bench_util.cache import cache_path
+
+BUSY_TIMEOUT_MS = 30_000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS artifacts (
+    namespace TEXT NOT NULL,
+    instance_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    value TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (namespace, instance_id, name)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS artifacts_by_name ON artifacts (namespace, name);
+"""
+
+
+class ArtifactStore:
+    """One connection per thread, sqlite3 connections can't be shared"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.local = threading.local()
+        self.connection().executescript(SCHEMA)
+
+    def connection(self) -> sqlite3.Connection:
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self.path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+            self.local.connection = connection
+        return connection
+
+    def get(self, namespace: str, instance_id: str, name: str):
+        """The stored value, or None"""
+        row = (
+            self.connection()
+            .execute(
+                "SELECT value FROM artifacts"
+                " WHERE namespace = ? AND instance_id = ? AND name = ?",
+                (namespace, instance_id, name),
+            )
+            .fetchone()
+        )
+        return None if row is None else json.loads(row[0])
+
+    def get_all(self, namespace: str, instance_id: str) -> dict:
+        rows = self.connection().execute(
+            "SELECT name, value FROM artifacts WHERE namespace = ? AND instance_id = ?",
+            (namespace, instance_id),
+        )
+        return {name: json.loads(value) for name, value in rows}
+
+    def put(self, namespace: str, instance_id: str, values: dict):
+        """Store several artifacts of one instance in one transaction"""
+        now = time.time()
+        connection = self.connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.executemany(
+                "INSERT OR REPLACE INTO artifacts VALUES (?, ?, ?, ?, ?)",
+                [
+                    (namespace, instance_id, name, json.dumps(value), now)
+                    for name, value in values.items()
+                ],
+            )
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def instances(self, namespace: str, name: str) -> list[str]:
+        """Ids of the instances that have the artifact, e.g. which are indexed"""
+        rows = self.connection().execute(
+            "SELECT instance_id FROM artifacts WHERE namespace = ? AND name = ?"
+            " ORDER BY instance_id",
+            (namespace, name),
+        )
+        return [instance_id for (instance_id,) in rows]
+
+    def counts(self, namespace: str) -> dict[str, int]:
+        """Number of instances per artifact name"""
+        rows = self.connection().execute(
+            "SELECT name, COUNT(*) FROM artifacts WHERE namespace = ? GROUP BY name",
+            (namespace,),
+        )
+        return dict(rows.fetchall())
+
+
+def default_artifact_store() -> ArtifactStore:
+    return ArtifactStore(cache_path("artifacts.sqlite3"))
@@ -0,0 +1,43 @@
+"""
+Location of on-disk caches and atomic file writes.
+
+Caches live under ./cache unless SWE_BENCH_UTIL_CACHE_DIR is set.
+"""
+
+import os
+import tempfile
+from contextlib import contextmanager
+
+CACHE_DIR_ENV = "SWE_BENCH_UTIL_CACHE_DIR"
+
+
+def cache_path(*parts: str) -> str:
+    """Path inside the cache dir, creating the parent directory"""
+    path = os.path.join(os.environ.get(CACHE_DIR_ENV, "cache"), *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+@contextmanager
+def atomic_open(path: str, mode: str = "w", buffering: int = -1):
+    """
+    Open a temp file in the same directory, renamed over path on success.
+    Readers never see a partially written file.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, mode, buffering=buffering) as f:
+            yield f
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def write_atomic(path: str, data: str | bytes):
+    """Write to a temp file in the same directory, then rename over path"""
+    with atomic_open(path, "wb" if isinstance(data, bytes) else "w") as f:
+        f.write(data)
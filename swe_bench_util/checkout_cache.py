@@ -0,0 +1,193 @@
+"""
+Disk budget for the checkouts directory.
+
+Entries are the plain clones (checkouts/<dataset>/<repo>), bare mirrors
+(checkouts/<dataset>/mirrors/<repo>.git) and per-instance worktrees
+(checkouts/<dataset>/worktrees/<repo>/<instance>). Last use is the entry
+directory's mtime, set by touch() whenever a checkout is used, so it is
+shared between processes without extra state. Over budget, gc() removes
+the least recently used entries first. A mirror is used whenever one of
+its worktrees is, so its worktrees go before it.
+"""
+
+import os
+import re
+import shutil
+import time
+from dataclasses import dataclass
+
+from swe_bench_util import trace
+
+# Evicted first when last used at the same time
+KIND_ORDER = {"worktree": 0, "clone": 1, "mirror": 2}
+
+SIZE_UNITS = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+
+
+def parse_size(text: str) -> int:
+    """Bytes in e.g. "500M", "20G" or "1.5T", powers of 1024"""
+    match = re.fullmatch(r"\s*([\d.]+)\s*([KMGT]?)(I?B)?\s*", text.upper())
+    if not match:
+        raise ValueError(f"Invalid size '{text}'")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2)])
+
+
+def format_size(size: float) -> str:
+    for unit in ["B", "K", "M", "G"]:
+        if abs(size) < 1024:
+            return f"{size:.1f}{unit}" if unit != "B" else f"{size:.0f}B"
+        size /= 1024
+    return f"{size:.1f}T"
+
+
+def disk_usage(path: str) -> int:
+    """Allocated bytes of the files under path, without following symlinks"""
+    total = 0
+    for dirpath, dirnames, filenames in os.walk(path):
+        for name in dirnames + filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, name)).st_blocks * 512
+            except FileNotFoundError:
+                pass
+    return total
+
+
+@dataclass
+class CheckoutEntry:
+    path: str
+    # "clone", "mirror" or "worktree"
+    kind: str
+    size: int
+    last_used: float
+
+    @property
+    def mirror(self) -> str | None:
+        """The mirror a worktree was added from"""
+        if self.kind != "worktree":
+            return None
+        repo_dir = os.path.dirname(self.path)
+        dataset_dir = os.path.dirname(os.path.dirname(repo_dir))
+        return os.path.join(dataset_dir, "mirrors", f"{os.path.basename(repo_dir)}.git")
+
+
+def entry_kind(dirpath: str, dirnames: list[str], filenames: list[str]):
+    parent = os.path.basename(os.path.dirname(dirpath))
+    grandparent = os.path.basename(os.path.dirname(os.path.dirname(dirpath)))
+    if parent == "mirrors" and dirpath.endswith(".git"):
+        return "mirror"
+    if grandparent == "worktrees" and ".git" in filenames:
+        return "worktree"
+    if ".git" in dirnames:
+        return "clone"
+    return None
+
+
+class CheckoutCache:
+    """
+    Last-use tracking and LRU eviction under root, plus the clone options.
+
+    With max_bytes set, maybe_gc() evicts down to the budget, skipping
+    entries used within min_idle seconds, which other processes may still
+    be working in. Sizes are measured once per process and again only
+    after the entry is touched.
+    """
+
+    def __init__(
+        self,
+        root: str = "checkouts",
+        max_bytes: int | None = None,
+        min_idle: float = 300,
+        clone_filter: str | None = None,
+    ):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.min_idle = min_idle
+        self.clone_filter = clone_filter
+        self.sizes: dict[str, int] = {}
+
+    def touch(self, path: str):
+        if os.path.exists(path):
+            os.utime(path)
+            self.sizes.pop(os.path.normpath(path), None)
+
+    def entries(self) -> list[CheckoutEntry]:
+        entries = []
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            kind = entry_kind(dirpath, dirnames, filenames)
+            if kind is None:
+                continue
+            # Don't descend into the checkout itself
+            dirnames.clear()
+            path = os.path.normpath(dirpath)
+            if path not in self.sizes:
+                self.sizes[path] = disk_usage(path)
+            entries.append(
+                CheckoutEntry(path, kind, self.sizes[path], os.stat(path).st_mtime)
+            )
+        return entries
+
+    def evict(self, entry: CheckoutEntry):
+        from swe_bench_util.worktree import WORKTREES
+
+        with trace.span("evict", path=entry.path, kind=entry.kind):
+            if entry.kind == "worktree":
+                WORKTREES.remove(entry.mirror, entry.path)
+            elif entry.kind == "mirror":
+                WORKTREES.remove(entry.path)
+            else:
+                shutil.rmtree(entry.path, ignore_errors=True)
+            self.sizes.pop(entry.path, None)
+        trace.count("evicted_bytes", entry.size)
+
+    def gc(
+        self,
+        max_bytes: int,
+        keep: set[str] = frozenset(),
+        min_idle: float | None = None,
+        dry_run: bool = False,
+    ) -> list[CheckoutEntry]:
+        """
+        Remove least recently used entries until the total fits in max_bytes.
+        Entries in keep, used within min_idle seconds, or mirrors with
+        worktrees left are skipped. Returns the evicted entries.
+        """
+        min_idle = self.min_idle if min_idle is None else min_idle
+        keep = {os.path.normpath(path) for path in keep}
+        entries = self.entries()
+        total = sum(entry.size for entry in entries)
+        if total <= max_bytes:
+            return []
+        worktrees_of: dict[str, set[str]] = {}
+        for entry in entries:
+            if entry.kind == "worktree":
+                worktrees_of.setdefault(entry.mirror, set()).add(entry.path)
+        now = time.time()
+        evicted = []
+        for entry in sorted(
+            entries, key=lambda entry: (entry.last_used, KIND_ORDER[entry.kind])
+        ):
+            if total <= max_bytes:
+                break
+            if entry.path in keep or now - entry.last_used < min_idle:
+                continue
+            if worktrees_of.get(entry.path):
+                continue
+            if not dry_run:
+                self.evict(entry)
+            if entry.kind == "worktree":
+                worktrees_of[entry.mirror].discard(entry.path)
+            total -= entry.size
+            evicted.append(entry)
+        return evicted
+
+    def maybe_gc(self, keep: set[str] = frozenset()) -> list[CheckoutEntry]:
+        """gc() down to max_bytes, if a budget is set"""
+        if self.max_bytes is None:
+            return []
+        evicted = self.gc(self.max_bytes, keep)
+        for entry in evicted:
+            print(f"Evicted {entry.kind} '{entry.path}' ({format_size(entry.size)})")
+        return evicted
+
+
+CHECKOUTS = CheckoutCache()
@@ -1,30 +1,88 @@
-"""This module provides the CLI."""
+"""
+This module provides the CLI.
+
+Heavy dependencies (datasets, openai, streaming_assistants, tqdm) are imported
+inside the commands that use them, so --version and --help start fast.
+"""
+
+from contextlib import contextmanager
 from dataclasses import asdict
+from functools import partial
 from typing import Optional
 import json
 import sys
 import os
 import subprocess
+import time
 import typer
-from datasets import load_dataset
-from dotenv import load_dotenv
 
-from swe_bench_util import __app_name__, __version__
-from swe_bench_util.file_hint_eval import eval_file_hints_vs_oracle, BenchExample, FileHint
-
-from swe_bench_util.index.astra_assistants import (
-    index_to_astra_assistants,
-    create_assistant,
-    get_retrieval_file_ids,
+from swe_bench_util import __app_name__, __version__, trace
+from swe_bench_util.artifact_store import ArtifactStore, default_artifact_store
+from swe_bench_util.cache import cache_path, write_atomic
+from swe_bench_util.checkout_cache import (
+    CHECKOUTS,
+    CheckoutCache,
+    format_size,
+    parse_size,
+)
+from swe_bench_util.file_hint_eval import eval_file_hints_vs_oracle, FileHint
+from swe_bench_util.dataset_stream import stream_filtered_rows
+from swe_bench_util.diff_parser import parse_unified_diff
+from swe_bench_util.eval_stream import HintAggregator, JsonlFollower, parse_hint_line
+from swe_bench_util.exec_runner import bench_env, run_instances
+from swe_bench_util.export import (
+    markdown_text,
+    write_jsonl,
+    write_markdown_files,
+    write_parquet,
 )
+from swe_bench_util.git_snapshot import CatFile, GitSnapshot
+from swe_bench_util.instance_index import select_indices, select_instances
+from swe_bench_util.oracle import bench_example, bench_example_from_dict, load_oracle
+from swe_bench_util.pipeline import run_pipeline
+from swe_bench_util.sharding import (
+    merge_records,
+    parse_shard,
+    read_records,
+    shard_positions,
+)
+from swe_bench_util.worktree import WORKTREES, mirror_dir, worktree_dir
 
 app = typer.Typer()
 get_app = typer.Typer()
 app.add_typer(get_app, name="get")
 index_app = typer.Typer()
 app.add_typer(index_app, name="index")
+checkout_app = typer.Typer()
+app.add_typer(checkout_app, name="checkout")
 
-load_dotenv("./.env")
+# Options shared by several commands
+WORKTREE_OPTION = typer.Option(
+    False, help="Use a per-instance worktree from a shared bare mirror."
+)
+STREAMING_OPTION = typer.Option(
+    False,
+    help="Read rows lazily from the source, stopping once the selection is complete.",
+)
+CHECKOUT_BUDGET_OPTION = typer.Option(
+    None,
+    help="Disk budget for checkouts/, e.g. 50G. Least recently used clones, "
+    "mirrors and worktrees are evicted beyond it.",
+)
+CLONE_FILTER_OPTION = typer.Option(
+    None,
+    help="Partial clone filter for new clones: blob:none (blobless) or "
+    "tree:0 (treeless). Missing objects are fetched on demand.",
+)
+SNAPSHOT_OPTION = typer.Option(
+    False,
+    help="Read files from the object store of a bare mirror instead of a checkout.",
+)
+SHARD_OPTION = typer.Option(
+    None,
+    help="Only shard i/N of the selection (0 <= i < N), balanced and grouped "
+    "by repo, the same on every machine.",
+)
 
 
 def _version_callback(value: bool) -> None:
@@ -34,9 +92,8 @@ def _version_callback(value: bool) -> None:
 
 
 def write_file(path, text):
-    with open(path, "w") as f:
-        f.write(text)
-        print(f"File '{path}' was saved", file=sys.stderr)
+    write_atomic(path, text)
+    print(f"File '{path}' was saved", file=sys.stderr)
 
 
 def write_json(path, name, data):
@@ -48,90 +105,296 @@ def write_json(path, name, data):
         raise e
 
 
-def format_markdown_code_block(text):
-    text = text.replace("```", "\\`\\`\\`")
-    return f"```\n{text}\n```"
-
-
 def write_markdown(path, name, data):
-    template_fields = ["instance_id" "repo", "base_commit", "problem_statement"]
-    text = f"""# {data['instance_id']}
-
-* repo: {data['repo']}
-* base_commit: {data['base_commit']}
-
-## problem_statement
-{data['problem_statement']}
-"""
-    for k, v in data.items():
-        if k not in template_fields:
-            text += f"""## {k}\n{format_markdown_code_block(v)}\n\n"""
     md_path = f"{path}/{name}.md"
-    write_file(md_path, text)
+    write_file(md_path, markdown_text(data))
 
 
-def maybe_clone(repo_url, repo_dir):
+def maybe_clone(repo_url, repo_dir, clone_filter: Optional[str] = None):
     if not os.path.exists(repo_dir):
         os.makedirs(repo_dir)
         print(f"Directory '{repo_dir}' was created.")
     if not os.path.exists(f"{repo_dir}/.git"):
         # Clone the repo if the directory doesn't exist
-        result = subprocess.run(
-            ["git", "clone", repo_url, repo_dir],
-            check=True,
-            text=True,
-            capture_output=True,
-        )
+        filter_args = [f"--filter={clone_filter}"] if clone_filter else []
+        with trace.span("clone", repo=repo_url):
+            result = subprocess.run(
+                ["git", "clone", *filter_args, repo_url, repo_dir],
+                check=True,
+                text=True,
+                capture_output=True,
+            )
         print("Output:", result.stdout)
         print("Error:", result.stderr)
 
 
 def checkout_commit(repo_dir, commit_hash):
-    subprocess.run(["git", "checkout", commit_hash], cwd=repo_dir, check=True)
+    with trace.span("checkout", commit=commit_hash):
+        subprocess.run(["git", "checkout", commit_hash], cwd=repo_dir, check=True)
 
 
 def checkout_dir(dataset_name: str, repo: str):
     return f"checkouts/{dataset_name}/{repo.replace('/', '__')}"
 
 
-def checkout_repo_at_commit(repo: str, dataset_name: str, base_commit: str) -> str:
+def checkout_repo_at_commit(
+    repo: str,
+    dataset_name: str,
+    base_commit: str,
+    instance_id: Optional[str] = None,
+    worktree: bool = False,
+    checkouts: CheckoutCache = CHECKOUTS,
+) -> str:
+    """
+    Check out base_commit and return the path.
+    With worktree, each instance gets its own worktree from a shared bare mirror,
+    so instances of the same repo can be checked out concurrently.
+    The checkout is marked as used, and others are evicted if over budget.
+    """
     repo_url = f"git@github.com:{repo}.git"
+    if worktree:
+        mirror = mirror_dir(dataset_name, repo)
+        path = WORKTREES.ensure(
+            repo_url,
+            mirror,
+            worktree_dir(dataset_name, repo, instance_id or base_commit),
+            base_commit,
+            checkouts.clone_filter,
+        )
+        use_checkout(checkouts, path, mirror)
+        return path
     path = checkout_dir(dataset_name, repo)
-    maybe_clone(repo_url, path)
-    # Worktrees are another option here if we want to support concurrent checkouts
+    maybe_clone(repo_url, path, checkouts.clone_filter)
     checkout_commit(path, base_commit)
+    use_checkout(checkouts, path)
     return path
 
 
-@app.command()
+def use_checkout(checkouts: CheckoutCache, *paths: str):
+    """Mark paths as just used, then evict others down to the budget"""
+    for path in paths:
+        checkouts.touch(path)
+    checkouts.maybe_gc(keep={*paths, *WORKTREES.leased})
+
+
+def snapshot_at_commit(
+    repo: str,
+    dataset_name: str,
+    base_commit: str,
+    cat_files: dict,
+    checkouts: CheckoutCache = CHECKOUTS,
+) -> GitSnapshot:
+    """
+    base_commit read from the repo's bare mirror, without a checkout.
+    cat_files holds one cat-file process per mirror, shared by its snapshots.
+    """
+    mirror = WORKTREES.ensure_mirror(
+        f"git@github.com:{repo}.git",
+        mirror_dir(dataset_name, repo),
+        base_commit,
+        checkouts.clone_filter,
+    )
+    # Mirrors with a cat-file process open stay
+    use_checkout(checkouts, mirror, *cat_files)
+    if mirror not in cat_files:
+        cat_files[mirror] = CatFile(mirror)
+    return GitSnapshot(mirror, base_commit, cat_files[mirror])
+
+
+ASTRA_NAMESPACE = "astra_assistants"
+
+# Artifacts earlier versions kept next to the checkout, and how to read them
+SIDECAR_FILES = {
+    "file_ids": ("{id}-file_ids.json", json.loads),
+    "excluded_files": ("{id}-excluded_files.json", json.loads),
+    "assistant_id": ("{id}-assistant_id.txt", str),
+}
+
+
+def import_sidecar_files(store: ArtifactStore, namespace: str, id: str, path: str):
+    """Move sidecar files found in the checkout into the artifact store"""
+    for name, (template, parse) in SIDECAR_FILES.items():
+        sidecar = os.path.join(path, template.format(id=id))
+        if os.path.exists(sidecar):
+            if store.get(namespace, id, name) is None:
+                with open(sidecar, "r") as f:
+                    store.put(namespace, id, {name: parse(f.read())})
+            os.remove(sidecar)
+
+
+@contextmanager
+def leased_checkout(
+    row_data, dataset_name: str, worktree: bool, checkouts: CheckoutCache = CHECKOUTS
+):
+    """Context manager version of checkout_repo_at_commit, exclusive for worktrees"""
+    if not worktree:
+        yield checkout_repo_at_commit(
+            row_data["repo"], dataset_name, row_data["base_commit"], checkouts=checkouts
+        )
+        return
+    repo = row_data["repo"]
+    mirror = mirror_dir(dataset_name, repo)
+    with WORKTREES.lease(
+        f"git@github.com:{repo}.git",
+        mirror,
+        worktree_dir(dataset_name, repo, row_data["instance_id"]),
+        row_data["base_commit"],
+        checkouts.clone_filter,
+    ) as path:
+        use_checkout(checkouts, path, mirror)
+        yield path
+        # The run may have taken long, keep it from looking idle to others
+        checkouts.touch(path)
+
+
+def checkout_cache(
+    checkout_budget: Optional[str], clone_filter: Optional[str]
+) -> CheckoutCache:
+    """The checkouts cache with the --checkout-budget and --clone-filter options"""
+    if checkout_budget is None and clone_filter is None:
+        return CHECKOUTS
+    try:
+        max_bytes = parse_size(checkout_budget) if checkout_budget else None
+    except ValueError as e:
+        raise typer.BadParameter(str(e), param_hint="--checkout-budget")
+    return CheckoutCache(max_bytes=max_bytes, clone_filter=clone_filter)
+
+
+@checkout_app.callback(invoke_without_command=True)
 def checkout(
+    ctx: typer.Context,
     split: str = "dev",
     dataset_name="princeton-nlp/SWE-bench",
     repo: Optional[str] = None,
     id: Optional[str] = None,
     exec: Optional[str] = None,
+    worktree: bool = WORKTREE_OPTION,
+    workers: Optional[int] = typer.Option(
+        None,
+        help="Run --exec for this many instances at once (implies --worktree when > 1). "
+        "Failures are logged instead of aborting, and reruns skip successes.",
+    ),
+    timeout: Optional[float] = typer.Option(
+        None,
+        help="Per-instance wall-clock limit in seconds, requires --exec and --workers.",
+    ),
+    log_dir: str = typer.Option(
+        "logs", help="Per-instance stdout/stderr logs and ledger.jsonl for --workers."
+    ),
+    streaming: bool = STREAMING_OPTION,
+    checkout_budget: Optional[str] = CHECKOUT_BUDGET_OPTION,
+    clone_filter: Optional[str] = CLONE_FILTER_OPTION,
+    shard: Optional[str] = SHARD_OPTION,
 ):
-    dataset = load_filtered_dataset(split, dataset_name, repo=repo, id=id)
+    """Clone the repo for examples and checkout the base_commit"""
+    if ctx.invoked_subcommand is not None:
+        return
+    if timeout is not None and not (exec and workers):
+        raise typer.BadParameter(
+            "only applies to --exec with --workers", param_hint="--timeout"
+        )
+    checkouts = checkout_cache(checkout_budget, clone_filter)
+    dataset = load_filtered_dataset(
+        split, dataset_name, repo=repo, id=id, streaming=streaming, shard=shard
+    )
+    if exec and workers:
+        results = run_instances(
+            dataset,
+            exec,
+            partial(
+                leased_checkout,
+                dataset_name=dataset_name,
+                worktree=worktree or workers > 1,
+                checkouts=checkouts,
+            ),
+            workers=workers,
+            timeout=timeout,
+            log_dir=log_dir,
+        )
+        failed = [result for result in results if result.status != "success"]
+        print(f"{len(results) - len(failed)} succeeded, {len(failed)} failed")
+        if failed:
+            raise typer.Exit(code=1)
+        return
     for row_data in dataset:
         path = checkout_repo_at_commit(
-            row_data["repo"], dataset_name, row_data["base_commit"]
+            row_data["repo"],
+            dataset_name,
+            row_data["base_commit"],
+            instance_id=row_data["instance_id"],
+            worktree=worktree,
+            checkouts=checkouts,
         )
         print(f"checked out to '{path}'")
         if exec:
-            env_vars = {
-                **os.environ,
-                **{
-                    f"BENCH_{key.upper()}": str(value)
-                    for key, value in row_data.items()
-                },
-            }
-            env_vars["CALLING_CWD"] = os.getcwd()
-            env_vars["BENCH_REPO_DIR"] = path
+            env_vars = bench_env(row_data, path)
             # This will raise if the command is unsuccessful.
-            result = subprocess.run(exec, check=True, env=env_vars, shell=True)
+            with trace.span("exec", instance=row_data["instance_id"]):
+                result = subprocess.run(exec, check=True, env=env_vars, shell=True)
             print(f"Command: '{exec}', Exit Code: {result.returncode}")
 
 
+@checkout_app.command()
+def stats(
+    root: str = typer.Option("checkouts", help="Checkouts directory."),
+    checkout_budget: Optional[str] = typer.Option(
+        None, help="Also show which entries gc would evict for this budget."
+    ),
+):
+    """Size and last use of each clone, mirror and worktree, least recent first"""
+    from swe_bench_util.checkout_cache import KIND_ORDER
+
+    checkouts = CheckoutCache(root)
+    entries = sorted(
+        checkouts.entries(),
+        key=lambda entry: (entry.last_used, KIND_ORDER[entry.kind]),
+    )
+    evicted = set()
+    if checkout_budget:
+        max_bytes = checkout_cache(checkout_budget, None).max_bytes
+        evicted = {
+            entry.path for entry in checkouts.gc(max_bytes, min_idle=0, dry_run=True)
+        }
+    now = time.time()
+    print("\t".join(["kind", "size", "idle_h", "path"]))
+    for entry in entries:
+        flag = "  EVICT" if entry.path in evicted else ""
+        print(
+            f"{entry.kind}\t{format_size(entry.size)}"
+            f"\t{(now - entry.last_used) / 3600:.1f}\t{entry.path}{flag}"
+        )
+    by_kind: dict[str, list[int]] = {}
+    for entry in entries:
+        by_kind.setdefault(entry.kind, []).append(entry.size)
+    totals = ", ".join(
+        f"{len(sizes)} {kind}s {format_size(sum(sizes))}"
+        for kind, sizes in sorted(by_kind.items())
+    )
+    total = sum(entry.size for entry in entries)
+    print(f"total {format_size(total)} ({totals})")
+
+
+@checkout_app.command()
+def gc(
+    checkout_budget: str = typer.Option(
+        ..., help="Evict least recently used entries until checkouts/ fits, e.g. 50G."
+    ),
+    root: str = typer.Option("checkouts", help="Checkouts directory."),
+    min_idle: float = typer.Option(
+        300, help="Keep entries used within this many seconds, other runs may use them."
+    ),
+    dry_run: bool = typer.Option(False, help="Only list what would be evicted."),
+):
+    """Evict least recently used checkouts down to the budget"""
+    max_bytes = checkout_cache(checkout_budget, None).max_bytes
+    evicted = CheckoutCache(root).gc(max_bytes, min_idle=min_idle, dry_run=dry_run)
+    verb = "Would evict" if dry_run else "Evicted"
+    for entry in evicted:
+        print(f"{verb} {entry.kind} '{entry.path}' ({format_size(entry.size)})")
+    freed = format_size(sum(entry.size for entry in evicted))
+    print(f"{verb} {len(evicted)} entries, {freed}")
+
+
 @index_app.command()
 def astra_assistants(
     split: str = "dev",
@@ -139,8 +402,67 @@ def astra_assistants(
     max: int = 1,
     repo: Optional[str] = None,
     id: Optional[str] = None,
+    worktree: bool = WORKTREE_OPTION,
+    snapshot: bool = SNAPSHOT_OPTION,
+    streaming: bool = STREAMING_OPTION,
+    upload_cache: bool = typer.Option(
+        True, help="Reuse remote files already uploaded with the same content and path."
+    ),
+    max_file_bytes: int = typer.Option(
+        1 << 20, help="Skip tracked files larger than this many bytes."
+    ),
+    upload_engine: str = typer.Option(
+        "threads",
+        help="'threads', or 'async' for a shared rate limit and adaptive concurrency.",
+    ),
+    upload_rate: float = typer.Option(
+        20.0,
+        help="Upload requests per second across all files, for --upload-engine async.",
+    ),
+    upload_concurrency: int = typer.Option(
+        8, help="Initial concurrent uploads for --upload-engine async."
+    ),
+    resume: bool = typer.Option(
+        True,
+        help="Continue an interrupted upload from its journal instead of starting over.",
+    ),
+    pipeline: bool = typer.Option(
+        False,
+        help="Check out and index later instances while earlier ones run inference.",
+    ),
+    inference_workers: int = typer.Option(
+        4, help="Concurrent streaming runs with --pipeline."
+    ),
+    retrieval_cache: bool = typer.Option(
+        True,
+        help="Reuse retrieval results of earlier runs with the same assistant, "
+        "model and prompt instead of running inference again.",
+    ),
+    refresh_retrieval: bool = typer.Option(
+        False, help="Run inference even if cached, and replace the cached result."
+    ),
+    checkout_budget: Optional[str] = CHECKOUT_BUDGET_OPTION,
+    clone_filter: Optional[str] = CLONE_FILTER_OPTION,
+    shard: Optional[str] = SHARD_OPTION,
 ):
-    dataset = load_filtered_dataset(split, dataset_name, repo=repo, id=id)
+    from swe_bench_util.index.astra_assistants import (
+        EMBEDDING_MODEL,
+        index_to_astra_assistants,
+        create_assistant,
+        retrieve,
+    )
+    from swe_bench_util.index.retrieval_cache import default_retrieval_cache
+    from swe_bench_util.index.upload_cache import default_upload_cache
+    from swe_bench_util.index.upload_journal import UploadJournal
+
+    uploads = default_upload_cache(EMBEDDING_MODEL) if upload_cache else None
+    retrievals = default_retrieval_cache() if retrieval_cache else None
+    store = default_artifact_store()
+    checkouts = checkout_cache(checkout_budget, clone_filter)
+
+    dataset = load_filtered_dataset(
+        split, dataset_name, repo=repo, id=id, streaming=streaming, shard=shard
+    )
     if len(dataset) > max:
         user_input = input(
             f"Selected {len(dataset)} entries in split {split}. Do you want to continue indexing? (y/n): "
@@ -148,56 +470,197 @@ def astra_assistants(
         if user_input.lower() != "y":
             print("Aborting.")
             return
-    bench_list = []
-    file_list = []
-    search_string_list = []
-    for row_data in dataset:
+
+    def prepare(row_data):
+        """Checkout, index and create the assistant for one instance"""
         id = row_data["instance_id"]
-        path = checkout_repo_at_commit(
-            row_data["repo"], dataset_name, row_data["base_commit"]
-        )
-        if not os.path.exists(path):
-            os.makedirs(path)
-            print(f"Directory '{path}' was created.")
-        file_id_path_mapping = []
-        if os.path.exists(f"{path}/{id}-file_ids.json"):
-            with open(f"{path}/{id}-file_ids.json", "r") as file:
-                print(f"trying to load file {file} from {path}/{id}-file_ids.json")
-                file_id_path_mapping = json.load(file)
-        else:
-            file_id_path_mapping, excluded_files = index_to_astra_assistants(path)
-            write_file(f"{path}/{id}-file_ids.json", json.dumps(file_id_path_mapping, indent=2))
-            write_file(
-                f"{path}/{id}-excluded_files.json", json.dumps(excluded_files, indent=2)
+        if snapshot:
+            source = snapshot_at_commit(
+                row_data["repo"],
+                dataset_name,
+                row_data["base_commit"],
+                cat_files,
+                checkouts,
             )
-        assistant_id = ""
-        if os.path.exists(f"{path}/{id}-assistant_id.txt"):
-            with open(f"{path}/{id}-assistant_id.txt", "r") as file:
-                print(f"trying to load file {file} from {path}/{id}-assistant_id.txt")
-                assistant_id = file.read()
         else:
+            source = checkout_repo_at_commit(
+                row_data["repo"],
+                dataset_name,
+                row_data["base_commit"],
+                instance_id=id,
+                worktree=worktree,
+                checkouts=checkouts,
+            )
+            if not os.path.exists(source):
+                os.makedirs(source)
+                print(f"Directory '{source}' was created.")
+            import_sidecar_files(store, ASTRA_NAMESPACE, id, source)
+        file_id_path_mapping = store.get(ASTRA_NAMESPACE, id, "file_ids")
+        if file_id_path_mapping is None:
+            journal = UploadJournal(
+                cache_path("upload_journal", f"{id}.jsonl"), resume=resume
+            )
+            with trace.span("index", instance=id):
+                file_id_path_mapping, excluded_files = index_to_astra_assistants(
+                    source,
+                    upload_cache=uploads,
+                    max_file_bytes=max_file_bytes,
+                    engine=upload_engine,
+                    rate=upload_rate,
+                    concurrency=upload_concurrency,
+                    journal=journal,
+                )
+            store.put(
+                ASTRA_NAMESPACE,
+                id,
+                {
+                    "file_ids": file_id_path_mapping,
+                    "excluded_files": excluded_files,
+                    "status": "indexed",
+                },
+            )
+            journal.remove()
+        assistant_id = store.get(ASTRA_NAMESPACE, id, "assistant_id")
+        if assistant_id is None:
             file_ids = list(file_id_path_mapping.keys())
 
-            assistant = create_assistant(file_ids, id)
-            write_file(f"{path}/{id}-assistant_id.txt", assistant.id)
+            with trace.span("create_assistant", instance=id):
+                assistant = create_assistant(file_ids, id)
             assistant_id = assistant.id
-        retrieval_file_ids, search_strings = get_retrieval_file_ids(assistant_id, row_data)
-        search_string_list.append(search_strings[0])
+            store.put(
+                ASTRA_NAMESPACE,
+                id,
+                {"assistant_id": assistant_id, "status": "assistant_created"},
+            )
+        return assistant_id, file_id_path_mapping
+
+    def infer(row_data, assistant_id, file_id_path_mapping):
+        """Streamed retrieval run, only needs what prepare returned"""
+        id = row_data["instance_id"]
+        with trace.span("inference", instance=id):
+            result = retrieve(
+                assistant_id, row_data, cache=retrievals, refresh=refresh_retrieval
+            )
+        store.put(
+            ASTRA_NAMESPACE,
+            id,
+            {
+                "patch": result.text,
+                "retrieval_chunks": result.chunks,
+                "run_metrics": result.metrics,
+            },
+        )
         file_names = []
-        for retrieval_file_id in retrieval_file_ids:
+        for retrieval_file_id in result.file_ids:
             file_names.append(file_id_path_mapping[retrieval_file_id])
-        file_list += [FileHint(id = id, hint_files = file_names)]
-        repo = row_data["repo"]
-        bench_list += oracle(split=split, dataset_name=dataset_name, repo=repo, id=id)
-    evals = eval_file_hints_vs_oracle(bench_list, file_list)
-    i = 0
+        hint = FileHint(id=id, hint_files=file_names)
+        # A run may answer without calling retrieval at all
+        search_string = result.search_strings[0] if result.search_strings else ""
+        return hint, search_string
+
     dict_evals = []
-    for eval in evals:
-        eval.search_string=search_string_list[i]
-        dict_evals.append(asdict(eval))
-        i+=1
-    print(eval)
-    write_json("recall","results", dict_evals)
+
+    def record(row_data, hint, search_string):
+        """Evaluate one instance and rewrite results.json with it added"""
+        for eval in eval_file_hints_vs_oracle([bench_example(row_data)], [hint]):
+            eval.search_string = search_string
+            dict_evals.append(asdict(eval))
+            print(eval)
+        write_json("recall", "results", dict_evals)
+        store.put(ASTRA_NAMESPACE, row_data["instance_id"], {"status": "evaluated"})
+
+    # Only used by prepare, which runs on this thread
+    cat_files = {}
+    try:
+        if pipeline:
+            run_pipeline(dataset, prepare, infer, record, workers=inference_workers)
+        else:
+            for row_data in dataset:
+                record(row_data, *infer(row_data, *prepare(row_data)))
+    finally:
+        for cat_file in cat_files.values():
+            cat_file.close()
+
+
+@index_app.command()
+def bm25(
+    split: str = "dev",
+    dataset_name="princeton-nlp/SWE-bench",
+    repo: Optional[str] = None,
+    id: Optional[str] = None,
+    worktree: bool = WORKTREE_OPTION,
+    streaming: bool = STREAMING_OPTION,
+    top_k: int = typer.Option(10, help="Files to hint per instance."),
+    max_file_bytes: int = typer.Option(
+        1 << 20, help="Skip tracked files larger than this many bytes."
+    ),
+    output: str = typer.Option(
+        "examples/bm25_file_hints.jsonl", help="JSONL of hints, one line per instance."
+    ),
+    snapshot: bool = SNAPSHOT_OPTION,
+    checkout_budget: Optional[str] = CHECKOUT_BUDGET_OPTION,
+    clone_filter: Optional[str] = CLONE_FILTER_OPTION,
+    shard: Optional[str] = SHARD_OPTION,
+):
+    """Hint files by BM25 over the checkout, offline"""
+    from swe_bench_util.index.bm25 import (
+        load_or_build_bm25,
+        load_or_build_bm25_snapshot,
+    )
+
+    checkouts = checkout_cache(checkout_budget, clone_filter)
+    dataset = load_filtered_dataset(
+        split, dataset_name, repo=repo, id=id, streaming=streaming, shard=shard
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    bench_list = []
+    hints = []
+    cat_files = {}
+    with open(output, "w") as f:
+        for row_data in dataset:
+            instance_id = row_data["instance_id"]
+            if snapshot:
+                source = snapshot_at_commit(
+                    row_data["repo"],
+                    dataset_name,
+                    row_data["base_commit"],
+                    cat_files,
+                    checkouts,
+                )
+            else:
+                source = checkout_repo_at_commit(
+                    row_data["repo"],
+                    dataset_name,
+                    row_data["base_commit"],
+                    instance_id=instance_id,
+                    worktree=worktree,
+                    checkouts=checkouts,
+                )
+            start = time.perf_counter()
+            with trace.span("bm25_index", instance=instance_id):
+                if snapshot:
+                    index = load_or_build_bm25_snapshot(source, max_file_bytes)
+                else:
+                    index = load_or_build_bm25(source, max_file_bytes)
+            indexed = time.perf_counter()
+            with trace.span("bm25_query", instance=instance_id):
+                ranked = index.search(row_data["problem_statement"], top_k)
+            print(
+                f"{instance_id}: {len(index.paths)} files indexed in "
+                f"{indexed - start:.2f}s, queried in {time.perf_counter() - indexed:.3f}s"
+            )
+            hint = FileHint(id=instance_id, hint_files=[file for file, _ in ranked])
+            # One line per instance as it finishes, for eval --follow
+            f.write(json.dumps(asdict(hint)) + "\n")
+            f.flush()
+            hints.append(hint)
+            bench_list.append(bench_example(row_data))
+    for cat_file in cat_files.values():
+        cat_file.close()
+    print(f"File '{output}' was saved", file=sys.stderr)
+    aggregator = HintAggregator(bench_list)
+    aggregator.add(hints)
+    print(aggregator.table())
 
 
 @get_app.command()
@@ -206,33 +669,119 @@ def rows(
     dataset_name: str = "princeton-nlp/SWE-bench",
     repo: Optional[str] = None,
     id: Optional[str] = None,
+    streaming: bool = STREAMING_OPTION,
+    format: str = typer.Option(
+        "files",
+        help="'files' for one JSON per instance, or a single 'jsonl' or 'parquet' file.",
+    ),
+    output: Optional[str] = typer.Option(
+        None, help="Path for jsonl/parquet, defaults to examples/rows.<format>."
+    ),
+    markdown: Optional[bool] = typer.Option(
+        None,
+        "--markdown/--no-markdown",
+        help="Also write {instance_id}.md per instance. On by default for 'files'.",
+    ),
+    workers: Optional[int] = typer.Option(
+        None, help="Threads rendering Markdown for jsonl/parquet."
+    ),
+    shard: Optional[str] = SHARD_OPTION,
 ):
     """Download one example"""
-    dataset = load_filtered_dataset(split, dataset_name, repo=repo, id=id)
-    for row_data in dataset:
-        row_id = row_data["instance_id"]
-        write_json("examples", f"{row_id}", row_data)
-        write_markdown("examples", f"{row_id}", row_data)
-
-
-def load_filtered_dataset(
-    split: str, dataset_name: str, repo: Optional[str] = None, id: Optional[str] = None
+    dataset = load_filtered_dataset(
+        split, dataset_name, repo=repo, id=id, streaming=streaming, shard=shard
+    )
+    if format == "files":
+        for row_data in dataset:
+            row_id = row_data["instance_id"]
+            write_json("examples", f"{row_id}", row_data)
+            if markdown is not False:
+                write_markdown("examples", f"{row_id}", row_data)
+        return
+    if format == "jsonl":
+        output = output or "examples/rows.jsonl"
+        count = write_jsonl(output, dataset)
+    elif format == "parquet":
+        output = output or "examples/rows.parquet"
+        count = write_parquet(output, dataset)
+    else:
+        raise typer.BadParameter(f"Unknown format '{format}'", param_hint="--format")
+    print(f"File '{output}' was saved with {count} rows", file=sys.stderr)
+    if markdown:
+        write_markdown_files("examples", dataset, workers=workers)
+
+
+def load_split(
+    split: str,
+    dataset_name: str,
+    repo: Optional[str] = None,
+    id: Optional[str] = None,
+    streaming: bool = False,
 ):
+    """Print the selection, and load the whole split unless streaming"""
     print(f"using --dataset-name '{dataset_name}' --split '{split}'")
-    dataset = load_dataset(dataset_name, split=split)
     if repo:
         print(f"      --repo '{repo}'")
-        dataset = dataset.filter(lambda el: el["repo"] == repo)
     if id:
         print(f"      --id '{id}'")
-        dataset = dataset.filter(lambda el: el["instance_id"] == id)
+    if streaming:
+        print("      --streaming")
+        return None
+    with trace.span("load_dataset", split=split):
+        from datasets import load_dataset
+
+        return load_dataset(dataset_name, split=split)
+
+
+def load_filtered_dataset(
+    split: str,
+    dataset_name: str,
+    repo: Optional[str] = None,
+    id: Optional[str] = None,
+    streaming: bool = False,
+    shard: Optional[str] = None,
+):
+    """
+    --repo and --id each accept a comma separated list, where each item may be a glob.
+    Rows are looked up in an instance index cached per dataset fingerprint.
+    With streaming, matching rows are read lazily and returned as a list of dicts.
+    With shard, only the rows of shard i/N of the selection are returned.
+    """
+    dataset = load_split(split, dataset_name, repo=repo, id=id, streaming=streaming)
+    if streaming:
+        with trace.span("stream_rows", split=split):
+            rows = stream_filtered_rows(split, dataset_name, repo=repo, id=id)
+        if shard:
+            positions = shard_selection(
+                [(row["instance_id"], row["repo"]) for row in rows], shard
+            )
+            return [rows[position] for position in positions]
+        return rows
+    with trace.span("select_instances"):
+        dataset = select_instances(dataset, repo=repo, id=id)
+    if shard:
+        keys = list(zip(dataset["instance_id"], dataset["repo"]))
+        return dataset.select(shard_selection(keys, shard))
     return dataset
 
 
+def shard_selection(keys: list[tuple[str, str]], shard: str) -> list[int]:
+    """Positions of the (instance_id, repo) keys in --shard i/N"""
+    try:
+        index, count = parse_shard(shard)
+    except ValueError as e:
+        raise typer.BadParameter(str(e), param_hint="--shard")
+    positions = shard_positions(keys, index, count)
+    repos = {keys[position][1] for position in positions}
+    print(
+        f"      --shard '{shard}': {len(positions)} of {len(keys)} instances, "
+        f"{len(repos)} repos"
+    )
+    return positions
+
+
 def diff_file_names(text: str) -> list[str]:
-    return [
-        line[len("+++ b/") :] for line in text.split("\n") if line.startswith("+++")
-    ]
+    return [file_diff.path for file_diff in parse_unified_diff(text)]
 
 
 @get_app.command()
@@ -241,29 +790,101 @@ def oracle(
     dataset_name="princeton-nlp/SWE-bench",
     repo: Optional[str] = None,
     id: Optional[str] = None,
+    streaming: bool = STREAMING_OPTION,
+    shard: Optional[str] = SHARD_OPTION,
 ):
-    """Download oracle (patched files) for all examples in split"""
-    dataset = load_filtered_dataset(split, dataset_name, repo=repo, id=id)
-    result = []
-    for row_data in dataset:
-        patch_files = diff_file_names(row_data["patch"])
-        test_patch_files = diff_file_names(row_data["test_patch"])
-        result.append(
-            BenchExample(
-                id = row_data["instance_id"],
-                repo = row_data["repo"],
-                base_commit = row_data["base_commit"],
-                patch_files = patch_files,
-                test_patch_files = test_patch_files,
-            )
+    """
+    Download oracle (patched files) for all examples in split.
+    Each entry also lists the hunks and changed line ranges per file.
+    The parsed oracle is cached per dataset fingerprint.
+    """
+    if streaming:
+        dataset = load_filtered_dataset(
+            split, dataset_name, repo=repo, id=id, streaming=True, shard=shard
         )
+        result = [bench_example(row_data) for row_data in dataset]
+    else:
+        dataset = load_split(split, dataset_name, repo=repo, id=id)
+        with trace.span("load_oracle"):
+            examples = load_oracle(dataset, dataset_name, split)
+        result = [examples[i] for i in select_indices(dataset, repo=repo, id=id)]
+        if shard:
+            keys = [(example.id, example.repo) for example in result]
+            result = [result[position] for position in shard_selection(keys, shard)]
     dict_result = [asdict(row) for row in result]
     write_json("examples", "oracle", dict_result)
     return result
 
 
+@app.command()
+def merge(
+    inputs: list[str] = typer.Argument(
+        ..., help="Per-shard oracle.json, results.json or hints JSONL files."
+    ),
+    output: str = typer.Option(
+        ..., help="Merged file, JSONL for a .jsonl path and a JSON list otherwise."
+    ),
+):
+    """Combine per-shard outputs into one, one record per instance, sorted by id"""
+    try:
+        records = merge_records([read_records(path) for path in inputs])
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        raise typer.Exit(code=1)
+    if output.endswith(".jsonl"):
+        write_atomic(output, "".join(json.dumps(record) + "\n" for record in records))
+    else:
+        write_atomic(output, json.dumps(records, indent=2))
+    print(
+        f"File '{output}' was saved with {len(records)} records "
+        f"from {len(inputs)} files",
+        file=sys.stderr,
+    )
+
+
+@app.command(name="eval")
+def eval_hints(
+    hints: str = typer.Option(
+        "examples/file_hints.jsonl", help="JSONL with id and hint_files (or file_hint)."
+    ),
+    split: str = "dev",
+    dataset_name="princeton-nlp/SWE-bench",
+    oracle_file: Optional[str] = typer.Option(
+        None, help="Read the oracle from an oracle.json instead of the dataset."
+    ),
+    follow: bool = typer.Option(
+        False, help="Keep watching the hints file and score lines as they are appended."
+    ),
+    interval: float = typer.Option(2.0, help="Seconds between checks with --follow."),
+):
+    """Score file hints against the oracle, overall and per repo"""
+    if oracle_file:
+        with open(oracle_file, "r") as f:
+            examples = [bench_example_from_dict(data) for data in json.load(f)]
+    else:
+        dataset = load_split(split, dataset_name)
+        with trace.span("load_oracle"):
+            examples = load_oracle(dataset, dataset_name, split)
+    aggregator = HintAggregator(examples)
+    follower = JsonlFollower(hints)
+    try:
+        while True:
+            lines = follower.read_new()
+            if lines:
+                with trace.span("score_hints", lines=len(lines)):
+                    aggregator.add([parse_hint_line(line) for line in lines])
+            if lines or not follow:
+                print(aggregator.table())
+            if not follow:
+                return
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        return
+
+
 @app.callback()
 def main(
+    ctx: typer.Context,
     version: Optional[bool] = typer.Option(
         None,
         "--version",
@@ -272,5 +893,23 @@ def main(
         callback=_version_callback,
         is_eager=True,
     ),
+    trace_file: Optional[str] = typer.Option(
+        None,
+        "--trace",
+        help="Time each phase per instance and write the spans to this file, "
+        "as JSONL for .jsonl or Chrome trace format otherwise. "
+        "A summary is printed at exit.",
+    ),
 ) -> None:
-    return
+    from dotenv import load_dotenv
+
+    load_dotenv("./.env")
+    if trace_file:
+        tracer = trace.enable()
+
+        def finish():
+            tracer.write(trace_file)
+            print(tracer.summary(), file=sys.stderr)
+            print(f"File '{trace_file}' was saved", file=sys.stderr)
+
+        ctx.call_on_close(finish)
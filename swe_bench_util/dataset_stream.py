@@ -0,0 +1,87 @@
+"""
+Streaming dataset selection.
+
+Rows are iterated lazily from the source and iteration stops as soon as the
+split slice or the id selection is satisfied, so fetching one instance doesn't
+download and materialize the whole split.
+"""
+
+import fnmatch
+import re
+from itertools import islice
+
+from swe_bench_util.instance_index import is_glob, parse_selector
+
+SPLIT_PATTERN = re.compile(
+    r"^(?P<name>[\w-]+)(?:\[(?P<start>-?\d+%?)?:(?P<stop>-?\d+%?)?\])?$"
+)
+
+
+def split_size(dataset_name: str, split_name: str) -> int:
+    from datasets import load_dataset_builder
+
+    return load_dataset_builder(dataset_name).info.splits[split_name].num_examples
+
+
+def parse_split(split: str, dataset_name: str) -> tuple[str, int, int | None]:
+    """
+    Parse 'dev', 'dev[0:10]' or 'dev[:10%]' into (split name, start, stop).
+    Percentages and negative bounds need the split size, which is read from
+    the dataset metadata rather than the data.
+    """
+    match = SPLIT_PATTERN.match(split.replace(" ", ""))
+    if not match:
+        raise ValueError(f"Split '{split}' is not supported with --streaming")
+    name = match["name"]
+    bounds = [match["start"], match["stop"]]
+    size = None
+    if any(
+        bound and (bound.endswith("%") or bound.startswith("-")) for bound in bounds
+    ):
+        size = split_size(dataset_name, name)
+
+    def resolve(bound):
+        if bound is None:
+            return None
+        if bound.endswith("%"):
+            value = round(size * int(bound[:-1]) / 100)
+        else:
+            value = int(bound)
+        return max(size + value, 0) if value < 0 else value
+
+    start, stop = [resolve(bound) for bound in bounds]
+    return name, start or 0, stop
+
+
+def matches(patterns: list[str], value: str) -> bool:
+    return any(
+        fnmatch.fnmatchcase(value, pattern) if is_glob(pattern) else value == pattern
+        for pattern in patterns
+    )
+
+
+def stream_filtered_rows(
+    split: str, dataset_name: str, repo: str | None = None, id: str | None = None
+) -> list[dict]:
+    """Rows matching --repo and --id within the split slice, read lazily"""
+    from datasets import load_dataset
+
+    name, start, stop = parse_split(split, dataset_name)
+    repos = parse_selector(repo)
+    ids = parse_selector(id)
+    # With only exact ids we know when every wanted row has been seen
+    remaining = None if any(is_glob(id) for id in ids) or not ids else set(ids)
+
+    stream = load_dataset(dataset_name, split=name, streaming=True)
+    rows = []
+    for row_data in islice(stream, start, stop):
+        instance_id = row_data["instance_id"]
+        if ids and not matches(ids, instance_id):
+            continue
+        if not repos or matches(repos, row_data["repo"]):
+            rows.append(row_data)
+        if remaining is not None:
+            remaining.discard(instance_id)
+            if not remaining:
+                break
+    return rows
@@ -0,0 +1,159 @@
+"""
+Single pass parser for unified diffs as produced by `git diff`.
+
+Besides the changed file names it keeps every hunk with its line ranges,
+so the oracle can say which lines (and, through the hunk section header,
+roughly which functions) a patch touches.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Iterable
+
+HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@ ?(.*)$")
+
+
+@dataclass
+class Hunk:
+    old_start: int
+    old_lines: int
+    new_start: int
+    new_lines: int
+    # Text after the second @@, git puts the enclosing function or class here
+    section: str = ""
+    # Inclusive [first, last] line ranges, added ones in the new file
+    # and removed ones in the old file
+    added: list[list[int]] = field(default_factory=list)
+    removed: list[list[int]] = field(default_factory=list)
+
+
+@dataclass
+class FileDiff:
+    old_path: str | None
+    new_path: str | None
+    # "added", "deleted", "renamed" or "modified"
+    status: str = "modified"
+    hunks: list[Hunk] = field(default_factory=list)
+
+    @property
+    def path(self) -> str:
+        """The path in the patched tree, or the old path for deletions"""
+        return self.new_path if self.new_path is not None else self.old_path
+
+
+def strip_prefix(path: str) -> str | None:
+    """'b/src/x.py' -> 'src/x.py', '/dev/null' -> None"""
+    path = path.split("\t")[0].rstrip()
+    if path.startswith('"') and path.endswith('"'):
+        path = path[1:-1]
+    if path == "/dev/null":
+        return None
+    if path[:2] in ("a/", "b/"):
+        return path[2:]
+    return path
+
+
+def extend_range(ranges: list[list[int]], line: int):
+    if ranges and ranges[-1][1] == line - 1:
+        ranges[-1][1] = line
+    else:
+        ranges.append([line, line])
+
+
+def parse_unified_diff(text: str | Iterable[str]) -> list[FileDiff]:
+    """
+    Parse a patch into one FileDiff per file, in patch order.
+    Hunk bodies are consumed by line count, so content lines that look like
+    headers (e.g. a removed '-- comment') are not misread.
+    """
+    lines = text.splitlines() if isinstance(text, str) else text
+    files: list[FileDiff] = []
+    current = None
+    hunk = None
+    old_left = new_left = 0
+    old_line = new_line = 0
+
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if old_left > 0 or new_left > 0:
+            marker = line[:1]
+            if marker == "+":
+                extend_range(hunk.added, new_line)
+                new_line += 1
+                new_left -= 1
+                continue
+            if marker == "-":
+                extend_range(hunk.removed, old_line)
+                old_line += 1
+                old_left -= 1
+                continue
+            if marker == " " or line == "":
+                old_line += 1
+                new_line += 1
+                old_left -= 1
+                new_left -= 1
+                continue
+            if marker == "\\":
+                # "\ No newline at end of file"
+                continue
+            # Truncated hunk, fall through to header handling
+            old_left = new_left = 0
+
+        if line.startswith("--- ") and hunk is not None:
+            # A new file section without a "diff --git" line
+            current = None
+            hunk = None
+
+        if line.startswith("diff --git "):
+            current = None
+            hunk = None
+            match = re.match(r'^diff --git ("?a/.*?"?) ("?b/.*"?)$', line)
+            if match:
+                current = FileDiff(
+                    strip_prefix(match.group(1)), strip_prefix(match.group(2))
+                )
+                files.append(current)
+        elif line.startswith("--- ") and hunk is None:
+            if current is None:
+                current = FileDiff(None, None)
+                files.append(current)
+            current.old_path = strip_prefix(line[4:])
+        elif line.startswith("+++ ") and hunk is None and current is not None:
+            current.new_path = strip_prefix(line[4:])
+        elif line.startswith("@@ ") and current is not None:
+            match = HUNK_HEADER.match(line)
+            if match is None:
+                continue
+            old_start, old_count, new_start, new_count, section = match.groups()
+            hunk = Hunk(
+                int(old_start),
+                1 if old_count is None else int(old_count),
+                int(new_start),
+                1 if new_count is None else int(new_count),
+                section.strip(),
+            )
+            current.hunks.append(hunk)
+            old_left, new_left = hunk.old_lines, hunk.new_lines
+            old_line, new_line = hunk.old_start, hunk.new_start
+        elif current is not None:
+            if line.startswith("rename from "):
+                current.old_path = line[len("rename from ") :]
+                current.status = "renamed"
+            elif line.startswith("rename to "):
+                current.new_path = line[len("rename to ") :]
+                current.status = "renamed"
+            elif line.startswith("new file mode"):
+                current.status = "added"
+            elif line.startswith("deleted file mode"):
+                current.status = "deleted"
+
+    for file_diff in files:
+        if file_diff.old_path is None and file_diff.status == "modified":
+            file_diff.status = "added"
+        elif file_diff.new_path is None and file_diff.status == "modified":
+            file_diff.status = "deleted"
+        if file_diff.status == "added":
+            file_diff.old_path = None
+        elif file_diff.status == "deleted":
+            file_diff.new_path = None
+    return files
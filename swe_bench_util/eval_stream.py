@@ -0,0 +1,122 @@
+"""
+Incremental scoring of a file hints JSONL against the oracle.
+
+Lines are read as they are appended, and only new lines are scored.
+Running sums give the mean metrics overall and per repo at any point.
+If an instance appears more than once, its latest line counts.
+"""
+
+import json
+import os
+from dataclasses import dataclass, field
+
+from swe_bench_util.file_hint_eval import (
+    BenchExample,
+    FileHint,
+    FileHintAssessed,
+    eval_file_hints_vs_oracle,
+)
+
+
+def parse_hint_line(line: str) -> FileHint:
+    """Accepts hint_files, or file_hint as written by scripts/file_hint.sh"""
+    data = json.loads(line)
+    files = data.get("hint_files", data.get("file_hint", []))
+    return FileHint(id=data["id"], hint_files=[file for file in files if file])
+
+
+def metric_values(assessed: FileHintAssessed) -> dict[str, float]:
+    values = {
+        "precision": assessed.precision,
+        "recall": assessed.recall,
+        "mrr": assessed.reciprocal_rank,
+        "ndcg": assessed.ndcg,
+    }
+    for k, recall in assessed.recall_at_k.items():
+        values[f"recall@{k}"] = recall
+    return values
+
+
+@dataclass
+class RunningMetrics:
+    count: int = 0
+    sums: dict[str, float] = field(default_factory=dict)
+
+    def add(self, assessed: FileHintAssessed, sign: int = 1):
+        self.count += sign
+        for name, value in metric_values(assessed).items():
+            self.sums[name] = self.sums.get(name, 0.0) + sign * value
+
+    def means(self) -> dict[str, float]:
+        if self.count == 0:
+            return {}
+        return {name: total / self.count for name, total in self.sums.items()}
+
+
+class HintAggregator:
+    def __init__(self, examples: list[BenchExample]):
+        self.examples_by_id = {example.id: example for example in examples}
+        self.latest: dict[str, FileHintAssessed] = {}
+        self.overall = RunningMetrics()
+        self.by_repo: dict[str, RunningMetrics] = {}
+        self.unmatched = 0
+
+    def add(self, hints: list[FileHint]) -> int:
+        """Score hints, replacing earlier scores for the same ids"""
+        examples = [
+            self.examples_by_id[id]
+            for id in {hint.id for hint in hints}
+            if id in self.examples_by_id
+        ]
+        assessed_list = eval_file_hints_vs_oracle(examples, hints)
+        self.unmatched += len(hints) - len(assessed_list)
+        for assessed in assessed_list:
+            repo = self.examples_by_id[assessed.id].repo
+            repo_metrics = self.by_repo.setdefault(repo, RunningMetrics())
+            previous = self.latest.get(assessed.id)
+            if previous is not None:
+                self.overall.add(previous, -1)
+                repo_metrics.add(previous, -1)
+            self.latest[assessed.id] = assessed
+            self.overall.add(assessed)
+            repo_metrics.add(assessed)
+        return len(assessed_list)
+
+    def table(self) -> str:
+        rows = [("all", self.overall)] + sorted(self.by_repo.items())
+        names = list(self.overall.sums)
+        lines = ["\t".join(["repo", "n", *names])]
+        for label, metrics in rows:
+            means = metrics.means()
+            lines.append(
+                "\t".join(
+                    [label, str(metrics.count)]
+                    + [f"{means.get(name, 0.0):.3f}" for name in names]
+                )
+            )
+        if self.unmatched:
+            lines.append(f"{self.unmatched} hints had no oracle entry")
+        return "\n".join(lines)
+
+
+class JsonlFollower:
+    """Reads the complete lines appended to a file since the last call"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.offset = 0
+        self.partial = b""
+
+    def read_new(self) -> list[str]:
+        if not os.path.exists(self.path):
+            return []
+        if os.path.getsize(self.path) < self.offset:
+            # Truncated or replaced, start over
+            self.offset = 0
+            self.partial = b""
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            data = f.read()
+        self.offset += len(data)
+        *lines, self.partial = (self.partial + data).split(b"\n")
+        return [line.decode() for line in lines if line.strip()]
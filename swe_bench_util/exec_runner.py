@@ -0,0 +1,152 @@
+"""
+Run a shell command for many instances in parallel.
+
+Each instance gets its own stdout/stderr log and a wall-clock timeout.
+Outcomes are appended to a JSONL ledger, so a rerun of the same command
+skips instances that already succeeded.
+"""
+
+import concurrent.futures
+import json
+import os
+import signal
+import subprocess
+import threading
+import time
+from dataclasses import asdict, dataclass
+
+from swe_bench_util import trace
+
+
+@dataclass
+class ExecResult:
+    instance_id: str
+    command: str
+    status: str  # "success", "failed", "timeout" or "error"
+    returncode: int | None
+    duration: float
+    message: str = ""
+
+
+def bench_env(row_data: dict, path: str) -> dict[str, str]:
+    """Environment for --exec: BENCH_* for every dataset field plus paths"""
+    env_vars = {
+        **os.environ,
+        **{f"BENCH_{key.upper()}": str(value) for key, value in row_data.items()},
+    }
+    env_vars["CALLING_CWD"] = os.getcwd()
+    env_vars["BENCH_REPO_DIR"] = path
+    return env_vars
+
+
+def read_ledger(ledger_path: str) -> list[dict]:
+    if not os.path.exists(ledger_path):
+        return []
+    with open(ledger_path, "r") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def succeeded_ids(ledger_path: str, command: str) -> set[str]:
+    """Instances whose latest ledger entry for this command is a success"""
+    latest = {}
+    for entry in read_ledger(ledger_path):
+        if entry["command"] == command:
+            latest[entry["instance_id"]] = entry["status"]
+    return {id for id, status in latest.items() if status == "success"}
+
+
+ledger_lock = threading.Lock()
+
+
+def append_ledger(ledger_path: str, result: ExecResult):
+    with ledger_lock:
+        with open(ledger_path, "a") as f:
+            f.write(json.dumps(asdict(result)) + "\n")
+
+
+def run_with_timeout(
+    command: str, env: dict, stdout_path: str, stderr_path: str, timeout: float | None
+) -> int | None:
+    """
+    Run a shell command, returning its exit code, or None if it timed out.
+    The command runs in its own process group so a timeout kills its children too.
+    """
+    with open(stdout_path, "w") as stdout, open(stderr_path, "w") as stderr:
+        process = subprocess.Popen(
+            command,
+            shell=True,
+            env=env,
+            stdout=stdout,
+            stderr=stderr,
+            start_new_session=True,
+        )
+        try:
+            return process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+            process.wait()
+            return None
+
+
+def run_instance(row_data, command, lease_checkout, timeout, log_dir) -> ExecResult:
+    instance_id = row_data["instance_id"]
+    start = time.monotonic()
+    try:
+        with lease_checkout(row_data) as path, trace.span("exec", instance=instance_id):
+            returncode = run_with_timeout(
+                command,
+                bench_env(row_data, path),
+                os.path.join(log_dir, f"{instance_id}.stdout.log"),
+                os.path.join(log_dir, f"{instance_id}.stderr.log"),
+                timeout,
+            )
+    except Exception as e:
+        return ExecResult(
+            instance_id, command, "error", None, time.monotonic() - start, str(e)
+        )
+    if returncode is None:
+        status = "timeout"
+    else:
+        status = "success" if returncode == 0 else "failed"
+    return ExecResult(
+        instance_id, command, status, returncode, time.monotonic() - start
+    )
+
+
+def run_instances(
+    rows,
+    command: str,
+    lease_checkout,
+    workers: int = 4,
+    timeout: float | None = None,
+    log_dir: str = "logs",
+    ledger_path: str | None = None,
+) -> list[ExecResult]:
+    """
+    Run command for every row with at most `workers` at once.
+    lease_checkout(row_data) is a context manager yielding the checkout path.
+    """
+    os.makedirs(log_dir, exist_ok=True)
+    ledger_path = ledger_path or os.path.join(log_dir, "ledger.jsonl")
+    done = succeeded_ids(ledger_path, command)
+    pending = [row for row in rows if row["instance_id"] not in done]
+    if len(done) > 0:
+        print(f"Skipping {len(rows) - len(pending)} instances that already succeeded")
+
+    results = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(
+                run_instance, row, command, lease_checkout, timeout, log_dir
+            )
+            for row in pending
+        ]
+        for i, future in enumerate(concurrent.futures.as_completed(futures)):
+            result = future.result()
+            append_ledger(ledger_path, result)
+            results.append(result)
+            print(
+                f"[{i + 1}/{len(pending)}] {result.instance_id}: {result.status}"
+                f" in {result.duration:.1f}s {result.message}".rstrip()
+            )
+    return results
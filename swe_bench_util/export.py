@@ -0,0 +1,77 @@
+"""
+Writing selected rows to disk.
+
+Besides one JSON and one Markdown file per instance, rows can be exported
+in bulk as a single JSONL stream or a Parquet file. Bulk files are written
+through a large buffer and renamed into place, so readers never see a
+partial file.
+"""
+
+import concurrent.futures
+import json
+import os
+import sys
+
+from swe_bench_util.cache import atomic_open
+
+WRITE_BUFFER_BYTES = 1 << 20
+
+
+def format_markdown_code_block(text):
+    text = text.replace("```", "\\`\\`\\`")
+    return f"```\n{text}\n```"
+
+
+def markdown_text(data) -> str:
+    template_fields = ["instance_id" "repo", "base_commit", "problem_statement"]
+    text = f"""# {data['instance_id']}
+
+* repo: {data['repo']}
+* base_commit: {data['base_commit']}
+
+## problem_statement
+{data['problem_statement']}
+"""
+    for k, v in data.items():
+        if k not in template_fields:
+            text += f"""## {k}\n{format_markdown_code_block(v)}\n\n"""
+    return text
+
+
+def write_jsonl(path: str, rows) -> int:
+    """One compact JSON object per line, returns the row count"""
+    count = 0
+    with atomic_open(path, "w", buffering=WRITE_BUFFER_BYTES) as f:
+        for row_data in rows:
+            f.write(json.dumps(row_data))
+            f.write("\n")
+            count += 1
+    return count
+
+
+def write_parquet(path: str, rows) -> int:
+    """Columnar export, from a Dataset's Arrow table or a list of row dicts"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if isinstance(rows, list):
+        table = pa.Table.from_pylist(rows)
+    else:
+        table = rows.with_format("arrow")[:]
+    with atomic_open(path, "wb", buffering=WRITE_BUFFER_BYTES) as f:
+        pq.write_table(table, f)
+    return table.num_rows
+
+
+def write_markdown_files(path: str, rows, workers: int | None = None) -> int:
+    """Render and write {instance_id}.md for every row on a thread pool"""
+    os.makedirs(path, exist_ok=True)
+
+    def write_one(row_data):
+        with atomic_open(f"{path}/{row_data['instance_id']}.md", "w") as f:
+            f.write(markdown_text(row_data))
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        count = sum(1 for _ in executor.map(write_one, rows))
+    print(f"{count} Markdown files were saved to '{path}'", file=sys.stderr)
+    return count
@@ -4,7 +4,10 @@ For metric explanation:
 https://en.wikipedia.org/wiki/Precision_and_recall
 """
 
-from dataclasses import dataclass
+import math
+from dataclasses import dataclass, field
+
+from swe_bench_util.diff_parser import FileDiff
 
 
 @dataclass
@@ -14,6 +17,9 @@ class BenchExample:
     base_commit: str
     patch_files: list[str]
     test_patch_files: list[str]
+    # Line-level oracle: hunks and changed line ranges per file
+    patch_diffs: list[FileDiff] = field(default_factory=list)
+    test_patch_diffs: list[FileDiff] = field(default_factory=list)
 
 
 @dataclass
@@ -33,45 +39,137 @@ class FileHintAssessed:
     precision: float
     recall: float
     search_string: str = ""
+    # Ranked metrics, treating hint_files as ordered best first
+    reciprocal_rank: float = 0.0
+    ndcg: float = 0.0
+    recall_at_k: dict[int, float] = field(default_factory=dict)
+
+
+DEFAULT_KS = (1, 5, 10)
 
 
 def eval_file_hints_vs_oracle(
-    examples: list[BenchExample], hints: list[FileHint]
+    examples: list[BenchExample], hints: list[FileHint], ks=DEFAULT_KS
 ) -> list[FileHintAssessed]:
     """
-    For every recommendation that is present in examples patch, calculate precision and recall.
+    For every recommendation that is present in examples patch, calculate precision and recall,
+    plus recall@k, reciprocal rank and nDCG over the ordered hint_files.
     Files in test_patch that are recommended are ignored.
+    Hints are joined to examples by id through a dict, and each example's file sets
+    are built once.
     """
+    examples_by_id = {}
+    for example in examples:
+        examples_by_id.setdefault(example.id, example)
+    file_sets = {}
+    discounts = Discounts()
     hint_evals = []
     for hint in hints:
-        for example in examples:
-            if hint.id == example.id:
-                # Ignore test patch files
-                hint_files = set(hint.hint_files) - set(example.test_patch_files)
-                precision = calc_precision(example, hint_files)
-                recall = calc_recall(example, hint_files)
-                hint_evals.append(
-                    FileHintAssessed(
-                        id=hint.id,
-                        hint_files=hint.hint_files,
-                        patch_files=example.patch_files,
-                        test_patch_files=example.test_patch_files,
-                        precision=precision,
-                        recall=recall,
-                    )
-                )
+        example = examples_by_id.get(hint.id)
+        if example is None:
+            continue
+        if hint.id not in file_sets:
+            file_sets[hint.id] = (
+                set(example.patch_files),
+                set(example.test_patch_files),
+            )
+        patch_files, test_patch_files = file_sets[hint.id]
+        # Ignore test patch files, keeping the first occurrence of each hint in order
+        ranked = [
+            file
+            for file in dict.fromkeys(hint.hint_files)
+            if file not in test_patch_files
+        ]
+        hint_files = set(ranked)
+        relevance = [file in patch_files for file in ranked]
+        hint_evals.append(
+            FileHintAssessed(
+                id=hint.id,
+                hint_files=hint.hint_files,
+                patch_files=example.patch_files,
+                test_patch_files=example.test_patch_files,
+                precision=calc_precision(example, hint_files, patch_files),
+                recall=calc_recall(example, hint_files, patch_files),
+                reciprocal_rank=calc_reciprocal_rank(relevance),
+                ndcg=discounts.ndcg(relevance, len(patch_files)),
+                recall_at_k={
+                    k: calc_recall_at_k(relevance, len(patch_files), k) for k in ks
+                },
+            )
+        )
     return hint_evals
 
 
-def calc_precision(example: BenchExample, hint_files: set[str]) -> float:
-    true_positives = hint_files & set(example.patch_files)
+def mean_metrics(hint_evals: list[FileHintAssessed]) -> dict[str, float]:
+    """Means over all assessed hints, "mrr" is the mean reciprocal rank"""
+    count = len(hint_evals)
+    if count == 0:
+        return {}
+    result = {
+        "precision": sum(e.precision for e in hint_evals) / count,
+        "recall": sum(e.recall for e in hint_evals) / count,
+        "mrr": sum(e.reciprocal_rank for e in hint_evals) / count,
+        "ndcg": sum(e.ndcg for e in hint_evals) / count,
+    }
+    for k in hint_evals[0].recall_at_k:
+        result[f"recall@{k}"] = sum(e.recall_at_k[k] for e in hint_evals) / count
+    return result
+
+
+def calc_precision(
+    example: BenchExample, hint_files: set[str], patch_files: set[str] | None = None
+) -> float:
+    patch_files = set(example.patch_files) if patch_files is None else patch_files
+    true_positives = hint_files & patch_files
     if len(hint_files) == 0:
-        return 0.0 if len(example.patch_files) > 0 else 1.0
+        return 0.0 if len(patch_files) > 0 else 1.0
     return len(true_positives) / len(hint_files)
 
 
-def calc_recall(example: BenchExample, hint_files: set[str]) -> float:
-    true_positives = hint_files & set(example.patch_files)
-    if len(example.patch_files) == 0:
+def calc_recall(
+    example: BenchExample, hint_files: set[str], patch_files: set[str] | None = None
+) -> float:
+    patch_files = set(example.patch_files) if patch_files is None else patch_files
+    true_positives = hint_files & patch_files
+    if len(patch_files) == 0:
         return 1.0
-    return len(true_positives) / len(example.patch_files)
+    return len(true_positives) / len(patch_files)
+
+
+def calc_recall_at_k(relevance: list[bool], relevant_count: int, k: int) -> float:
+    """Share of the patch files found in the first k hints"""
+    if relevant_count == 0:
+        return 1.0
+    return sum(relevance[:k]) / relevant_count
+
+
+def calc_reciprocal_rank(relevance: list[bool]) -> float:
+    """1 / rank of the first hint that is a patch file, 0 if there is none"""
+    for rank, relevant in enumerate(relevance, start=1):
+        if relevant:
+            return 1.0 / rank
+    return 0.0
+
+
+class Discounts:
+    """
+    Log2 rank discounts and their running sums, shared across all hints,
+    so nDCG doesn't recompute logarithms per hint.
+    https://en.wikipedia.org/wiki/Discounted_cumulative_gain
+    """
+
+    def __init__(self):
+        self.discounts = []
+        self.ideal = [0.0]
+
+    def _grow(self, n: int):
+        for rank in range(len(self.discounts) + 1, n + 1):
+            self.discounts.append(1.0 / math.log2(rank + 1))
+            self.ideal.append(self.ideal[-1] + self.discounts[-1])
+
+    def ndcg(self, relevance: list[bool], relevant_count: int) -> float:
+        if relevant_count == 0:
+            return 1.0
+        self._grow(max(len(relevance), relevant_count))
+        dcg = sum(d for d, relevant in zip(self.discounts, relevance) if relevant)
+        return dcg / self.ideal[relevant_count]
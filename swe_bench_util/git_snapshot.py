@@ -0,0 +1,153 @@
+"""
+Files of a commit read straight from a repository's object store.
+
+Listing uses one `git ls-tree` per commit, and contents stream through a
+long-lived `git cat-file --batch` process per repository, so many commits
+of the same repo can be read without checking anything out.
+
+In a partial (e.g. blobless) clone, git would fetch each missing blob in
+its own round trip as ls-tree asks for sizes, so the blobs of the commit
+are fetched first, in one batch.
+"""
+
+import os
+import subprocess
+import threading
+from dataclasses import dataclass
+
+SYMLINK_MODE = "120000"
+
+
+class CatFile:
+    """A `git cat-file --batch` process, one request at a time across threads"""
+
+    def __init__(self, git_dir: str):
+        self.process = subprocess.Popen(
+            ["git", "cat-file", "--batch"],
+            cwd=git_dir,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+        self.lock = threading.Lock()
+
+    def read(self, object: str) -> bytes:
+        with self.lock:
+            self.process.stdin.write(object.encode() + b"\n")
+            self.process.stdin.flush()
+            header = self.process.stdout.readline()
+            if not header:
+                raise RuntimeError("git cat-file exited")
+            fields = header.split()
+            if len(fields) != 3:
+                # "<object> missing" or "<object> ambiguous"
+                raise KeyError(object)
+            data = self.process.stdout.read(int(fields[2]))
+            # Each object is followed by a newline
+            self.process.stdout.read(1)
+            return data
+
+    def close(self):
+        if self.process.poll() is None:
+            self.process.stdin.close()
+            self.process.wait()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+@dataclass
+class TreeEntry:
+    path: str
+    mode: str
+    type: str
+    sha: str
+    # None for submodules
+    size: int | None
+
+
+class GitSnapshot:
+    """The tree of `commit` in the repository at git_dir, bare or not"""
+
+    def __init__(self, git_dir: str, commit: str, cat_file: CatFile | None = None):
+        self.git_dir = git_dir
+        self.commit = commit
+        self.cat_file = cat_file or CatFile(git_dir)
+
+    def git(self, args: list[str]) -> bytes:
+        return subprocess.run(
+            ["git", *args], cwd=self.git_dir, check=True, capture_output=True
+        ).stdout
+
+    @property
+    def partial(self) -> bool:
+        """Whether the repository is a partial clone, with objects left on the remote"""
+        result = subprocess.run(
+            ["git", "config", "--get", "remote.origin.promisor"],
+            cwd=self.git_dir,
+            capture_output=True,
+            text=True,
+        )
+        return result.stdout.strip() == "true"
+
+    def fetch_missing(self) -> int:
+        """Fetch the objects of the commit's tree missing locally in one batch"""
+        # --missing=print lists them without fetching each one
+        output = self.git(
+            ["rev-list", "--objects", "--missing=print", "--no-walk", self.commit]
+        )
+        missing = [
+            line[1:] for line in output.decode().splitlines() if line.startswith("?")
+        ]
+        if missing:
+            # The same fetch git runs for one lazily fetched object
+            subprocess.run(
+                [
+                    "git",
+                    "-c",
+                    "fetch.negotiationAlgorithm=noop",
+                    "fetch",
+                    "origin",
+                    "--no-tags",
+                    "--no-write-fetch-head",
+                    "--recurse-submodules=no",
+                    "--filter=blob:none",
+                    "--stdin",
+                ],
+                cwd=self.git_dir,
+                input="\n".join(missing).encode(),
+                check=True,
+                capture_output=True,
+            )
+        return len(missing)
+
+    @property
+    def tree(self) -> str:
+        return self.git(["rev-parse", f"{self.commit}^{{tree}}"]).decode().strip()
+
+    def entries(self) -> list[TreeEntry]:
+        """Every file of the commit, in git's path order"""
+        if self.partial:
+            self.fetch_missing()
+        output = self.git(["ls-tree", "-r", "-z", "--long", "--full-tree", self.commit])
+        entries = []
+        for record in output.split(b"\0"):
+            if not record:
+                continue
+            info, path = record.split(b"\t", 1)
+            mode, type, sha, size = info.decode().split()
+            entries.append(
+                TreeEntry(
+                    os.fsdecode(path),
+                    mode,
+                    type,
+                    sha,
+                    None if size == "-" else int(size),
+                )
+            )
+        return entries
+
+    def read(self, entry: TreeEntry) -> bytes:
+        return self.cat_file.read(entry.sha)
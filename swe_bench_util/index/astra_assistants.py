@@ -1,18 +1,46 @@
+import asyncio
 import json
-import os
 import concurrent.futures
 import threading
-from functools import partial
+from contextlib import contextmanager
+from dataclasses import asdict
 
 from tqdm import tqdm
 from streaming_assistants import patch
 from openai import OpenAI
 from openai.lib.streaming import AssistantEventHandler
 from typing_extensions import override
-from swe_bench_util.index.file_util import EXCLUDE_EXTS, exponential_backoff_retry
+from swe_bench_util import trace
+from swe_bench_util.git_snapshot import GitSnapshot
+from swe_bench_util.index.async_upload import upload_all, upload_client
+from swe_bench_util.index.file_selection import (
+    DEFAULT_MAX_BYTES,
+    EXCLUDED_SUFFIXES,
+    ExcludedFile,
+    SelectedFile,
+    SnapshotFile,
+    exclusion_summary,
+    select_files,
+    select_snapshot_files,
+)
+from swe_bench_util.index.file_util import exponential_backoff_retry, git_blob_sha
+from swe_bench_util.index.upload_cache import (
+    UploadCache,
+    upload_cache_key,
+)
+from swe_bench_util.index.retrieval_cache import (
+    RetrievalCache,
+    RetrievalResult,
+    retrieval_cache_key,
+)
+from swe_bench_util.index.run_capture import RunCapture, ThrottledWriter
+from swe_bench_util.index.upload_journal import UploadJournal
 
 OPENAI_CLIENT = None
 
+EMBEDDING_MODEL = "text-embedding-3-large"
+MODEL = "gpt-4-0125-preview"
+
 open_ai_client_lock = threading.Lock()
 
 
@@ -24,25 +52,37 @@ def open_ai_client():
     return OPENAI_CLIENT
 
 
-def upload_file(file_path) -> str | None:
+def is_excluded(file_path) -> bool:
+    return EXCLUDED_SUFFIXES.matches(file_path)
+
+
+@contextmanager
+def upload_content(file: SelectedFile | SnapshotFile):
+    """The file argument of files.create, snapshot files are sent from memory"""
+    if isinstance(file, SnapshotFile):
+        yield file.path, file.data
+    else:
+        with open(file.full_path, "rb") as f:
+            yield f
+
+
+def upload_file(file: SelectedFile | SnapshotFile) -> str | None:
     """
     Index a file to Astra Assistants unless it is an excluded file type.
     If the upload is successful, it returns the file ID.
     If excluded or an error occurs, it prints an error message and returns None.
     """
     try:
-        if any(file_path.endswith(ext) for ext in EXCLUDE_EXTS):
-            print(f"Skipping {file_path} because it has an excluded extension")
+        if is_excluded(file.path):
+            print(f"Skipping {file.path} because it has an excluded extension")
             return None
-        file = open_ai_client().files.create(
-            file=open(
-                file_path,
-                "rb",
-            ),
-            purpose="assistants",
-            embedding_model="text-embedding-3-large",
-        )
-        return file.id
+        with upload_content(file) as content:
+            uploaded = open_ai_client().files.create(
+                file=content,
+                purpose="assistants",
+                embedding_model=EMBEDDING_MODEL,
+            )
+        return uploaded.id
     except Exception as e:
         raise e
 
@@ -50,48 +90,162 @@ def upload_file(file_path) -> str | None:
 file_ids_lock = threading.Lock()
 excluded_files_lock = threading.Lock()
 
-def index_to_astra_assistants(repo_dir):
-    """
-    Indexes files in the repository directory, uploads them, and returns their IDs.
-    """
-    # Generate a list of file paths to upload
-    file_paths = [
-        os.path.join(root, file)
-        for root, _, files in os.walk(repo_dir)
-        for file in files
-    ]
-    total_files = len(file_paths)
-
-    print("going to upload {total_files} files")
-    # Initialize the progress bar
-    pbar = tqdm(total=total_files, desc="Uploading files")
+def upload_files_threaded(
+    files: list[SelectedFile] | list[SnapshotFile], record
+) -> list[str]:
+    """Upload on a thread pool, each thread retrying its own 429s"""
+    by_path = {file.path: file for file in files}
+    failed = []
 
-    file_ids = {}
-    excluded_files = []
+    def upload(path):
+        return upload_file(by_path[path])
 
     # Define a wrapper function to use with each file upload
-    def upload_and_progress(file_path, repo_dir):
-        try:
-            file_id = exponential_backoff_retry(upload_file, file_path)
-            if file_id is not None:
-                with file_ids_lock:  # Ensure thread-safe append operation
-                    file_ids[file_id] = file_path[len(repo_dir)+1:]
-            else:
-                with excluded_files_lock:  # Ensure thread-safe append operation
-                    excluded_files.append(file_path)
-        finally:
-            # Update the progress bar in a thread-safe manner
-            pbar.update(1)
-
-    upload_with_repo = partial(upload_and_progress, repo_dir=repo_dir)
+    def upload_and_progress(file: SelectedFile | SnapshotFile):
+        file_id = exponential_backoff_retry(upload, file.path)
+        if file_id is not None:
+            record(file, file_id)
+        else:
+            with excluded_files_lock:  # Ensure thread-safe append operation
+                failed.append(file.path)
+
     # Use ThreadPoolExecutor to upload files in parallel
     with concurrent.futures.ThreadPoolExecutor() as executor:
         # Map each file upload task to the executor
-        executor.map(upload_with_repo, file_paths)
+        executor.map(upload_and_progress, files)
+    return failed
+
+
+def upload_files_async(
+    files: list[SelectedFile] | list[SnapshotFile],
+    record,
+    rate: float,
+    concurrency: int,
+) -> list[str]:
+    """Upload with the asyncio engine, sharing one rate limit across all requests"""
+    by_path = {file.path: file for file in files}
+
+    async def run():
+        client = patch(upload_client())
+
+        async def upload(path):
+            with upload_content(by_path[path]) as content:
+                file = await client.files.create(
+                    file=content,
+                    purpose="assistants",
+                    embedding_model=EMBEDDING_MODEL,
+                )
+            return file.id
+
+        return await upload_all(
+            list(by_path),
+            upload,
+            rate=rate,
+            concurrency=concurrency,
+            on_done=lambda path, file_id: record(by_path[path], file_id),
+        )
+
+    _, stats = asyncio.run(run())
+    trace.count("upload_retries", stats.retries)
+    print(f"Upload stats: {json.dumps(stats.summary())}")
+    for path, error in stats.failures.items():
+        print(f"Error uploading {path}: {error}")
+    return list(stats.failures)
+
+
+def index_to_astra_assistants(
+    source: str | GitSnapshot,
+    upload_cache: UploadCache | None = None,
+    max_file_bytes: int = DEFAULT_MAX_BYTES,
+    engine: str = "threads",
+    rate: float = 20.0,
+    concurrency: int = 8,
+    journal: UploadJournal | None = None,
+):
+    """
+    Indexes files in the repository directory, or of a commit read from the
+    object store with a GitSnapshot, uploads them, and returns their IDs.
+    Only git-tracked text files up to max_file_bytes are uploaded, the rest are
+    returned as excluded files with the reason.
+    Files whose content and path were uploaded before, for any instance,
+    reuse the remote file from upload_cache instead of being uploaded again.
+    engine "async" uploads with a shared rate limit (requests per second) and
+    adaptive concurrency starting at `concurrency`.
+    Each upload is recorded in `journal` as it completes, and files already in
+    the journal are not uploaded again, so an interrupted run can resume.
+    The returned mapping is in tracked file order, whatever order uploads
+    finish in, so a resumed run returns the same mapping as an uninterrupted one.
+    """
+    with trace.span("select_files"):
+        if isinstance(source, GitSnapshot):
+            selected_files, excluded = select_snapshot_files(source, max_file_bytes)
+        else:
+            selected_files, excluded = select_files(source, max_file_bytes)
+    trace.count("files_excluded", len(excluded))
+    excluded_files = [asdict(file) for file in excluded]
+    print(f"Excluded {len(excluded)} files: {json.dumps(exclusion_summary(excluded))}")
+
+    uploaded = {}
+    cache_keys = {}
+    pending = []
+    resumed = 0
+    for file in selected_files:
+        if journal is not None:
+            file_id = journal.get(file.path)
+            if file_id is not None:
+                uploaded[file.path] = file_id
+                resumed += 1
+                continue
+        if upload_cache is not None:
+            # Only hashed outside a git repo, the index has the sha otherwise
+            sha = file.sha or git_blob_sha(file.full_path)
+            cache_keys[file.path] = upload_cache_key(sha, file.path)
+            file_id = upload_cache.get(cache_keys[file.path])
+            if file_id is not None:
+                uploaded[file.path] = file_id
+                continue
+        pending.append(file)
+    trace.count("files_reused", len(selected_files) - len(pending))
+    if resumed:
+        print(f"Resumed {resumed} uploads from {journal.path}")
+    print(
+        f"Reused {len(selected_files) - len(pending) - resumed} previously uploaded files"
+    )
+
+    print(f"going to upload {len(pending)} files")
+    # Initialize the progress bar
+    pbar = tqdm(total=len(pending), desc="Uploading files")
+
+    def record(file: SelectedFile | SnapshotFile, file_id: str):
+        with file_ids_lock:  # Ensure thread-safe append operation
+            uploaded[file.path] = file_id
+        trace.count("files_uploaded")
+        trace.count("bytes_uploaded", file.size)
+        if journal is not None:
+            journal.record(file.path, file_id)
+        if file.path in cache_keys:
+            upload_cache.put(cache_keys[file.path], file_id)
+        # Update the progress bar in a thread-safe manner
+        pbar.update(1)
+
+    with trace.span("upload", engine=engine, files=len(pending)):
+        if engine == "async":
+            failed = upload_files_async(pending, record, rate, concurrency)
+        else:
+            failed = upload_files_threaded(pending, record)
+    trace.count("files_upload_failed", len(failed))
+    excluded_files += [
+        asdict(ExcludedFile(path, "upload failed")) for path in sorted(failed)
+    ]
 
     # Ensure the progress bar is closed upon completion
     pbar.close()
 
+    file_ids = {
+        uploaded[file.path]: file.path
+        for file in selected_files
+        if file.path in uploaded
+    }
     print(f"All uploaded file IDs: {file_ids}")
     return file_ids, excluded_files
 
@@ -166,7 +320,7 @@ def create_assistant(file_ids, id):
     # create assistant
     assistant = client.beta.assistants.create(
         file_ids=file_ids,
-        model="gpt-4-0125-preview",
+        model=MODEL,
         instructions=system_prompt,
         name=id,
         tools=[{"type": "retrieval"}],
@@ -175,49 +329,89 @@ def create_assistant(file_ids, id):
 
 
 class EventHandler(AssistantEventHandler):
-    # init
-    def __init__(self):
+    """Feeds text deltas and the retrieval chunks of every tool call to a RunCapture"""
+
+    def __init__(self, capture: RunCapture):
         super().__init__()
-        self.file_ids = []
-        self.search_strings = []
+        self.capture = capture
 
     @override
-    def on_run_step_done(self, run_step) -> None:
-        chunks = [
-            chunk.retrieval
-            for chunk in run_step.step_details.tool_calls
-            if chunk.retrieval
-        ][0]
-        self.file_ids = list(set([chunk["file_id"] for chunk in chunks]))
-        self.search_strings = list(set([chunk["search_string"] for chunk in chunks]))
-        print(f"Files used in retrieval: {json.dumps(self.file_ids)}")
+    def on_text_delta(self, delta, snapshot) -> None:
+        if delta.value:
+            self.capture.add_text(delta.value)
 
+    @override
+    def on_run_step_done(self, run_step) -> None:
+        for tool_call in getattr(run_step.step_details, "tool_calls", None) or []:
+            chunks = getattr(tool_call, "retrieval", None)
+            if chunks:
+                self.capture.add_retrieval(chunks)
+        print(f"Files used in retrieval: {json.dumps(self.capture.file_ids)}")
 
-def get_retrieval_file_ids(assistant_id, row_data):
-    client = open_ai_client()
 
-    user_prompt = f"""
+def user_prompt(row_data) -> str:
+    return f"""
     <issue>
     {row_data["problem_statement"]}
     </issue>
     """
+
+
+def run_retrieval(assistant_id, row_data) -> RetrievalResult:
+    client = open_ai_client()
+
     print("creating persistent thread and message")
     thread = client.beta.threads.create()
     client.beta.threads.messages.create(
-        thread_id=thread.id, role="user", content=user_prompt
+        thread_id=thread.id, role="user", content=user_prompt(row_data)
     )
     print(f"running inference for {row_data['instance_id']}")
 
-    handler = EventHandler()
+    capture = RunCapture(ThrottledWriter())
     print("creating run")
     with open_ai_client().beta.threads.runs.create_and_stream(
         thread_id=thread.id,
         assistant_id=assistant_id,
-        event_handler=handler,
+        event_handler=EventHandler(capture),
     ) as stream:
-        # stream.until_done()
         print("producing diff:")
-        for text in stream.text_deltas:
-            print(text, end="", flush=True)
-            print()
-        return handler.file_ids, handler.search_strings
+        stream.until_done()
+    capture.finish()
+    metrics = capture.metrics()
+    print(f"Run metrics for {row_data['instance_id']}: {json.dumps(metrics)}")
+    return RetrievalResult(
+        capture.file_ids,
+        capture.search_strings,
+        capture.text,
+        chunks=capture.chunks,
+        metrics=metrics,
+    )
+
+
+def retrieve(
+    assistant_id,
+    row_data,
+    cache: RetrievalCache | None = None,
+    refresh: bool = False,
+) -> RetrievalResult:
+    """
+    Run retrieval for the row's problem statement.
+    With a cache, an earlier result for the same assistant, model and prompts
+    is returned without a run; refresh runs anyway and replaces it.
+    """
+    key = retrieval_cache_key(assistant_id, MODEL, system_prompt, user_prompt(row_data))
+    result = cache.get(key) if cache is not None and not refresh else None
+    if result is None:
+        result = run_retrieval(assistant_id, row_data)
+        if cache is not None:
+            cache.put(key, result)
+    else:
+        print(f"Using cached retrieval for {row_data['instance_id']}")
+        trace.count("retrieval_cache_hits")
+    return result
+
+
+def get_retrieval_file_ids(assistant_id, row_data, cache=None, refresh=False):
+    """Retrieved file ids and search strings for the row's problem statement"""
+    result = retrieve(assistant_id, row_data, cache=cache, refresh=refresh)
+    return result.file_ids, result.search_strings
@@ -0,0 +1,199 @@
+"""
+Asyncio upload engine.
+
+All in-flight uploads share one token bucket, so the request rate is bounded
+globally, and one AIMD limiter, which halves the allowed concurrency when the
+server answers 429 and adds back one slot per window of successes.
+Throttled and transient failures (connection errors, timeouts, 408, 5xx)
+are retried with jittered backoff up to max_retries; other errors are
+recorded per file at once. Clients must not retry on their own, or their
+retries bypass the shared rate limit: use upload_client().
+"""
+
+import asyncio
+import random
+import time
+from dataclasses import dataclass, field
+
+from openai import APIConnectionError, APITimeoutError, AsyncOpenAI
+
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average, bursting to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = asyncio.Lock()
+
+    def pause(self, seconds: float):
+        """Stop handing out tokens for a while, e.g. after a Retry-After"""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AimdLimiter:
+    """Concurrency limit with additive increase and multiplicative decrease"""
+
+    def __init__(self, initial: int = 8, minimum: int = 1, maximum: int = 64):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.in_flight = 0
+        self.last_decrease = 0.0
+        self.condition = asyncio.Condition()
+
+    async def acquire(self):
+        async with self.condition:
+            while self.in_flight >= int(self.limit):
+                await self.condition.wait()
+            self.in_flight += 1
+
+    async def release(self):
+        async with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+    def on_success(self):
+        # About one more slot after a full window of successes
+        self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+    def on_throttle(self, window: float = 1.0):
+        # 429s from requests that were already in flight count as one signal
+        now = time.monotonic()
+        if now - self.last_decrease >= window:
+            self.limit = max(self.minimum, self.limit / 2)
+            self.last_decrease = now
+
+
+@dataclass
+class UploadStats:
+    latencies: list[float] = field(default_factory=list)
+    retries: int = 0
+    throttled: int = 0
+    failures: dict[str, str] = field(default_factory=dict)
+    started: float = field(default_factory=time.monotonic)
+    finished: float = 0.0
+
+    def summary(self) -> dict:
+        latencies = sorted(self.latencies)
+        elapsed = (self.finished or time.monotonic()) - self.started
+
+        def percentile(p):
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+
+        return {
+            "files": len(latencies),
+            "failed": len(self.failures),
+            "seconds": round(elapsed, 3),
+            "files_per_sec": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+            "p50_latency": round(percentile(0.50), 3),
+            "p95_latency": round(percentile(0.95), 3),
+            "p99_latency": round(percentile(0.99), 3),
+            "retries": self.retries,
+            "throttled": self.throttled,
+        }
+
+
+def error_status(e: Exception) -> int | None:
+    return getattr(e, "status_code", None)
+
+
+def retry_after(e: Exception) -> float | None:
+    response = getattr(e, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def is_transient(e: Exception) -> bool:
+    """Connection errors, timeouts, 408 and server errors"""
+    if isinstance(e, (APIConnectionError, APITimeoutError)):
+        return True
+    status = error_status(e)
+    return status is not None and (status >= 500 or status == 408)
+
+
+def upload_client(**kwargs) -> AsyncOpenAI:
+    """A client without SDK retries, so upload_all sees and paces every retry"""
+    return AsyncOpenAI(max_retries=0, **kwargs)
+
+
+async def upload_all(
+    items,
+    upload,
+    rate: float = 20.0,
+    concurrency: int = 8,
+    max_concurrency: int = 64,
+    max_retries: int = 8,
+    initial_wait: float = 1.0,
+    max_wait: float = 60.0,
+    on_done=None,
+) -> tuple[dict, UploadStats]:
+    """
+    Run `await upload(item)` for every item, returning ({item: result}, stats).
+    Items that failed for good are in stats.failures instead.
+    on_done(item, result) is called as each upload succeeds.
+    """
+    bucket = TokenBucket(rate)
+    limiter = AimdLimiter(concurrency, maximum=max_concurrency)
+    stats = UploadStats()
+    results = {}
+
+    async def upload_one(item):
+        for attempt in range(max_retries + 1):
+            await limiter.acquire()
+            try:
+                await bucket.acquire()
+                start = time.monotonic()
+                result = await upload(item)
+            except Exception as e:
+                error = e
+            else:
+                stats.latencies.append(time.monotonic() - start)
+                limiter.on_success()
+                results[item] = result
+                if on_done is not None:
+                    on_done(item, result)
+                return
+            finally:
+                await limiter.release()
+
+            wait = random.uniform(0, min(max_wait, initial_wait * 2**attempt))
+            if error_status(error) == 429:
+                stats.throttled += 1
+                limiter.on_throttle()
+                bucket.pause(retry_after(error) or wait)
+            elif is_transient(error):
+                await asyncio.sleep(wait)
+            else:
+                stats.failures[str(item)] = f"{type(error).__name__}: {error}"
+                return
+            stats.retries += 1
+        stats.failures[str(item)] = f"gave up after {max_retries} retries: {error}"
+
+    await asyncio.gather(*(upload_one(item) for item in items))
+    stats.finished = time.monotonic()
+    return results, stats
@@ -0,0 +1,270 @@
+"""
+Local lexical retrieval over a checkout with BM25, no network needed.
+
+Tracked text files are tokenized into identifiers, which are also split on
+snake_case and camelCase, plus the words of their path. The inverted index is
+kept as CSR arrays: the postings of term t are docs[offsets[t]:offsets[t + 1]]
+with term frequencies tfs[...]. A query gathers the postings of its terms and
+sums their BM25 weights per file with one np.bincount.
+
+Indexes are cached per git tree under cache/bm25, so instances at commits
+with the same tree share one.
+"""
+
+import os
+import re
+import subprocess
+from collections import Counter
+from dataclasses import dataclass
+
+import numpy as np
+
+from swe_bench_util.cache import atomic_open, cache_path
+from swe_bench_util.git_snapshot import GitSnapshot
+from swe_bench_util.index.file_selection import (
+    DEFAULT_MAX_BYTES,
+    select_files,
+    select_snapshot_files,
+)
+
+# Bump when tokenization or the file layout changes, to invalidate caches
+FORMAT_VERSION = 1
+
+IDENTIFIER_PATTERN = re.compile(rb"[A-Za-z_][A-Za-z0-9_]*")
+WORD_PATTERN = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+")
+MIN_TOKEN_LENGTH = 2
+
+
+def identifier_tokens(identifier: str) -> list[str]:
+    """getHTTPResponse_code -> gethttpresponse_code, get, http, response, code"""
+    tokens = [identifier.lower()]
+    words = [word.lower() for word in WORD_PATTERN.findall(identifier)]
+    if len(words) > 1:
+        tokens += words
+    return [token for token in tokens if len(token) >= MIN_TOKEN_LENGTH]
+
+
+def tokenize(text: str) -> list[str]:
+    return [
+        token
+        for identifier in IDENTIFIER_PATTERN.findall(text.encode())
+        for token in identifier_tokens(identifier.decode())
+    ]
+
+
+class IdentifierTerms(dict):
+    """
+    Maps identifiers to ids, splitting each distinct identifier only once.
+    The terms of identifier i are terms[starts[i]:starts[i] + lengths[i]].
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.vocab: dict[str, int] = {}
+        self.starts: list[int] = []
+        self.lengths: list[int] = []
+        self.terms: list[int] = []
+
+    def __missing__(self, identifier: bytes) -> int:
+        tokens = identifier_tokens(identifier.decode())
+        self.starts.append(len(self.terms))
+        self.lengths.append(len(tokens))
+        self.terms += [
+            self.vocab.setdefault(token, len(self.vocab)) for token in tokens
+        ]
+        id = self[identifier] = len(self.starts) - 1
+        return id
+
+
+def expand(starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Concatenation of the ranges [start, start + length)"""
+    positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    positions += np.arange(len(positions))
+    return positions
+
+
+@dataclass
+class Bm25Index:
+    paths: list[str]
+    vocab: dict[str, int]
+    offsets: np.ndarray
+    docs: np.ndarray
+    tfs: np.ndarray
+    doc_lengths: np.ndarray
+    k1: float = 1.2
+    b: float = 0.75
+
+    def __post_init__(self):
+        average = self.doc_lengths.mean() if len(self.doc_lengths) else 1.0
+        self.length_norm = self.k1 * (
+            1 - self.b + self.b * self.doc_lengths / max(average, 1.0)
+        )
+
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every file for the query"""
+        term_ids = np.array(
+            sorted(
+                {self.vocab[token] for token in tokenize(query) if token in self.vocab}
+            ),
+            dtype=np.int64,
+        )
+        scores = np.zeros(len(self.paths))
+        if len(term_ids) == 0:
+            return scores
+        starts = self.offsets[term_ids]
+        doc_freqs = self.offsets[term_ids + 1] - starts
+        # Positions of all postings of the query terms, without a Python loop
+        positions = expand(starts, doc_freqs)
+        docs = self.docs[positions]
+        tfs = self.tfs[positions]
+        idf = np.log1p((len(self.paths) - doc_freqs + 0.5) / (doc_freqs + 0.5))
+        weights = np.repeat(idf, doc_freqs) * tfs * (self.k1 + 1)
+        weights /= tfs + self.length_norm[docs]
+        return np.bincount(docs, weights, minlength=len(self.paths))
+
+    def search(self, query: str, k: int = 10) -> list[tuple[str, float]]:
+        """Top k paths for the query, best first, only files matching a term"""
+        scores = self.scores(query)
+        k = min(k, int(np.count_nonzero(scores)))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self.paths[doc], float(scores[doc])) for doc in top]
+
+    def save(self, path: str):
+        vocab = sorted(self.vocab, key=self.vocab.get)
+        with atomic_open(path, "wb") as f:
+            np.savez(
+                f,
+                version=np.array(FORMAT_VERSION),
+                paths=np.frombuffer("\0".join(self.paths).encode(), dtype=np.uint8),
+                vocab=np.frombuffer("\0".join(vocab).encode(), dtype=np.uint8),
+                offsets=self.offsets,
+                docs=self.docs,
+                tfs=self.tfs,
+                doc_lengths=self.doc_lengths,
+            )
+
+
+def split_strings(data: np.ndarray) -> list[str]:
+    text = data.tobytes().decode()
+    return text.split("\0") if text else []
+
+
+def load_bm25(path: str) -> Bm25Index | None:
+    """The saved index, or None if it was written by another format version"""
+    with np.load(path, allow_pickle=False) as data:
+        if int(data["version"]) != FORMAT_VERSION:
+            return None
+        vocab = split_strings(data["vocab"])
+        return Bm25Index(
+            paths=split_strings(data["paths"]),
+            vocab={token: i for i, token in enumerate(vocab)},
+            offsets=data["offsets"],
+            docs=data["docs"],
+            tfs=data["tfs"],
+            doc_lengths=data["doc_lengths"],
+        )
+
+
+def read_file(full_path: str) -> bytes:
+    with open(full_path, "rb") as f:
+        return f.read()
+
+
+def build_bm25(repo_dir: str, max_bytes: int = DEFAULT_MAX_BYTES) -> Bm25Index:
+    selected, _ = select_files(repo_dir, max_bytes)
+    return index_documents(
+        [file.path for file in selected],
+        (read_file(file.full_path) for file in selected),
+    )
+
+
+def build_bm25_snapshot(
+    snapshot: GitSnapshot, max_bytes: int = DEFAULT_MAX_BYTES
+) -> Bm25Index:
+    selected, _ = select_snapshot_files(snapshot, max_bytes)
+    return index_documents(
+        [file.path for file in selected], (file.data for file in selected)
+    )
+
+
+def index_documents(paths: list[str], contents) -> Bm25Index:
+    """Index the contents of each path, contents may be a lazy iterable"""
+    identifiers = IdentifierTerms()
+    doc_identifiers = []
+    doc_counts = []
+    for path, data in zip(paths, contents):
+        path_words = path.replace("/", " ").replace(".", " ").encode()
+        counts = Counter(IDENTIFIER_PATTERN.findall(data + b"\n" + path_words))
+        doc_identifiers.append(
+            np.fromiter(map(identifiers.__getitem__, counts), np.int64, len(counts))
+        )
+        doc_counts.append(np.fromiter(counts.values(), np.float32, len(counts)))
+
+    # Expand identifiers to their terms for all files at once
+    lengths = np.array(identifiers.lengths, dtype=np.int64)
+    starts = np.array(identifiers.starts, dtype=np.int64)
+    terms = np.array(identifiers.terms, dtype=np.int64)
+    occurrences = np.concatenate(doc_identifiers or [np.zeros(0, np.int64)])
+    occurrence_docs = np.repeat(
+        np.arange(len(paths)), [len(ids) for ids in doc_identifiers]
+    )
+    term_lengths = lengths[occurrences]
+    term_ids = terms[expand(starts[occurrences], term_lengths)]
+    docs = np.repeat(occurrence_docs, term_lengths)
+    counts = np.repeat(np.concatenate(doc_counts or [np.zeros(0)]), term_lengths)
+
+    # One posting per (term, doc), sorted by term then file
+    stride = max(len(paths), 1)
+    keys, inverse = np.unique(term_ids * stride + docs, return_inverse=True)
+    vocab_size = len(identifiers.vocab)
+    offsets = np.zeros(vocab_size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys // stride, minlength=vocab_size), out=offsets[1:])
+    return Bm25Index(
+        paths=paths,
+        vocab=identifiers.vocab,
+        offsets=offsets,
+        docs=(keys % stride).astype(np.int32),
+        tfs=np.bincount(inverse, counts, minlength=len(keys)).astype(np.float32),
+        doc_lengths=np.bincount(docs, counts, minlength=len(paths)).astype(np.float32),
+    )
+
+
+def git_tree(repo_dir: str) -> str | None:
+    result = subprocess.run(
+        ["git", "rev-parse", "HEAD^{tree}"],
+        cwd=repo_dir,
+        capture_output=True,
+        text=True,
+    )
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+def cached_bm25(tree: str, max_bytes: int, build) -> Bm25Index:
+    path = cache_path("bm25", f"{tree}-{max_bytes}.npz")
+    if os.path.exists(path):
+        index = load_bm25(path)
+        if index is not None:
+            return index
+    index = build()
+    index.save(path)
+    return index
+
+
+def load_or_build_bm25(repo_dir: str, max_bytes: int = DEFAULT_MAX_BYTES) -> Bm25Index:
+    """The index of the checkout's HEAD tree, built on first use"""
+    tree = git_tree(repo_dir)
+    if tree is None:
+        return build_bm25(repo_dir, max_bytes)
+    return cached_bm25(tree, max_bytes, lambda: build_bm25(repo_dir, max_bytes))
+
+
+def load_or_build_bm25_snapshot(
+    snapshot: GitSnapshot, max_bytes: int = DEFAULT_MAX_BYTES
+) -> Bm25Index:
+    """The index of the snapshot's tree, built from the object store on first use"""
+    return cached_bm25(
+        snapshot.tree, max_bytes, lambda: build_bm25_snapshot(snapshot, max_bytes)
+    )
@@ -0,0 +1,154 @@
+"""
+Choose which files of a checkout to upload.
+
+Only git-tracked files are considered, so .git, build outputs and other
+untracked files are never walked. Excluded suffixes are matched with one set
+lookup per distinct suffix length, then oversized files and binaries
+(a NUL byte in the first block) are dropped. Every exclusion has a reason.
+"""
+
+import os
+import subprocess
+from dataclasses import dataclass
+from stat import S_ISREG
+
+from swe_bench_util.git_snapshot import SYMLINK_MODE, GitSnapshot
+from swe_bench_util.index.file_util import EXCLUDE_EXTS
+
+DEFAULT_MAX_BYTES = 1 << 20
+BINARY_SNIFF_BYTES = 8192
+
+
+@dataclass
+class SelectedFile:
+    path: str
+    full_path: str
+    size: int
+    # The blob sha in the git index, None outside a git repo
+    sha: str | None = None
+
+
+@dataclass
+class SnapshotFile:
+    path: str
+    sha: str
+    data: bytes
+
+    @property
+    def size(self) -> int:
+        return len(self.data)
+
+
+@dataclass
+class ExcludedFile:
+    path: str
+    reason: str
+
+
+class SuffixMatcher:
+    """Same result as any(name.endswith(s) for s in suffixes), in O(#lengths)"""
+
+    def __init__(self, suffixes: list[str]):
+        self.by_length: dict[int, set[str]] = {}
+        for suffix in suffixes:
+            self.by_length.setdefault(len(suffix), set()).add(suffix)
+        self.lengths = sorted(self.by_length)
+
+    def matches(self, name: str) -> bool:
+        for length in self.lengths:
+            if length > len(name):
+                return False
+            if name[-length:] in self.by_length[length]:
+                return True
+        return False
+
+
+EXCLUDED_SUFFIXES = SuffixMatcher(EXCLUDE_EXTS)
+
+
+def tracked_files(repo_dir: str) -> list[tuple[str, str | None]]:
+    """
+    Repo relative paths of files in the git index with their staged blob sha,
+    or all files outside .git with no sha
+    """
+    result = subprocess.run(
+        ["git", "ls-files", "-s", "-z"], cwd=repo_dir, capture_output=True
+    )
+    if result.returncode == 0:
+        shas = {}
+        for line in result.stdout.split(b"\0"):
+            if line:
+                # <mode> <sha> <stage>\t<path>, one line per stage of a conflict
+                info, path = line.split(b"\t", 1)
+                shas.setdefault(os.fsdecode(path), info.split(b" ")[1].decode())
+        return list(shas.items())
+    paths = []
+    for root, dirs, files in os.walk(repo_dir):
+        if ".git" in dirs:
+            dirs.remove(".git")
+        paths += [
+            (os.path.relpath(os.path.join(root, file), repo_dir), None)
+            for file in files
+        ]
+    return paths
+
+
+def is_binary(full_path: str) -> bool:
+    with open(full_path, "rb") as f:
+        return b"\0" in f.read(BINARY_SNIFF_BYTES)
+
+
+def select_files(
+    repo_dir: str, max_bytes: int = DEFAULT_MAX_BYTES
+) -> tuple[list[SelectedFile], list[ExcludedFile]]:
+    selected = []
+    excluded = []
+    for path, sha in tracked_files(repo_dir):
+        full_path = os.path.join(repo_dir, path)
+        if EXCLUDED_SUFFIXES.matches(path):
+            excluded.append(ExcludedFile(path, "excluded extension"))
+            continue
+        try:
+            stat = os.lstat(full_path)
+        except FileNotFoundError:
+            excluded.append(ExcludedFile(path, "missing"))
+            continue
+        if not S_ISREG(stat.st_mode):
+            # Symlinks and submodules
+            excluded.append(ExcludedFile(path, "not a regular file"))
+        elif stat.st_size > max_bytes:
+            excluded.append(ExcludedFile(path, "too large"))
+        elif is_binary(full_path):
+            excluded.append(ExcludedFile(path, "binary"))
+        else:
+            selected.append(SelectedFile(path, full_path, stat.st_size, sha))
+    return selected, excluded
+
+
+def select_snapshot_files(
+    snapshot: GitSnapshot, max_bytes: int = DEFAULT_MAX_BYTES
+) -> tuple[list[SnapshotFile], list[ExcludedFile]]:
+    """Same rules as select_files, on a commit in the object store"""
+    selected = []
+    excluded = []
+    for entry in snapshot.entries():
+        if EXCLUDED_SUFFIXES.matches(entry.path):
+            excluded.append(ExcludedFile(entry.path, "excluded extension"))
+        elif entry.type != "blob" or entry.mode == SYMLINK_MODE:
+            excluded.append(ExcludedFile(entry.path, "not a regular file"))
+        elif entry.size > max_bytes:
+            excluded.append(ExcludedFile(entry.path, "too large"))
+        else:
+            data = snapshot.read(entry)
+            if b"\0" in data[:BINARY_SNIFF_BYTES]:
+                excluded.append(ExcludedFile(entry.path, "binary"))
+            else:
+                selected.append(SnapshotFile(entry.path, entry.sha, data))
+    return selected, excluded
+
+
+def exclusion_summary(excluded: list[ExcludedFile]) -> dict[str, int]:
+    counts = {}
+    for file in excluded:
+        counts[file.reason] = counts.get(file.reason, 0) + 1
+    return counts
@@ -1,6 +1,9 @@
+import hashlib
 import random
 import time
 
+from swe_bench_util import trace
+
 EXCLUDE_EXTS: list[str] = [
     ".min.js",
     ".min.js.map",
@@ -72,6 +75,14 @@ EXCLUDE_EXTS: list[str] = [
 ]
 
 
+def git_blob_sha(file_path) -> str:
+    """The object id git gives this file's content, `git hash-object`"""
+    with open(file_path, "rb") as f:
+        data = f.read()
+    header = f"blob {len(data)}\0".encode()
+    return hashlib.sha1(header + data).hexdigest()
+
+
 def exponential_backoff_retry(
     upload_func,
     file_path,
@@ -98,19 +109,21 @@ def exponential_backoff_retry(
         try:
             return upload_func(file_path)
         except Exception as e:
-            if e.status_code == 429:  # Rate limited
+            # Connection errors and non-API exceptions have no status_code
+            if getattr(e, "status_code", None) == 429:  # Rate limited
                 print(
                     f"Rate limited, retrying {file_path} after {wait_time} seconds..."
                 )
                 time.sleep(wait_time)
                 retries += 1
+                trace.count("upload_retries")
                 wait_time = min(
                     wait_time * backoff_factor, max_wait
                 )  # Increase wait time but cap at max_wait
                 # Optional: add jitter to avoid the thundering herd problem
                 wait_time += random.uniform(0, wait_time * 0.1)
             else:
-                print(f"Error processing {file_path}: {e}")
+                print(f"Error processing {file_path}: {type(e).__name__}: {e}")
                 return None
     print(f"Maximum retries exceeded for {file_path}")
     return None
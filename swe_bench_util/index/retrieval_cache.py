@@ -0,0 +1,60 @@
+"""
+Results of streamed retrieval runs, so re-evaluation doesn't rerun inference.
+
+A result is keyed by assistant id, model, system prompt and a hash of the
+user prompt (which embeds the problem_statement): if any of them changes,
+the run is repeated. Like the upload cache, it is an append-only JSONL
+file, and the last entry for a key wins.
+"""
+
+import hashlib
+import json
+import threading
+from dataclasses import asdict, dataclass, field
+
+from swe_bench_util.cache import cache_path
+from swe_bench_util.index.upload_cache import read_journal
+
+
+@dataclass
+class RetrievalResult:
+    file_ids: list[str]
+    search_strings: list[str]
+    text: str
+    # Every retrieval chunk ({file_id, search_string}) of every tool call
+    chunks: list[dict] = field(default_factory=list)
+    # Time to first token, tokens/sec and total latency of the run
+    metrics: dict = field(default_factory=dict)
+
+
+def retrieval_cache_key(
+    assistant_id: str, model: str, system_prompt: str, user_prompt: str
+) -> str:
+    def digest(text: str) -> str:
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    return f"{assistant_id} {model} {digest(system_prompt)[:16]} {digest(user_prompt)}"
+
+
+class RetrievalCache:
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.results: dict[str, RetrievalResult] = {
+            entry["key"]: RetrievalResult(**entry["result"])
+            for entry in read_journal(path)
+        }
+
+    def get(self, key: str) -> RetrievalResult | None:
+        with self.lock:
+            return self.results.get(key)
+
+    def put(self, key: str, result: RetrievalResult):
+        with self.lock:
+            self.results[key] = result
+            with open(self.path, "a") as f:
+                f.write(json.dumps({"key": key, "result": asdict(result)}) + "\n")
+
+
+def default_retrieval_cache() -> RetrievalCache:
+    return RetrievalCache(cache_path("retrieval", "astra_assistants.jsonl"))
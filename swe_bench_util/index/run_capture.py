@@ -0,0 +1,88 @@
+"""
+Capture of a streamed assistant run.
+
+The generated text and every retrieval chunk of every tool call are kept
+in memory, along with time to first token, tokens/sec and total latency.
+Console output goes through a buffered writer that flushes at most every
+`interval` seconds, instead of two unbuffered writes per token.
+"""
+
+import sys
+import time
+
+
+class ThrottledWriter:
+    def __init__(self, stream=None, interval: float = 0.1):
+        self.stream = stream or sys.stdout
+        self.interval = interval
+        self.buffer: list[str] = []
+        self.last_flush = time.monotonic()
+
+    def write(self, text: str):
+        self.buffer.append(text)
+        if time.monotonic() - self.last_flush >= self.interval:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.stream.write("".join(self.buffer))
+            self.stream.flush()
+            self.buffer.clear()
+        self.last_flush = time.monotonic()
+
+
+class RunCapture:
+    def __init__(self, writer: ThrottledWriter | None = None):
+        self.writer = writer
+        self.started = time.perf_counter()
+        self.first_token_at: float | None = None
+        self.finished_at: float | None = None
+        self.deltas: list[str] = []
+        self.chunks: list[dict] = []
+
+    def add_text(self, delta: str):
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+        self.deltas.append(delta)
+        if self.writer is not None:
+            self.writer.write(delta)
+
+    def add_retrieval(self, chunks: list[dict]):
+        self.chunks += chunks
+
+    def finish(self):
+        self.finished_at = time.perf_counter()
+        if self.writer is not None:
+            self.writer.write("\n")
+            self.writer.flush()
+
+    @property
+    def text(self) -> str:
+        return "".join(self.deltas)
+
+    @property
+    def file_ids(self) -> list[str]:
+        """Retrieved file ids without repeats, in the order first retrieved"""
+        return list(dict.fromkeys(chunk["file_id"] for chunk in self.chunks))
+
+    @property
+    def search_strings(self) -> list[str]:
+        return list(dict.fromkeys(chunk["search_string"] for chunk in self.chunks))
+
+    def metrics(self) -> dict:
+        end = self.finished_at or time.perf_counter()
+        metrics = {
+            "total_seconds": round(end - self.started, 3),
+            "time_to_first_token": None,
+            # Text deltas, about one token each
+            "tokens": len(self.deltas),
+            "tokens_per_sec": None,
+        }
+        if self.first_token_at is not None:
+            metrics["time_to_first_token"] = round(
+                self.first_token_at - self.started, 3
+            )
+            generating = end - self.first_token_at
+            if generating > 0:
+                metrics["tokens_per_sec"] = round(len(self.deltas) / generating, 1)
+        return metrics
@@ -0,0 +1,65 @@
+"""
+Remote file ids of uploaded content, so unchanged files aren't uploaded again.
+
+Consecutive instances of a repo are at nearby commits and share most files.
+Entries are keyed by git blob SHA and repo relative path: the path is part
+of the key so that identical files within one checkout (e.g. empty
+__init__.py files) still get distinct ids, which keeps the per-instance
+file_id -> path mapping one to one.
+The cache is an append-only JSONL file, each upload is recorded as it finishes.
+"""
+
+import json
+import os
+import threading
+
+from swe_bench_util.cache import cache_path
+
+
+def read_journal(path: str) -> list[dict]:
+    """
+    Entries of an append-only JSONL file. A crash can leave a partial last
+    line, it is dropped so that later appends start on a fresh line.
+    """
+    entries = []
+    if not os.path.exists(path):
+        return entries
+    complete = 0
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            entries.append(json.loads(line))
+            complete += len(line)
+    if complete < os.path.getsize(path):
+        os.truncate(path, complete)
+    return entries
+
+
+def upload_cache_key(blob_sha: str, path: str) -> str:
+    return f"{blob_sha} {path}"
+
+
+class UploadCache:
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.file_ids: dict[str, str] = {
+            entry["key"]: entry["file_id"] for entry in read_journal(path)
+        }
+
+    def get(self, key: str) -> str | None:
+        with self.lock:
+            return self.file_ids.get(key)
+
+    def put(self, key: str, file_id: str):
+        with self.lock:
+            self.file_ids[key] = file_id
+            with open(self.path, "a") as f:
+                f.write(json.dumps({"key": key, "file_id": file_id}) + "\n")
+
+
+def default_upload_cache(embedding_model: str) -> UploadCache:
+    return UploadCache(
+        cache_path("uploads", f"astra_assistants-{embedding_model}.jsonl")
+    )
@@ -0,0 +1,39 @@
+"""
+Per-instance record of completed uploads, so an interrupted index can resume.
+
+Each upload is appended as soon as it finishes. On resume the journal is
+replayed and only the remaining files are uploaded; the journal is removed
+once the instance's file_ids artifact has been written.
+"""
+
+import json
+import os
+import threading
+
+from swe_bench_util.index.upload_cache import read_journal
+
+
+class UploadJournal:
+    def __init__(self, path: str, resume: bool = True):
+        self.path = path
+        self.lock = threading.Lock()
+        if not resume and os.path.exists(path):
+            os.remove(path)
+        self.file_ids: dict[str, str] = {
+            entry["path"]: entry["file_id"] for entry in read_journal(path)
+        }
+
+    def get(self, path: str) -> str | None:
+        with self.lock:
+            return self.file_ids.get(path)
+
+    def record(self, path: str, file_id: str):
+        with self.lock:
+            self.file_ids[path] = file_id
+            with open(self.path, "a") as f:
+                f.write(json.dumps({"path": path, "file_id": file_id}) + "\n")
+
+    def remove(self):
+        with self.lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
@@ -0,0 +1,94 @@
+"""
+Persistent lookup of dataset rows by instance_id and repo.
+
+The index is built once per dataset fingerprint and cached on disk,
+so selecting a few instances doesn't scan the split row by row.
+"""
+
+import fnmatch
+import json
+import os
+from dataclasses import asdict, dataclass
+
+from swe_bench_util.cache import cache_path, write_atomic
+
+
+def parse_selector(value: str | None) -> list[str]:
+    """Split a comma separated --id / --repo value, each part may be a glob"""
+    if not value:
+        return []
+    return [part.strip() for part in value.split(",") if part.strip()]
+
+
+def is_glob(pattern: str) -> bool:
+    return any(char in pattern for char in "*?[")
+
+
+def match_keys(keys: dict, patterns: list[str]) -> list:
+    """Keys matching any pattern; exact patterns are dict lookups"""
+    matched = []
+    for pattern in patterns:
+        if is_glob(pattern):
+            matched += fnmatch.filter(keys, pattern)
+        elif pattern in keys:
+            matched.append(pattern)
+    return matched
+
+
+@dataclass
+class InstanceIndex:
+    fingerprint: str
+    by_id: dict[str, int]
+    by_repo: dict[str, list[int]]
+
+    def select(self, repos: list[str], ids: list[str]) -> list[int]:
+        """Row numbers matching any of repos and any of ids, in dataset order"""
+        rows = None
+        if repos:
+            rows = {
+                row
+                for repo in match_keys(self.by_repo, repos)
+                for row in self.by_repo[repo]
+            }
+        if ids:
+            id_rows = {self.by_id[id] for id in match_keys(self.by_id, ids)}
+            rows = id_rows if rows is None else rows & id_rows
+        if rows is None:
+            return list(range(len(self.by_id)))
+        return sorted(rows)
+
+
+def build_index(dataset) -> InstanceIndex:
+    by_id = {}
+    by_repo = {}
+    for row, (id, repo) in enumerate(zip(dataset["instance_id"], dataset["repo"])):
+        by_id[id] = row
+        by_repo.setdefault(repo, []).append(row)
+    return InstanceIndex(dataset._fingerprint, by_id, by_repo)
+
+
+def load_index(dataset) -> InstanceIndex:
+    """Load the index for this dataset fingerprint, building it on first use"""
+    path = cache_path("instance_index", f"{dataset._fingerprint}.json")
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            return InstanceIndex(**json.load(f))
+    index = build_index(dataset)
+    write_atomic(path, json.dumps(asdict(index)))
+    return index
+
+
+def select_indices(dataset, repo: str | None = None, id: str | None = None):
+    """Row numbers of dataset matching --repo and --id selectors"""
+    repos = parse_selector(repo)
+    ids = parse_selector(id)
+    if not repos and not ids:
+        return range(len(dataset))
+    return load_index(dataset).select(repos, ids)
+
+
+def select_instances(dataset, repo: str | None = None, id: str | None = None):
+    """Rows of dataset matching --repo and --id selectors"""
+    if not repo and not id:
+        return dataset
+    return dataset.select(select_indices(dataset, repo=repo, id=id))
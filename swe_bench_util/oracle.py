@@ -0,0 +1,68 @@
+"""
+The oracle: files and lines changed by each example's patch and test_patch.
+
+Parsing every patch of a split is cached on disk, keyed by dataset name,
+split and the datasets fingerprint, so a new dataset revision gets a new
+cache entry and stale entries are removed.
+"""
+
+import glob
+import json
+import os
+from dataclasses import asdict
+
+from swe_bench_util.cache import cache_path, write_atomic
+from swe_bench_util.diff_parser import FileDiff, Hunk, parse_unified_diff
+from swe_bench_util.file_hint_eval import BenchExample
+
+
+def bench_example(row_data) -> BenchExample:
+    patch_diffs = parse_unified_diff(row_data["patch"])
+    test_patch_diffs = parse_unified_diff(row_data["test_patch"])
+    return BenchExample(
+        id=row_data["instance_id"],
+        repo=row_data["repo"],
+        base_commit=row_data["base_commit"],
+        patch_files=[file_diff.path for file_diff in patch_diffs],
+        test_patch_files=[file_diff.path for file_diff in test_patch_diffs],
+        patch_diffs=patch_diffs,
+        test_patch_diffs=test_patch_diffs,
+    )
+
+
+def file_diff_from_dict(data) -> FileDiff:
+    return FileDiff(**{**data, "hunks": [Hunk(**hunk) for hunk in data["hunks"]]})
+
+
+def bench_example_from_dict(data) -> BenchExample:
+    """Inverse of asdict, as read back from oracle.json or the cache"""
+    return BenchExample(
+        **{
+            **data,
+            "patch_diffs": [
+                file_diff_from_dict(d) for d in data.get("patch_diffs", [])
+            ],
+            "test_patch_diffs": [
+                file_diff_from_dict(d) for d in data.get("test_patch_diffs", [])
+            ],
+        }
+    )
+
+
+def oracle_cache_prefix(dataset_name: str, split: str) -> str:
+    return cache_path("oracle", dataset_name.replace("/", "__"), split)
+
+
+def load_oracle(dataset, dataset_name: str, split: str) -> list[BenchExample]:
+    """BenchExample for every row of dataset, in row order"""
+    prefix = oracle_cache_prefix(dataset_name, split)
+    path = f"{prefix}-{dataset._fingerprint}.json"
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            return [bench_example_from_dict(data) for data in json.load(f)]
+    examples = [bench_example(row_data) for row_data in dataset]
+    write_atomic(path, json.dumps([asdict(example) for example in examples]))
+    for stale in glob.glob(f"{glob.escape(prefix)}-*.json"):
+        if stale != path:
+            os.remove(stale)
+    return examples
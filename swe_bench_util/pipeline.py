@@ -0,0 +1,51 @@
+"""
+Overlap per-instance preparation with inference on a thread pool.
+
+prepare() runs on the calling thread, so e.g. the checkout dir of a repo is
+never shared, infer() runs on the pool as instances are ready, and record()
+runs on the calling thread in instance order as soon as the instances
+before it are done.
+"""
+
+import concurrent.futures
+from collections import deque
+
+
+def run_pipeline(rows, prepare, infer, record, workers: int, max_ahead: int = 0):
+    """
+    For each row: prepared = prepare(row), then infer(row, *prepared) on the
+    pool, then record(row, *inferred) in row order.
+
+    At most max_ahead (default 2 * workers) inferences are unfinished at a
+    time, so preparation doesn't run further ahead than the pool can catch
+    up with. If infer raises, the rows before it are recorded, inferences
+    not started yet are cancelled and the error propagates.
+    """
+    max_ahead = max_ahead or 2 * workers
+    pending = deque()
+
+    def record_done():
+        while pending and pending[0][1].done():
+            row, future = pending.popleft()
+            record(row, *future.result())
+
+    with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+        try:
+            for row in rows:
+                while True:
+                    running = [future for _, future in pending if not future.done()]
+                    if len(running) < max_ahead:
+                        break
+                    concurrent.futures.wait(
+                        running, return_when=concurrent.futures.FIRST_COMPLETED
+                    )
+                prepared = prepare(row)
+                pending.append((row, executor.submit(infer, row, *prepared)))
+                record_done()
+            while pending:
+                row, future = pending.popleft()
+                record(row, *future.result())
+        except BaseException:
+            for _, future in pending:
+                future.cancel()
+            raise
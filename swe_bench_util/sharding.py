@@ -0,0 +1,86 @@
+"""
+Deterministic sharding of instances across machines, and merging of the
+per-shard outputs.
+
+Shards are balanced by instance count and keep each repo on one shard
+where possible, so a node only clones the repos of its own instances.
+A repo with more instances than fit in one shard is split into chunks by
+instance id. The assignment depends only on the selected (instance_id,
+repo) pairs, so every node computes the same one.
+
+    swe-bench-util checkout --split test --shard 0/8
+"""
+
+import heapq
+import json
+import math
+import re
+
+
+def parse_shard(text: str) -> tuple[int, int]:
+    """(index, count) of "i/N", with 0 <= i < N"""
+    match = re.fullmatch(r"\s*(\d+)\s*/\s*(\d+)\s*", text)
+    if not match:
+        raise ValueError(f"Invalid shard '{text}', expected i/N")
+    index, count = int(match.group(1)), int(match.group(2))
+    if not 0 <= index < count:
+        raise ValueError(f"Invalid shard '{text}', expected 0 <= i < N")
+    return index, count
+
+
+def assign_shards(keys: list[tuple[str, str]], count: int) -> list[int]:
+    """Shard of each (instance_id, repo), largest groups first to the emptiest shard"""
+    by_repo: dict[str, list[int]] = {}
+    for position, (_, repo) in enumerate(keys):
+        by_repo.setdefault(repo, []).append(position)
+    capacity = max(1, math.ceil(len(keys) / count))
+    groups = []
+    for repo, positions in by_repo.items():
+        positions.sort(key=lambda position: keys[position][0])
+        for start in range(0, len(positions), capacity):
+            groups.append(positions[start : start + capacity])
+    groups.sort(key=lambda group: (-len(group), keys[group[0]][1], keys[group[0]][0]))
+
+    shards = [0] * len(keys)
+    loads = [(0, shard) for shard in range(count)]
+    for group in groups:
+        load, shard = heapq.heappop(loads)
+        for position in group:
+            shards[position] = shard
+        heapq.heappush(loads, (load + len(group), shard))
+    return shards
+
+
+def shard_positions(keys: list[tuple[str, str]], index: int, count: int) -> list[int]:
+    """Positions of the keys in shard index of count, in their original order"""
+    shards = assign_shards(keys, count)
+    return [position for position, shard in enumerate(shards) if shard == index]
+
+
+def record_id(record: dict) -> str:
+    """Instance id of an oracle, results, hints or rows record"""
+    return record["id"] if "id" in record else record["instance_id"]
+
+
+def read_records(path: str) -> list[dict]:
+    """A JSON list, or JSONL for a .jsonl path"""
+    with open(path, "r") as f:
+        if path.endswith(".jsonl"):
+            return [json.loads(line) for line in f if line.strip()]
+        return json.load(f)
+
+
+def merge_records(inputs: list[list[dict]]) -> list[dict]:
+    """
+    The records of all inputs, one per instance id, sorted by id.
+    Within one input the last record of an id wins, as appended hints
+    files are read by eval. Different inputs must agree on an instance.
+    """
+    merged: dict[str, dict] = {}
+    for records in inputs:
+        latest = {record_id(record): record for record in records}
+        for id, record in latest.items():
+            if id in merged and merged[id] != record:
+                raise ValueError(f"Conflicting records for instance '{id}'")
+            merged[id] = record
+    return [merged[id] for id in sorted(merged)]
@@ -0,0 +1,132 @@
+"""
+Per-phase timing spans and counters, written by `--trace`.
+
+Tracing is off unless enable() was called. Until then span() returns one
+shared no-op context manager and count() returns at once, so instrumented
+hot paths only pay a function call and a None check.
+
+    with trace.span("checkout", instance=instance_id):
+        ...
+    trace.count("bytes_uploaded", size)
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+NULL_SPAN = nullcontext()
+
+
+class Tracer:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.origin = time.perf_counter_ns()
+        # (name, start ns, duration ns, thread id, args)
+        self.spans: list[tuple[str, int, int, int, dict]] = []
+        self.counters: dict[str, float] = {}
+
+    @contextmanager
+    def span(self, name: str, **args):
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            end = time.perf_counter_ns()
+            with self.lock:
+                self.spans.append(
+                    (
+                        name,
+                        start - self.origin,
+                        end - start,
+                        threading.get_ident(),
+                        args,
+                    )
+                )
+
+    def count(self, name: str, value: float = 1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def summary(self) -> str:
+        """Tab separated totals per span name, slowest first, then the counters"""
+        by_name: dict[str, list[int]] = {}
+        for name, _, duration, _, _ in self.spans:
+            by_name.setdefault(name, []).append(duration)
+        lines = ["\t".join(["span", "n", "total_s", "mean_s", "max_s"])]
+        for name, durations in sorted(by_name.items(), key=lambda item: -sum(item[1])):
+            total = sum(durations) / 1e9
+            lines.append(
+                f"{name}\t{len(durations)}\t{total:.3f}"
+                f"\t{total / len(durations):.3f}\t{max(durations) / 1e9:.3f}"
+            )
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"{name}\t{value:g}")
+        return "\n".join(lines)
+
+    def chrome_trace(self) -> dict:
+        """Trace Event Format, loads in chrome://tracing and Perfetto"""
+        pid = os.getpid()
+        events = [
+            {
+                "name": name,
+                "ph": "X",
+                "ts": start / 1000,
+                "dur": duration / 1000,
+                "pid": pid,
+                "tid": thread,
+                "args": args,
+            }
+            for name, start, duration, thread, args in self.spans
+        ]
+        events += [
+            {"name": name, "ph": "C", "ts": 0, "pid": pid, "args": {name: value}}
+            for name, value in self.counters.items()
+        ]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write(self, path: str):
+        """JSONL for a .jsonl path, Chrome trace format otherwise"""
+        with self.lock:
+            with open(path, "w") as f:
+                if path.endswith(".jsonl"):
+                    for name, start, duration, thread, args in self.spans:
+                        record = {
+                            "span": name,
+                            "start_s": start / 1e9,
+                            "seconds": duration / 1e9,
+                            "thread": thread,
+                            **args,
+                        }
+                        f.write(json.dumps(record) + "\n")
+                    for name, value in self.counters.items():
+                        f.write(json.dumps({"counter": name, "value": value}) + "\n")
+                else:
+                    json.dump(self.chrome_trace(), f)
+
+
+TRACER: Tracer | None = None
+
+
+def enable() -> Tracer:
+    global TRACER
+    if TRACER is None:
+        TRACER = Tracer()
+    return TRACER
+
+
+def disable():
+    global TRACER
+    TRACER = None
+
+
+def span(name: str, **args):
+    if TRACER is None:
+        return NULL_SPAN
+    return TRACER.span(name, **args)
+
+
+def count(name: str, value: float = 1):
+    if TRACER is not None:
+        TRACER.count(name, value)
@@ -0,0 +1,173 @@
+"""
+Worktree-backed checkouts.
+
+Each repo is cloned once as a bare mirror, and every instance gets its own
+git worktree from that mirror. Instances of the same repo can then be checked
+out and processed at the same time without rewriting a shared working tree.
+"""
+
+import fcntl
+import os
+import shutil
+import subprocess
+import threading
+from contextlib import contextmanager
+
+from swe_bench_util import trace
+
+
+def mirror_dir(dataset_name: str, repo: str) -> str:
+    return f"checkouts/{dataset_name}/mirrors/{repo.replace('/', '__')}.git"
+
+
+def worktree_dir(dataset_name: str, repo: str, instance_id: str) -> str:
+    return f"checkouts/{dataset_name}/worktrees/{repo.replace('/', '__')}/{instance_id}"
+
+
+def git(args: list[str], cwd: str | None = None) -> str:
+    result = subprocess.run(
+        ["git", *args], cwd=cwd, check=True, text=True, capture_output=True
+    )
+    return result.stdout
+
+
+def has_commit(git_dir: str, commit_hash: str) -> bool:
+    result = subprocess.run(
+        ["git", "cat-file", "-e", f"{commit_hash}^{{commit}}"],
+        cwd=git_dir,
+        capture_output=True,
+    )
+    return result.returncode == 0
+
+
+class WorktreePool:
+    """
+    Creates and leases per-instance worktrees.
+
+    Mirror updates and `git worktree add` are serialized per mirror, both
+    between threads and between processes (via a lock file next to the mirror).
+    A lease gives exclusive use of one instance's worktree until released.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._mirror_locks: dict[str, threading.Lock] = {}
+        self._lease_locks: dict[str, threading.Lock] = {}
+        # Worktrees leased right now, which eviction must keep
+        self.leased: set[str] = set()
+
+    def _named_lock(self, locks: dict[str, threading.Lock], name: str):
+        with self._lock:
+            if name not in locks:
+                locks[name] = threading.Lock()
+            return locks[name]
+
+    @contextmanager
+    def _mirror_lock(self, path: str):
+        with self._named_lock(self._mirror_locks, path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(f"{path}.lock", "w") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def maybe_mirror(
+        self,
+        repo_url: str,
+        path: str,
+        commit_hash: str,
+        clone_filter: str | None = None,
+    ):
+        """
+        Clone a bare mirror if needed, and fetch if it lacks the commit.
+        With clone_filter (e.g. blob:none), the mirror is a partial clone and
+        missing objects are fetched on demand.
+        """
+        if not os.path.exists(path):
+            filter_args = [f"--filter={clone_filter}"] if clone_filter else []
+            with trace.span("clone", repo=repo_url):
+                git(["clone", "--mirror", *filter_args, repo_url, path])
+            print(f"Mirror '{path}' was created.")
+        elif not has_commit(path, commit_hash):
+            with trace.span("fetch", repo=repo_url):
+                git(["fetch", "--prune", "origin"], cwd=path)
+
+    def ensure_mirror(
+        self,
+        repo_url: str,
+        mirror: str,
+        commit_hash: str,
+        clone_filter: str | None = None,
+    ) -> str:
+        """The mirror at `mirror`, containing `commit_hash`, for reading objects."""
+        with self._mirror_lock(mirror):
+            self.maybe_mirror(repo_url, mirror, commit_hash, clone_filter)
+        return mirror
+
+    def ensure(
+        self,
+        repo_url: str,
+        mirror: str,
+        path: str,
+        commit_hash: str,
+        clone_filter: str | None = None,
+    ) -> str:
+        """Create the worktree at `path` if needed and check out `commit_hash`."""
+        with self._mirror_lock(mirror):
+            self.maybe_mirror(repo_url, mirror, commit_hash, clone_filter)
+            if not os.path.exists(path):
+                git(["worktree", "prune"], cwd=mirror)
+                git(
+                    [
+                        "worktree",
+                        "add",
+                        "--detach",
+                        "--no-checkout",
+                        os.path.abspath(path),
+                        commit_hash,
+                    ],
+                    cwd=mirror,
+                )
+                print(f"Worktree '{path}' was created.")
+        # Each worktree has its own index and HEAD, so this runs unlocked.
+        with trace.span("checkout", commit=commit_hash):
+            git(["checkout", "--force", "--detach", commit_hash], cwd=path)
+        return path
+
+    @contextmanager
+    def lease(
+        self,
+        repo_url: str,
+        mirror: str,
+        path: str,
+        commit_hash: str,
+        clone_filter: str | None = None,
+    ):
+        """Exclusive use of the worktree at `path`, checked out at `commit_hash`."""
+        with self._named_lock(self._lease_locks, path):
+            with self._lock:
+                self.leased.add(os.path.normpath(path))
+            try:
+                yield self.ensure(repo_url, mirror, path, commit_hash, clone_filter)
+            finally:
+                with self._lock:
+                    self.leased.discard(os.path.normpath(path))
+
+    def remove(self, mirror: str, path: str | None = None):
+        """Remove the worktree at `path`, or without a path the mirror itself."""
+        with self._mirror_lock(mirror):
+            if path is None:
+                shutil.rmtree(mirror, ignore_errors=True)
+                return
+            if os.path.exists(mirror):
+                subprocess.run(
+                    ["git", "worktree", "remove", "--force", os.path.abspath(path)],
+                    cwd=mirror,
+                    capture_output=True,
+                )
+            shutil.rmtree(path, ignore_errors=True)
+
+
+WORKTREES = WorktreePool()
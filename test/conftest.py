@@ -0,0 +1,46 @@
+import os
+import subprocess
+
+import pytest
+
+
+def run_git(args, cwd) -> str:
+    """Run git with a test identity, return its stripped stdout"""
+    return subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+        cwd=cwd,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.strip()
+
+
+def commit_files(path, *commits: dict) -> list[str]:
+    """
+    Init a repo at path and make one commit per {relative path: str or bytes}
+    dict, on top of anything already in the directory. Return the hashes.
+    """
+    os.makedirs(path, exist_ok=True)
+    run_git(["init", "-q"], path)
+    hashes = []
+    for number, files in enumerate(commits):
+        for name, content in files.items():
+            full_path = os.path.join(path, name)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            mode = "wb" if isinstance(content, bytes) else "w"
+            with open(full_path, mode) as f:
+                f.write(content)
+        run_git(["add", "."], path)
+        run_git(["commit", "-q", "-m", f"commit {number}"], path)
+        hashes.append(run_git(["rev-parse", "HEAD"], path))
+    return hashes
+
+
+@pytest.fixture
+def git():
+    return run_git
+
+
+@pytest.fixture
+def make_repo():
+    return commit_files
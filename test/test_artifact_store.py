@@ -0,0 +1,60 @@
+import json
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from swe_bench_util.artifact_store import ArtifactStore
+from swe_bench_util.cli import import_sidecar_files
+
+
+def test_put_get_and_query(tmp_path):
+    store = ArtifactStore(str(tmp_path / "artifacts.sqlite3"))
+    assert store.get("astra", "a-1", "file_ids") is None
+    store.put(
+        "astra", "a-1", {"file_ids": {"file-1": "src/app.py"}, "status": "indexed"}
+    )
+    store.put("astra", "a-2", {"assistant_id": "asst_2"})
+    store.put("astra", "a-1", {"status": "evaluated"})
+    store.put("other", "a-3", {"file_ids": {}})
+
+    assert store.get("astra", "a-1", "file_ids") == {"file-1": "src/app.py"}
+    assert store.get_all("astra", "a-1") == {
+        "file_ids": {"file-1": "src/app.py"},
+        "status": "evaluated",
+    }
+    assert store.instances("astra", "file_ids") == ["a-1"]
+    assert store.counts("astra") == {"file_ids": 1, "status": 1, "assistant_id": 1}
+
+
+def write_many(args):
+    path, worker = args
+    store = ArtifactStore(path)
+    for i in range(50):
+        store.put(
+            "astra", f"w{worker}-{i}", {"file_ids": {"f": str(i)}, "status": "indexed"}
+        )
+    return worker
+
+
+def test_concurrent_writers(tmp_path):
+    path = str(tmp_path / "artifacts.sqlite3")
+    store = ArtifactStore(path)
+    with ThreadPoolExecutor(4) as executor:
+        list(executor.map(write_many, [(path, worker) for worker in range(4)]))
+    with ProcessPoolExecutor(3) as executor:
+        list(executor.map(write_many, [(path, worker) for worker in range(4, 7)]))
+    assert len(store.instances("astra", "file_ids")) == 7 * 50
+    assert store.get("astra", "w5-49", "file_ids") == {"f": "49"}
+
+
+def test_import_sidecar_files(tmp_path):
+    store = ArtifactStore(str(tmp_path / "artifacts.sqlite3"))
+    checkout = tmp_path / "checkout"
+    checkout.mkdir()
+    (checkout / "a-1-file_ids.json").write_text(json.dumps({"file-1": "app.py"}))
+    (checkout / "a-1-assistant_id.txt").write_text("asst_1")
+
+    import_sidecar_files(store, "astra", "a-1", str(checkout))
+    assert store.get_all("astra", "a-1") == {
+        "file_ids": {"file-1": "app.py"},
+        "assistant_id": "asst_1",
+    }
+    assert list(checkout.iterdir()) == []
@@ -0,0 +1,134 @@
+import asyncio
+
+import httpx
+import openai
+
+from benchmarks.mock_assistants import MockAssistantsServer, MockConfig
+from swe_bench_util.index.async_upload import AimdLimiter, upload_all, upload_client
+
+
+class ApiError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+
+
+def test_upload_all_retries_throttles_and_records_failures():
+    attempts = {}
+    done = []
+
+    async def upload(path):
+        attempts[path] = attempts.get(path, 0) + 1
+        if path == "bad.py":
+            raise ApiError(400)
+        if path == "flaky.py" and attempts[path] == 1:
+            raise openai.APIConnectionError(
+                request=httpx.Request("POST", "http://localhost/v1/files")
+            )
+        if path == "busy.py" and attempts[path] <= 2:
+            raise ApiError(429)
+        return f"file-{path}"
+
+    paths = ["a.py", "bad.py", "flaky.py", "busy.py"]
+    results, stats = asyncio.run(
+        upload_all(
+            paths,
+            upload,
+            rate=1000,
+            initial_wait=0.01,
+            on_done=lambda path, file_id: done.append(path),
+        )
+    )
+    assert results == {p: f"file-{p}" for p in ["a.py", "flaky.py", "busy.py"]}
+    assert sorted(done) == ["a.py", "busy.py", "flaky.py"]
+    assert list(stats.failures) == ["bad.py"]
+    assert attempts["bad.py"] == 1
+    assert stats.throttled == 2
+    assert stats.retries == 3
+    assert stats.summary()["files"] == 3
+
+
+def test_upload_all_does_not_retry_errors_without_status():
+    attempts = 0
+
+    async def upload(path):
+        nonlocal attempts
+        attempts += 1
+        raise TypeError("bad argument")
+
+    results, stats = asyncio.run(
+        upload_all(["a.py"], upload, max_retries=3, initial_wait=0.001)
+    )
+    assert attempts == 1
+    assert stats.retries == 0
+    assert stats.failures["a.py"] == "TypeError: bad argument"
+
+
+def test_engine_sees_every_429_of_the_server(tmp_path):
+    path = tmp_path / "app.py"
+    path.write_text("print('hi')\n")
+    config = MockConfig(rate_limit_probability=0.2, retry_after=0.001)
+    with MockAssistantsServer(config) as server:
+
+        async def run():
+            client = upload_client(base_url=server.base_url, api_key="mock")
+
+            async def upload(item):
+                with open(path, "rb") as f:
+                    file = await client.files.create(file=f, purpose="assistants")
+                return file.id
+
+            return await upload_all(
+                [str(i) for i in range(60)], upload, rate=1000, initial_wait=0.001
+            )
+
+        results, stats = asyncio.run(run())
+    assert len(results) == 60
+    assert server.stats.rate_limited > 0
+    assert stats.throttled == server.stats.rate_limited
+    assert stats.retries == server.stats.rate_limited
+
+
+def test_upload_all_gives_up_after_max_retries():
+    async def upload(path):
+        raise ApiError(503)
+
+    results, stats = asyncio.run(
+        upload_all(["a.py"], upload, max_retries=2, initial_wait=0.001)
+    )
+    assert results == {}
+    assert "gave up after 2 retries" in stats.failures["a.py"]
+
+
+def test_aimd_limiter_caps_in_flight_uploads():
+    peak = 0
+    in_flight = 0
+
+    async def upload(path):
+        nonlocal peak, in_flight
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.001)
+        in_flight -= 1
+        return path
+
+    asyncio.run(
+        upload_all(
+            [str(i) for i in range(50)],
+            upload,
+            rate=10000,
+            concurrency=2,
+            max_concurrency=3,
+        )
+    )
+    assert peak == 3
+
+
+def test_aimd_limiter_halves_once_per_window():
+    limiter = AimdLimiter(initial=16)
+    limiter.on_throttle()
+    limiter.on_throttle()
+    assert limiter.limit == 8
+    for _ in range(8):
+        limiter.on_success()
+    assert 8.9 < limiter.limit < 9.1
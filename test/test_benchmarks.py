@@ -0,0 +1,27 @@
+from benchmarks.core import BenchResult, compare, run, synthetic_patch
+from swe_bench_util.cli import diff_file_names
+
+
+def test_synthetic_patch_parses():
+    names = diff_file_names(synthetic_patch(3, 2, 5))
+    assert names == [f"src/pkg{i}/module_{i}.py" for i in range(3)]
+
+
+def test_compare_flags_regressions_beyond_threshold():
+    baseline = {"a": {"best": 1.0}, "b": {"best": 1.0}}
+    results = [
+        BenchResult("a", 1.2, 1.2, 10),
+        BenchResult("b", 1.3, 1.3, 10),
+        BenchResult("new", 5.0, 5.0, 10),
+    ]
+    assert compare(results, baseline, 0.25) == ["b"]
+
+
+def test_suite_runs_at_small_scale():
+    results = run(scale=0.01, only="diff_file_names.*,excluded_*", repeat=2, min_time=0)
+    assert [result.name for result in results] == [
+        "diff_file_names.large_patch",
+        "diff_file_names.many_instances",
+        "excluded_suffixes",
+    ]
+    assert all(result.best > 0 for result in results)
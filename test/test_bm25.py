@@ -0,0 +1,77 @@
+import numpy as np
+
+from swe_bench_util.index.bm25 import (
+    build_bm25,
+    identifier_tokens,
+    load_bm25,
+    load_or_build_bm25,
+)
+
+
+REPO_FILES = {
+    "src/parser.py": "class ConfigParser:\n"
+    "    def parse_section(self, header):\n"
+    "        pass\n",
+    "src/render.py": "def render_template(template):\n    return template.format()\n",
+    "docs.md": "How to render a template and parse a config.\n",
+    "logo.png": b"\x89PNG\0",
+}
+
+
+def test_identifier_tokens_split_case():
+    assert identifier_tokens("getHTTPResponse_code") == [
+        "gethttpresponse_code",
+        "get",
+        "http",
+        "response",
+        "code",
+    ]
+    assert identifier_tokens("x") == []
+
+
+def test_search_ranks_matching_file_first(tmp_path, make_repo):
+    make_repo(tmp_path, REPO_FILES)
+    index = build_bm25(str(tmp_path))
+    assert sorted(index.paths) == ["docs.md", "src/parser.py", "src/render.py"]
+    ranked = index.search("ConfigParser fails to parse a section header", k=2)
+    assert [path for path, _ in ranked][0] == "src/parser.py"
+    assert len(ranked) == 2
+    assert ranked[0][1] >= ranked[1][1] > 0
+    assert index.search("nothing matches zzz") == []
+
+
+def test_scores_match_direct_formula(tmp_path, make_repo):
+    make_repo(tmp_path, REPO_FILES)
+    index = build_bm25(str(tmp_path))
+    term = index.vocab["template"]
+    docs = index.docs[index.offsets[term] : index.offsets[term + 1]]
+    tfs = index.tfs[index.offsets[term] : index.offsets[term + 1]]
+    n, df = len(index.paths), len(docs)
+    idf = np.log(1 + (n - df + 0.5) / (df + 0.5))
+    expected = np.zeros(n)
+    for doc, tf in zip(docs, tfs):
+        norm = 1.2 * (0.25 + 0.75 * index.doc_lengths[doc] / index.doc_lengths.mean())
+        expected[doc] = idf * tf * 2.2 / (tf + norm)
+    assert np.allclose(index.scores("template"), expected)
+
+
+def test_index_is_cached_per_tree(tmp_path, monkeypatch, make_repo):
+    monkeypatch.setenv("SWE_BENCH_UTIL_CACHE_DIR", str(tmp_path / "cache"))
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    make_repo(repo, REPO_FILES)
+    built = load_or_build_bm25(str(repo))
+    saved = list((tmp_path / "cache" / "bm25").glob("*.npz"))
+    assert len(saved) == 1
+    loaded = load_bm25(str(saved[0]))
+    assert loaded.paths == built.paths
+    assert loaded.vocab == built.vocab
+    query = "render the template"
+    assert loaded.search(query) == built.search(query)
+
+
+def test_empty_repo(tmp_path, git):
+    git(["init", "-q"], tmp_path)
+    index = build_bm25(str(tmp_path))
+    assert index.paths == []
+    assert index.search("anything") == []
@@ -0,0 +1,122 @@
+import os
+
+import pytest
+
+from typer.testing import CliRunner
+
+from swe_bench_util import cli
+from swe_bench_util.checkout_cache import CheckoutCache, parse_size
+from swe_bench_util.worktree import WorktreePool
+
+
+# Big enough to show up in disk usage
+DATA = {"data.bin": os.urandom(64 << 10)}
+
+
+def test_parse_size():
+    assert parse_size("512") == 512
+    assert parse_size("1.5K") == 1536
+    assert parse_size("20G") == 20 << 30
+    assert parse_size("2MiB") == 2 << 20
+    with pytest.raises(ValueError):
+        parse_size("lots")
+
+
+def test_gc_evicts_least_recently_used_first(tmp_path, git, make_repo):
+    source = str(tmp_path / "source")
+    (commit,) = make_repo(source, DATA)
+    root = tmp_path / "checkouts"
+    dataset = root / "org" / "dataset"
+    clone_a = str(dataset / "org__a")
+    clone_b = str(dataset / "org__b")
+    mirror = str(dataset / "mirrors" / "org__c.git")
+    worktree = str(dataset / "worktrees" / "org__c" / "c-1")
+    git(["clone", "-q", source, clone_a], str(tmp_path))
+    git(["clone", "-q", source, clone_b], str(tmp_path))
+    WorktreePool().ensure(source, mirror, worktree, commit)
+
+    checkouts = CheckoutCache(str(root))
+    for age, path in [(400, mirror), (500, worktree), (300, clone_a), (100, clone_b)]:
+        os.utime(path, (0, 1_000_000 - age))
+    entries = {entry.path: entry for entry in checkouts.entries()}
+    assert {path: entry.kind for path, entry in entries.items()} == {
+        os.path.normpath(clone_a): "clone",
+        os.path.normpath(clone_b): "clone",
+        os.path.normpath(mirror): "mirror",
+        os.path.normpath(worktree): "worktree",
+    }
+    total = sum(entry.size for entry in entries.values())
+
+    # Only the oldest entry, the worktree, has to go
+    budget = total - entries[os.path.normpath(worktree)].size
+    dry = checkouts.gc(budget, min_idle=0, dry_run=True)
+    assert [entry.path for entry in dry] == [os.path.normpath(worktree)]
+    assert os.path.exists(worktree)
+
+    # Then the mirror it no longer holds on to, and the older clone
+    evicted = checkouts.gc(0, keep={clone_b}, min_idle=0)
+    assert [entry.path for entry in evicted] == [
+        os.path.normpath(path) for path in [worktree, mirror, clone_a]
+    ]
+    assert not os.path.exists(worktree)
+    assert not os.path.exists(mirror)
+    assert not os.path.exists(clone_a)
+    assert os.path.exists(clone_b)
+
+
+def test_gc_keeps_recent_and_mirrors_with_worktrees(tmp_path, git, make_repo):
+    source = str(tmp_path / "source")
+    (commit,) = make_repo(source, DATA)
+    dataset = tmp_path / "checkouts" / "dataset"
+    mirror = str(dataset / "mirrors" / "org__c.git")
+    worktree = str(dataset / "worktrees" / "org__c" / "c-1")
+    pool = WorktreePool()
+    pool.ensure(source, mirror, worktree, commit)
+    checkouts = CheckoutCache(str(tmp_path / "checkouts"))
+
+    # Just used, other processes may be working in it
+    assert checkouts.gc(0) == []
+    # The worktree is in use, and the mirror can't go without it
+    assert checkouts.gc(0, keep={worktree}, min_idle=0) == []
+    assert os.path.exists(mirror)
+
+    checkouts.gc(0, keep={mirror}, min_idle=0)
+    assert not os.path.exists(worktree)
+    assert git(["worktree", "list", "--porcelain"], mirror).count("worktree ") == 1
+
+
+def test_partial_clone_mirror(tmp_path, git, make_repo):
+    source = str(tmp_path / "source")
+    (commit,) = make_repo(source, DATA)
+    git(["config", "uploadpack.allowFilter", "true"], source)
+    mirror = str(tmp_path / "mirror.git")
+    worktree = str(tmp_path / "worktree")
+    pool = WorktreePool()
+    pool.ensure(f"file://{source}", mirror, worktree, commit, "blob:none")
+
+    assert git(["config", "remote.origin.promisor"], mirror).strip() == "true"
+    # Blobs are fetched on checkout, so the worktree is complete
+    assert os.path.getsize(os.path.join(worktree, "data.bin")) == 64 << 10
+
+
+def test_checkout_stats_and_gc_commands(tmp_path, git, make_repo):
+    source = str(tmp_path / "source")
+    make_repo(source, DATA)
+    root = str(tmp_path / "checkouts")
+    clone = os.path.join(root, "dataset", "org__a")
+    git(["clone", "-q", source, clone], str(tmp_path))
+    runner = CliRunner()
+
+    result = runner.invoke(
+        cli.app, ["checkout", "stats", "--root", root, "--checkout-budget", "1K"]
+    )
+    assert result.exit_code == 0, result.output
+    assert "clone" in result.output and "EVICT" in result.output
+
+    result = runner.invoke(
+        cli.app,
+        ["checkout", "gc", "--root", root, "--checkout-budget", "0", "--min-idle", "0"],
+    )
+    assert result.exit_code == 0, result.output
+    assert "Evicted 1 entries" in result.output
+    assert not os.path.exists(clone)
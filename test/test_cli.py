@@ -10,6 +10,12 @@ def test_create_cli():
     assert "Usage" in result.stdout
 
 
+def test_checkout_rejects_timeout_without_workers():
+    result = runner.invoke(cli.app, ["checkout", "--exec", "true", "--timeout", "5"])
+    assert result.exit_code == 2
+    assert "--timeout" in result.output
+
+
 def test_assistants():
     #result = runner.invoke(cli.app, ["index","astra-assistants","--dataset-name", "princeton-nlp/SWE-bench","--id", "sqlfluff__sqlfluff-4764", "--max", "10000"])
     #result = runner.invoke(cli.app, ["index","astra-assistants","--dataset-name", "princeton-nlp/SWE-bench", "--max", "10000", "--split","test"])
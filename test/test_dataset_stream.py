@@ -0,0 +1,44 @@
+import json
+
+from swe_bench_util import dataset_stream
+from swe_bench_util.dataset_stream import parse_split, stream_filtered_rows
+
+
+def write_dataset(path, count):
+    """Local JSON dataset directory with a test split"""
+    path.mkdir()
+    with open(path / "test.jsonl", "w") as f:
+        for i in range(count):
+            repo = "django/django" if i % 2 else "pydicom/pydicom"
+            f.write(json.dumps({"instance_id": f"instance-{i}", "repo": repo}) + "\n")
+    return str(path)
+
+
+def ids(rows):
+    return [row["instance_id"] for row in rows]
+
+
+def test_parse_split(monkeypatch):
+    assert parse_split("dev", "unused") == ("dev", 0, None)
+    assert parse_split("dev[0:1]", "unused") == ("dev", 0, 1)
+    assert parse_split("test[5:]", "unused") == ("test", 5, None)
+    monkeypatch.setattr(dataset_stream, "split_size", lambda dataset, split: 225)
+    assert parse_split("dev[-10%:]", "unused") == ("dev", 203, None)
+    assert parse_split("dev[:-5]", "unused") == ("dev", 0, 220)
+    assert parse_split("dev[10%:50%]", "unused") == ("dev", 22, 112)
+
+
+def test_stream_slice_and_filters(tmp_path):
+    dataset_name = write_dataset(tmp_path / "dataset", 6)
+    assert ids(stream_filtered_rows("test[1:3]", dataset_name)) == [
+        "instance-1",
+        "instance-2",
+    ]
+    assert ids(stream_filtered_rows("test", dataset_name, repo="django/*")) == [
+        "instance-1",
+        "instance-3",
+        "instance-5",
+    ]
+    assert ids(
+        stream_filtered_rows("test", dataset_name, id="instance-4,instance-0")
+    ) == ["instance-0", "instance-4"]
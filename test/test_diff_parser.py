@@ -0,0 +1,70 @@
+from swe_bench_util.diff_parser import parse_unified_diff
+
+PATCH = """diff --git a/src/app.py b/src/app.py
+index 1111111..2222222 100644
+--- a/src/app.py
++++ b/src/app.py
+@@ -10,6 +10,7 @@ def main():
+     a = 1
+-    b = 2
++    b = 3
++    c = 4
+     return a
+@@ -40,3 +41,2 @@ class App:
+     x = 1
+--- a removed line that looks like a header
+     y = 2
+diff --git a/old.py b/old.py
+deleted file mode 100644
+index 3333333..0000000
+--- a/old.py
++++ /dev/null
+@@ -1,2 +0,0 @@
+-one
+-two
+diff --git a/docs/new.md b/docs/new.md
+new file mode 100644
+index 0000000..4444444
+--- /dev/null
++++ b/docs/new.md
+@@ -0,0 +1 @@
++hello
+diff --git a/before.py b/after.py
+similarity index 100%
+rename from before.py
+rename to after.py
+"""
+
+
+def test_file_statuses_and_paths():
+    diffs = parse_unified_diff(PATCH)
+    assert [(d.status, d.old_path, d.new_path) for d in diffs] == [
+        ("modified", "src/app.py", "src/app.py"),
+        ("deleted", "old.py", None),
+        ("added", None, "docs/new.md"),
+        ("renamed", "before.py", "after.py"),
+    ]
+    assert [d.path for d in diffs] == [
+        "src/app.py",
+        "old.py",
+        "docs/new.md",
+        "after.py",
+    ]
+
+
+def test_hunks_and_line_ranges():
+    first, second = parse_unified_diff(PATCH)[0].hunks
+    assert (first.old_start, first.old_lines, first.new_start, first.new_lines) == (
+        10,
+        6,
+        10,
+        7,
+    )
+    assert first.section == "def main():"
+    assert first.removed == [[11, 11]]
+    assert first.added == [[11, 12]]
+    assert second.section == "class App:"
+    assert second.removed == [[41, 41]]
+    assert second.added == []
+    new_file = parse_unified_diff(PATCH)[2]
+    assert new_file.hunks[0].added == [[1, 1]]
@@ -0,0 +1,68 @@
+import json
+
+from typer.testing import CliRunner
+
+from swe_bench_util import cli
+from swe_bench_util.eval_stream import HintAggregator, JsonlFollower, parse_hint_line
+from swe_bench_util.file_hint_eval import BenchExample
+
+runner = CliRunner()
+
+EXAMPLES = [
+    BenchExample("a-1", "org/a", "abc", ["a.py"], []),
+    BenchExample("a-2", "org/a", "abc", ["b.py", "c.py"], []),
+    BenchExample("b-1", "org/b", "abc", ["x.py"], ["test_x.py"]),
+]
+
+
+def append(path, *hints):
+    with open(path, "a") as f:
+        for hint in hints:
+            f.write(json.dumps(hint) + "\n")
+
+
+def test_follower_scores_only_new_complete_lines(tmp_path):
+    path = tmp_path / "file_hints.jsonl"
+    follower = JsonlFollower(str(path))
+    aggregator = HintAggregator(EXAMPLES)
+
+    append(path, {"id": "a-1", "file_hint": ["a.py", ""]})
+    with open(path, "a") as f:
+        f.write('{"id": "a-2", "hint_fil')
+    lines = follower.read_new()
+    assert len(lines) == 1
+    aggregator.add([parse_hint_line(line) for line in lines])
+    assert aggregator.overall.means()["recall"] == 1
+
+    with open(path, "a") as f:
+        f.write('es": ["b.py"]}\n')
+    aggregator.add([parse_hint_line(line) for line in follower.read_new()])
+    assert aggregator.overall.count == 2
+    assert aggregator.by_repo["org/a"].means()["recall"] == 0.75
+    assert follower.read_new() == []
+
+
+def test_latest_line_per_instance_wins():
+    aggregator = HintAggregator(EXAMPLES)
+    aggregator.add([parse_hint_line('{"id": "b-1", "hint_files": []}')])
+    aggregator.add([parse_hint_line('{"id": "b-1", "hint_files": ["x.py"]}')])
+    assert aggregator.overall.count == 1
+    assert aggregator.by_repo["org/b"].means()["precision"] == 1
+
+
+def test_eval_command(tmp_path):
+    oracle_path = tmp_path / "oracle.json"
+    oracle_path.write_text(json.dumps([example.__dict__ for example in EXAMPLES]))
+    hints_path = tmp_path / "file_hints.jsonl"
+    append(
+        hints_path,
+        {"id": "a-1", "hint_files": ["a.py"]},
+        {"id": "zzz", "hint_files": []},
+    )
+    result = runner.invoke(
+        cli.app,
+        ["eval", "--hints", str(hints_path), "--oracle-file", str(oracle_path)],
+    )
+    assert result.exit_code == 0
+    assert "org/a\t1\t1.000\t1.000" in result.stdout
+    assert "1 hints had no oracle entry" in result.stdout
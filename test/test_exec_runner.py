@@ -0,0 +1,36 @@
+from contextlib import contextmanager
+
+from swe_bench_util.exec_runner import read_ledger, run_instances
+
+COMMAND = 'echo "$BENCH_INSTANCE_ID"; case "$BENCH_INSTANCE_ID" in fail) exit 3;; slow) sleep 10;; esac'
+
+ROWS = [{"instance_id": id, "repo": "a/b"} for id in ["ok", "fail", "slow"]]
+
+
+def lease_in(path):
+    @contextmanager
+    def lease(row_data):
+        yield str(path)
+
+    return lease
+
+
+def test_run_instances_records_each_outcome(tmp_path):
+    log_dir = str(tmp_path / "logs")
+    results = run_instances(
+        ROWS, COMMAND, lease_in(tmp_path), workers=3, timeout=0.5, log_dir=log_dir
+    )
+    statuses = {result.instance_id: result.status for result in results}
+    assert statuses == {"ok": "success", "fail": "failed", "slow": "timeout"}
+    with open(f"{log_dir}/ok.stdout.log") as f:
+        assert f.read() == "ok\n"
+    assert len(read_ledger(f"{log_dir}/ledger.jsonl")) == 3
+
+
+def test_rerun_skips_successes(tmp_path):
+    log_dir = str(tmp_path / "logs")
+    run_instances(ROWS, COMMAND, lease_in(tmp_path), timeout=0.5, log_dir=log_dir)
+    results = run_instances(
+        ROWS, COMMAND, lease_in(tmp_path), timeout=0.5, log_dir=log_dir
+    )
+    assert sorted(result.instance_id for result in results) == ["fail", "slow"]
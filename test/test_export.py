@@ -0,0 +1,42 @@
+import json
+
+import pyarrow.parquet as pq
+from datasets import Dataset
+
+from swe_bench_util.export import write_jsonl, write_markdown_files, write_parquet
+
+ROWS = [
+    {
+        "instance_id": f"sqlfluff__sqlfluff-{i}",
+        "repo": "sqlfluff/sqlfluff",
+        "base_commit": "a820c139ccbe6d1865d73c4a459945cd69899f8f",
+        "problem_statement": "Fix ```it```",
+        "patch": "+++ b/src/sqlfluff/cli/commands.py",
+    }
+    for i in range(3)
+]
+
+
+def test_write_jsonl(tmp_path):
+    path = str(tmp_path / "rows.jsonl")
+    assert write_jsonl(path, ROWS) == 3
+    with open(path) as f:
+        assert [json.loads(line) for line in f] == ROWS
+    assert [p.name for p in tmp_path.iterdir()] == ["rows.jsonl"]
+
+
+def test_write_parquet_from_dataset_selection(tmp_path):
+    path = str(tmp_path / "rows.parquet")
+    dataset = Dataset.from_list(ROWS).select([2, 0])
+    assert write_parquet(path, dataset) == 2
+    assert pq.read_table(path).column("instance_id").to_pylist() == [
+        "sqlfluff__sqlfluff-2",
+        "sqlfluff__sqlfluff-0",
+    ]
+
+
+def test_write_markdown_files(tmp_path):
+    assert write_markdown_files(str(tmp_path), ROWS, workers=2) == 3
+    text = (tmp_path / "sqlfluff__sqlfluff-1.md").read_text()
+    assert text.startswith("# sqlfluff__sqlfluff-1\n")
+    assert "## patch\n```\n+++ b/src/sqlfluff/cli/commands.py\n```" in text
@@ -1,9 +1,14 @@
+import math
+
+import pytest
+
 from swe_bench_util.file_hint_eval import (
     eval_file_hints_vs_oracle,
     BenchExample,
     FileHint,
     calc_precision,
     calc_recall,
+    mean_metrics,
 )
 
 EXAMPLE_1 = {
@@ -108,3 +113,46 @@ def test_calc_recall_empty_example():
     When there are no patch_files, recall is 1
     """
     assert calc_recall(BenchExample(**EXAMPLE_EMPTY), set([])) == 1
+
+
+EXAMPLE_1_RANKED_HINT = {
+    "id": "sqlfluff__sqlfluff-4764",
+    "hint_files": [
+        "README.md",
+        "test/cli/commands_test.py",
+        "src/sqlfluff/cli/formatters.py",
+        "setup.py",
+        "src/sqlfluff/cli/commands.py",
+    ],
+}
+
+
+def test_ranked_metrics():
+    """
+    The test patch file is dropped before ranking,
+    so the patch files are at ranks 2 and 4
+    """
+    examples = [BenchExample(**EXAMPLE_1), BenchExample(**EXAMPLE_EMPTY)]
+    recommendations = [FileHint(**EXAMPLE_1_RANKED_HINT)]
+    results = eval_file_hints_vs_oracle(examples, recommendations, ks=(1, 2, 5))
+    assert len(results) == 1
+    assert results[0].reciprocal_rank == 1 / 2
+    assert results[0].recall_at_k == {1: 0, 2: 1 / 3, 5: 2 / 3}
+    dcg = 1 / math.log2(3) + 1 / math.log2(5)
+    ideal = 1 + 1 / math.log2(3) + 1 / math.log2(4)
+    assert results[0].ndcg == pytest.approx(dcg / ideal)
+
+
+def test_unmatched_hints_are_skipped_and_means_summarize():
+    examples = [BenchExample(**EXAMPLE_1)]
+    recommendations = [
+        FileHint(**EXAMPLE_1_ALL_HINT),
+        FileHint(id="missing", hint_files=[]),
+        FileHint(**EXAMPLE_1_NO_HINT),
+    ]
+    results = eval_file_hints_vs_oracle(examples, recommendations)
+    assert [result.recall for result in results] == [1, 0]
+    means = mean_metrics(results)
+    assert means["recall"] == 0.5
+    assert means["mrr"] == 0.5
+    assert means["recall@1"] == pytest.approx(1 / 6)
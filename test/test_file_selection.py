@@ -0,0 +1,55 @@
+import subprocess
+
+from swe_bench_util.index.file_selection import (
+    EXCLUDED_SUFFIXES,
+    exclusion_summary,
+    select_files,
+)
+from swe_bench_util.index.file_util import EXCLUDE_EXTS, git_blob_sha
+
+
+def test_suffix_matcher_agrees_with_endswith():
+    names = [
+        "app.py",
+        "bundle.min.js",
+        "bundle.js",
+        "img.PNG",
+        "img.png",
+        "LICENSE",
+        "NOTICE",
+        "poetry.lock",
+        "x",
+        "",
+        "archive.tar.gz",
+        "fix.patch.disabled",
+    ]
+    for name in names:
+        expected = any(name.endswith(ext) for ext in EXCLUDE_EXTS)
+        assert EXCLUDED_SUFFIXES.matches(name) == expected, name
+
+
+def test_select_files_uses_tracked_files_only(tmp_path):
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "app.py").write_text("print('hi')\n")
+    (tmp_path / "logo.png").write_bytes(b"\x89PNG")
+    (tmp_path / "data.bin2").write_bytes(b"abc\0def")
+    (tmp_path / "big.txt").write_text("x" * 100)
+    subprocess.run(["git", "init", "-q"], cwd=tmp_path, check=True)
+    subprocess.run(["git", "add", "."], cwd=tmp_path, check=True)
+    (tmp_path / "untracked.py").write_text("")
+
+    selected, excluded = select_files(str(tmp_path), max_bytes=50)
+    assert [(file.path, file.size) for file in selected] == [("src/app.py", 12)]
+    assert selected[0].sha == git_blob_sha(str(tmp_path / "src" / "app.py"))
+    assert exclusion_summary(excluded) == {
+        "excluded extension": 1,
+        "binary": 1,
+        "too large": 1,
+    }
+
+
+def test_select_files_outside_git_has_no_sha(tmp_path):
+    (tmp_path / "app.py").write_text("print('hi')\n")
+
+    selected, _ = select_files(str(tmp_path))
+    assert [(file.path, file.sha) for file in selected] == [("app.py", None)]
@@ -0,0 +1,106 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from swe_bench_util.git_snapshot import CatFile, GitSnapshot
+from swe_bench_util.index.bm25 import build_bm25, build_bm25_snapshot
+from swe_bench_util.index.file_selection import select_snapshot_files
+
+
+@pytest.fixture
+def repo(tmp_path, git, make_repo):
+    """Two commits of a small repo with a bare mirror next to it, and the hashes"""
+    path = tmp_path / "repo"
+    os.makedirs(path / "src")
+    os.symlink("src/app.py", path / "link.py")
+    first, second = make_repo(
+        path,
+        {
+            "src/app.py": "def parse_config():\n    pass\n",
+            "logo.png": b"\x89PNG",
+            "blob.dat": b"abc\0def",
+            "empty.py": "",
+        },
+        {"src/app.py": "def render_template():\n    pass\n"},
+    )
+    git(["clone", "-q", "--mirror", str(path), str(path) + ".git"], tmp_path)
+    return path, first, second
+
+
+def test_snapshot_lists_and_reads_files(repo):
+    repo, first, second = repo
+    with CatFile(str(repo) + ".git") as cat_file:
+        old = GitSnapshot(str(repo) + ".git", first, cat_file)
+        new = GitSnapshot(str(repo) + ".git", second, cat_file)
+        paths = [entry.path for entry in old.entries()]
+        assert paths == ["blob.dat", "empty.py", "link.py", "logo.png", "src/app.py"]
+        app = {entry.path: entry for entry in new.entries()}["src/app.py"]
+        assert app.size == len(new.read(app))
+        assert new.read(app) == b"def render_template():\n    pass\n"
+        old_app = {entry.path: entry for entry in old.entries()}["src/app.py"]
+        assert old.read(old_app) == b"def parse_config():\n    pass\n"
+        empty = {entry.path: entry for entry in old.entries()}["empty.py"]
+        assert old.read(empty) == b""
+        assert old.tree != new.tree
+        with pytest.raises(KeyError):
+            cat_file.read("0" * 40)
+
+
+def test_blobless_snapshot_fetches_blobs_in_one_batch(repo, git):
+    repo, first, second = repo
+    git(["config", "uploadpack.allowFilter", "true"], repo)
+    mirror = str(repo) + "-blobless.git"
+    git(
+        ["clone", "-q", "--mirror", "--filter=blob:none", f"file://{repo}", mirror],
+        repo,
+    )
+    packs = os.path.join(mirror, "objects", "pack")
+    before = len([name for name in os.listdir(packs) if name.endswith(".pack")])
+    with CatFile(mirror) as cat_file:
+        snapshot = GitSnapshot(mirror, second, cat_file)
+        assert snapshot.partial
+        sizes = {entry.path: entry.size for entry in snapshot.entries()}
+        assert sizes["src/app.py"] == len(b"def render_template():\n    pass\n")
+        assert sizes["blob.dat"] == 7
+        # All of them came in one pack, nothing is missing any more
+        after = len([name for name in os.listdir(packs) if name.endswith(".pack")])
+        assert after == before + 1
+        assert snapshot.fetch_missing() == 0
+
+
+def test_snapshot_reads_in_parallel(repo):
+    repo, first, second = repo
+    with CatFile(str(repo) + ".git") as cat_file:
+        snapshots = [
+            GitSnapshot(str(repo) + ".git", commit, cat_file)
+            for commit in (first, second) * 20
+        ]
+
+        def read_app(snapshot):
+            entry = {entry.path: entry for entry in snapshot.entries()}["src/app.py"]
+            return snapshot.read(entry)
+
+        with ThreadPoolExecutor(8) as executor:
+            contents = list(executor.map(read_app, snapshots))
+    assert contents[0::2] == [b"def parse_config():\n    pass\n"] * 20
+    assert contents[1::2] == [b"def render_template():\n    pass\n"] * 20
+
+
+def test_snapshot_selection_matches_checkout(repo):
+    repo, _, second = repo
+    with CatFile(str(repo) + ".git") as cat_file:
+        snapshot = GitSnapshot(str(repo) + ".git", second, cat_file)
+        selected, excluded = select_snapshot_files(snapshot)
+        from_store = build_bm25_snapshot(snapshot)
+    assert [file.path for file in selected] == ["empty.py", "src/app.py"]
+    assert {file.path: file.reason for file in excluded} == {
+        "blob.dat": "binary",
+        "link.py": "not a regular file",
+        "logo.png": "excluded extension",
+    }
+    from_checkout = build_bm25(str(repo))
+    assert from_store.paths == from_checkout.paths
+    assert from_store.search("render template") == from_checkout.search(
+        "render template"
+    )
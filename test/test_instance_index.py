@@ -0,0 +1,44 @@
+from datasets import Dataset
+
+from swe_bench_util.instance_index import select_instances
+
+ROWS = [
+    {"instance_id": "django__django-1", "repo": "django/django"},
+    {"instance_id": "sqlfluff__sqlfluff-2", "repo": "sqlfluff/sqlfluff"},
+    {"instance_id": "django__django-3", "repo": "django/django"},
+    {"instance_id": "pydicom__pydicom-4", "repo": "pydicom/pydicom"},
+]
+
+
+def ids(dataset):
+    return dataset["instance_id"]
+
+
+def test_select_by_id_and_repo(tmp_path, monkeypatch):
+    monkeypatch.setenv("SWE_BENCH_UTIL_CACHE_DIR", str(tmp_path))
+    dataset = Dataset.from_list(ROWS)
+    assert ids(select_instances(dataset, id="django__django-3")) == ["django__django-3"]
+    assert ids(select_instances(dataset, repo="django/django")) == [
+        "django__django-1",
+        "django__django-3",
+    ]
+    assert (
+        ids(select_instances(dataset, repo="django/django", id="pydicom__pydicom-4"))
+        == []
+    )
+    assert ids(select_instances(dataset, id="missing")) == []
+
+
+def test_select_multiple_and_glob(tmp_path, monkeypatch):
+    monkeypatch.setenv("SWE_BENCH_UTIL_CACHE_DIR", str(tmp_path))
+    dataset = Dataset.from_list(ROWS)
+    assert ids(select_instances(dataset, id="pydicom__pydicom-4,django__django-1")) == [
+        "django__django-1",
+        "pydicom__pydicom-4",
+    ]
+    assert ids(select_instances(dataset, repo="s*,pydicom/*")) == [
+        "sqlfluff__sqlfluff-2",
+        "pydicom__pydicom-4",
+    ]
+    # The index is cached per fingerprint
+    assert len(list(tmp_path.glob("instance_index/*.json"))) == 1
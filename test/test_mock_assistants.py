@@ -0,0 +1,50 @@
+import openai
+import pytest
+from openai import OpenAI
+from openai.lib.streaming import AssistantEventHandler
+
+from benchmarks.mock_assistants import MockAssistantsServer, MockConfig
+
+
+class RetrievalHandler(AssistantEventHandler):
+    def __init__(self):
+        super().__init__()
+        self.chunks = []
+
+    def on_run_step_done(self, run_step):
+        for tool_call in run_step.step_details.tool_calls:
+            self.chunks += tool_call.retrieval
+
+
+def test_upload_assistant_and_streamed_run(tmp_path):
+    path = tmp_path / "app.py"
+    path.write_text("print('hi')\n")
+    with MockAssistantsServer(MockConfig(tokens=3, retrieval_files=1)) as server:
+        client = OpenAI(base_url=server.base_url, api_key="mock")
+        with open(path, "rb") as f:
+            file = client.files.create(file=f, purpose="assistants")
+        assert client.files.retrieve(file.id).filename == "app.py"
+        assistant = client.beta.assistants.create(
+            file_ids=[file.id], model="gpt-4", tools=[{"type": "retrieval"}]
+        )
+        thread = client.beta.threads.create()
+        client.beta.threads.messages.create(
+            thread_id=thread.id, role="user", content="fix it"
+        )
+        handler = RetrievalHandler()
+        with client.beta.threads.runs.create_and_stream(
+            thread_id=thread.id, assistant_id=assistant.id, event_handler=handler
+        ) as stream:
+            text = "".join(stream.text_deltas)
+        assert text == "token0 token1 token2 "
+        assert handler.chunks == [{"file_id": file.id, "search_string": "query 0"}]
+        assert server.stats.requests["POST /v1/files"] == 1
+
+
+def test_rate_limit_injection():
+    config = MockConfig(rate_limit_probability=1.0)
+    with MockAssistantsServer(config) as server:
+        client = OpenAI(base_url=server.base_url, api_key="mock", max_retries=0)
+        with pytest.raises(openai.RateLimitError):
+            client.beta.threads.create()
+        assert server.stats.rate_limited == 1
@@ -0,0 +1,51 @@
+from datasets import Dataset
+
+from swe_bench_util.oracle import load_oracle
+
+PATCH = """diff --git a/src/app.py b/src/app.py
+--- a/src/app.py
++++ b/src/app.py
+@@ -1,2 +1,2 @@ def main():
+-a = 1
++a = 2
+ b = 1
+"""
+
+TEST_PATCH = """diff --git a/test/test_app.py b/test/test_app.py
+new file mode 100644
+--- /dev/null
++++ b/test/test_app.py
+@@ -0,0 +1 @@
++assert True
+"""
+
+
+def make_dataset(count):
+    return Dataset.from_list(
+        [
+            {
+                "instance_id": f"app-{i}",
+                "repo": "org/app",
+                "base_commit": "abc",
+                "patch": PATCH,
+                "test_patch": TEST_PATCH,
+            }
+            for i in range(count)
+        ]
+    )
+
+
+def test_oracle_is_cached_per_fingerprint(tmp_path, monkeypatch):
+    monkeypatch.setenv("SWE_BENCH_UTIL_CACHE_DIR", str(tmp_path))
+    dataset = make_dataset(2)
+    built = load_oracle(dataset, "org/bench", "dev")
+    cached = load_oracle(dataset, "org/bench", "dev")
+    assert cached == built
+    assert cached[1].id == "app-1"
+    assert cached[0].patch_files == ["src/app.py"]
+    assert cached[0].test_patch_files == ["test/test_app.py"]
+    assert cached[0].patch_diffs[0].hunks[0].added == [[1, 1]]
+
+    # A new dataset revision replaces the cache entry
+    load_oracle(make_dataset(3), "org/bench", "dev")
+    assert len(list(tmp_path.glob("oracle/org__bench/dev-*.json"))) == 1
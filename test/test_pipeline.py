@@ -0,0 +1,81 @@
+import threading
+import time
+
+import pytest
+
+from swe_bench_util.pipeline import run_pipeline
+
+
+def test_records_in_row_order_when_inference_finishes_out_of_order():
+    recorded = []
+
+    def infer(row, prepared):
+        # Later rows finish first
+        time.sleep(0.01 * (5 - row))
+        return (prepared * 10,)
+
+    run_pipeline(
+        range(5),
+        lambda row: (row + 1,),
+        infer,
+        lambda row, result: recorded.append((row, result)),
+        workers=5,
+    )
+    assert recorded == [(0, 10), (1, 20), (2, 30), (3, 40), (4, 50)]
+
+
+def test_caps_unfinished_inferences():
+    lock = threading.Lock()
+    unfinished = 0
+    peak = 0
+
+    def prepare(row):
+        nonlocal unfinished, peak
+        with lock:
+            unfinished += 1
+            peak = max(peak, unfinished)
+        return ()
+
+    def infer(row):
+        nonlocal unfinished
+        time.sleep(0.005)
+        with lock:
+            unfinished -= 1
+        return ()
+
+    recorded = []
+    run_pipeline(range(30), prepare, infer, lambda row: recorded.append(row), workers=2)
+    assert recorded == list(range(30))
+    assert peak <= 4
+
+
+def test_failed_inference_records_earlier_rows_and_stops():
+    prepared = []
+    recorded = []
+    release = threading.Event()
+
+    def prepare(row):
+        prepared.append(row)
+        return ()
+
+    def infer(row):
+        if row == 2:
+            raise RuntimeError("run failed")
+        if row > 2:
+            # Keep later rows unfinished until the failure is seen
+            release.wait(0.2)
+        return ()
+
+    with pytest.raises(RuntimeError, match="run failed"):
+        run_pipeline(
+            range(20),
+            prepare,
+            infer,
+            lambda row: recorded.append(row),
+            workers=1,
+            max_ahead=4,
+        )
+    release.set()
+    assert recorded == [0, 1]
+    # Preparation stopped once the failed row was reached
+    assert len(prepared) < 20
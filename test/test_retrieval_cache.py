@@ -0,0 +1,27 @@
+from swe_bench_util.index.retrieval_cache import (
+    RetrievalCache,
+    RetrievalResult,
+    retrieval_cache_key,
+)
+
+
+def test_key_changes_with_each_input():
+    key = retrieval_cache_key("asst_1", "gpt-4", "system", "issue")
+    assert key == retrieval_cache_key("asst_1", "gpt-4", "system", "issue")
+    assert key != retrieval_cache_key("asst_2", "gpt-4", "system", "issue")
+    assert key != retrieval_cache_key("asst_1", "gpt-4o", "system", "issue")
+    assert key != retrieval_cache_key("asst_1", "gpt-4", "system v2", "issue")
+    assert key != retrieval_cache_key("asst_1", "gpt-4", "system", "issue edited")
+
+
+def test_cache_persists_and_last_result_wins(tmp_path):
+    path = str(tmp_path / "retrieval.jsonl")
+    cache = RetrievalCache(path)
+    assert cache.get("k") is None
+    cache.put("k", RetrievalResult(["file-1"], ["query"], "diff"))
+    cache.put("k", RetrievalResult(["file-2"], ["query 2"], "diff 2"))
+    cache.put("other", RetrievalResult([], [], ""))
+
+    reloaded = RetrievalCache(path)
+    assert reloaded.get("k") == RetrievalResult(["file-2"], ["query 2"], "diff 2")
+    assert reloaded.get("other") == RetrievalResult([], [], "")
@@ -0,0 +1,41 @@
+import io
+
+from swe_bench_util.index.run_capture import RunCapture, ThrottledWriter
+
+
+def test_throttled_writer_buffers_until_interval():
+    stream = io.StringIO()
+    writer = ThrottledWriter(stream, interval=60)
+    writer.write("a")
+    writer.write("b")
+    assert stream.getvalue() == ""
+    writer.flush()
+    assert stream.getvalue() == "ab"
+
+    eager = ThrottledWriter(stream, interval=0)
+    eager.write("c")
+    assert stream.getvalue() == "abc"
+
+
+def test_capture_keeps_text_and_all_retrieval_chunks():
+    stream = io.StringIO()
+    capture = RunCapture(ThrottledWriter(stream, interval=60))
+    assert capture.metrics()["time_to_first_token"] is None
+    capture.add_retrieval([{"file_id": "f2", "search_string": "a"}])
+    capture.add_retrieval(
+        [
+            {"file_id": "f1", "search_string": "b"},
+            {"file_id": "f2", "search_string": "c"},
+        ]
+    )
+    for delta in ["--- a/x.py", "\n", "+++ b/x.py"]:
+        capture.add_text(delta)
+    capture.finish()
+
+    assert capture.text == "--- a/x.py\n+++ b/x.py"
+    assert stream.getvalue() == capture.text + "\n"
+    assert capture.file_ids == ["f2", "f1"]
+    assert capture.search_strings == ["a", "b", "c"]
+    metrics = capture.metrics()
+    assert metrics["tokens"] == 3
+    assert 0 <= metrics["time_to_first_token"] <= metrics["total_seconds"]
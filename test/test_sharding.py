@@ -0,0 +1,93 @@
+import json
+import random
+
+import pytest
+from typer.testing import CliRunner
+
+from swe_bench_util import cli
+from swe_bench_util.sharding import (
+    assign_shards,
+    merge_records,
+    parse_shard,
+    shard_positions,
+)
+
+
+def keys_for(repo_sizes: dict[str, int]) -> list[tuple[str, str]]:
+    return [
+        (f"{repo.replace('/', '__')}-{i}", repo)
+        for repo, size in repo_sizes.items()
+        for i in range(size)
+    ]
+
+
+def test_parse_shard():
+    assert parse_shard("0/4") == (0, 4)
+    assert parse_shard(" 3 / 4 ") == (3, 4)
+    for text in ["4/4", "1/0", "1", "a/b", "-1/2"]:
+        with pytest.raises(ValueError):
+            parse_shard(text)
+
+
+def test_shards_partition_balanced_by_repo():
+    keys = keys_for({"django/django": 40, "a/a": 9, "b/b": 8, "c/c": 7, "d/d": 6})
+    shards = assign_shards(keys, 4)
+    positions = [shard_positions(keys, index, 4) for index in range(4)]
+
+    assert sorted(p for shard in positions for p in shard) == list(range(len(keys)))
+    sizes = [len(shard) for shard in positions]
+    # Within one whole repo of each other
+    assert max(sizes) - min(sizes) <= 6
+    # Only the repo larger than a shard is split
+    repo_shards = {}
+    for (_, repo), shard in zip(keys, shards):
+        repo_shards.setdefault(repo, set()).add(shard)
+    assert len(repo_shards["django/django"]) == 3
+    assert all(len(repo_shards[repo]) == 1 for repo in ["a/a", "b/b", "c/c", "d/d"])
+
+
+def test_shards_do_not_depend_on_order():
+    keys = keys_for({"a/a": 5, "b/b": 5, "c/c": 3, "d/d": 1})
+    shuffled = keys[:]
+    random.Random(0).shuffle(shuffled)
+    by_id = dict(zip(keys, assign_shards(keys, 3)))
+    assert dict(zip(shuffled, assign_shards(shuffled, 3))) == by_id
+
+
+def test_merge_records_by_id():
+    shard_0 = [{"id": "b-1", "recall": 1.0}]
+    shard_1 = [{"id": "a-1", "recall": 0.5}, {"id": "b-1", "recall": 1.0}]
+    assert merge_records([shard_0, shard_1]) == [
+        {"id": "a-1", "recall": 0.5},
+        {"id": "b-1", "recall": 1.0},
+    ]
+    with pytest.raises(ValueError, match="b-1"):
+        merge_records([shard_0, [{"id": "b-1", "recall": 0.0}]])
+
+
+def test_merge_records_latest_wins_within_one_input():
+    rerun = [
+        {"id": "a-1", "hint_files": ["old.py"]},
+        {"id": "a-1", "hint_files": ["new.py"]},
+    ]
+    other = [{"id": "b-1", "hint_files": []}]
+    assert merge_records([rerun, other]) == [
+        {"id": "a-1", "hint_files": ["new.py"]},
+        {"id": "b-1", "hint_files": []},
+    ]
+
+
+def test_merge_command(tmp_path):
+    hints_0 = tmp_path / "hints-0.jsonl"
+    hints_1 = tmp_path / "hints-1.jsonl"
+    hints_0.write_text(json.dumps({"id": "b-1", "hint_files": ["x.py"]}) + "\n")
+    hints_1.write_text(json.dumps({"id": "a-1", "hint_files": ["y.py"]}) + "\n")
+    output = tmp_path / "hints.jsonl"
+
+    result = CliRunner().invoke(
+        cli.app, ["merge", str(hints_0), str(hints_1), "--output", str(output)]
+    )
+
+    assert result.exit_code == 0, result.output
+    lines = output.read_text().splitlines()
+    assert [json.loads(line)["id"] for line in lines] == ["a-1", "b-1"]
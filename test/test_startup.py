@@ -0,0 +1,53 @@
+"""
+Cold-start benchmark for the CLI.
+Every invocation pays the import cost, and shell drivers invoke it thousands of times.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+BUDGET_SECONDS = float(os.environ.get("SWE_BENCH_UTIL_STARTUP_BUDGET", "1.5"))
+
+HEAVY_MODULES = ["datasets", "openai", "streaming_assistants", "tqdm", "dotenv"]
+
+
+def cold_start_seconds(args, runs=3):
+    """Best wall-clock time of a fresh interpreter running the CLI"""
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", "swe_bench_util", *args],
+            check=True,
+            capture_output=True,
+        )
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def test_import_cli_skips_heavy_dependencies():
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import json, sys, swe_bench_util.cli;"
+            f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))",
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    assert json.loads(result.stdout) == []
+
+
+@pytest.mark.parametrize("args", [["--version"], ["--help"], ["get", "--help"]])
+def test_cold_start_within_budget(args):
+    elapsed = cold_start_seconds(args)
+    print(f"swe_bench_util {' '.join(args)}: {elapsed:.3f}s")
+    assert elapsed < BUDGET_SECONDS
@@ -0,0 +1,81 @@
+import json
+
+from typer.testing import CliRunner
+
+from swe_bench_util import cli, trace
+
+
+def test_disabled_tracing_is_a_no_op():
+    trace.disable()
+    assert trace.span("checkout", instance="x") is trace.NULL_SPAN
+    with trace.span("checkout"):
+        trace.count("bytes_uploaded", 10)
+    assert trace.TRACER is None
+
+
+def test_spans_and_counters_are_exported(tmp_path):
+    tracer = trace.enable()
+    try:
+        with trace.span("checkout", instance="a"):
+            pass
+        with trace.span("checkout", instance="b"):
+            pass
+        with trace.span("inference", instance="a"):
+            trace.count("bytes_uploaded", 100)
+            trace.count("bytes_uploaded", 20)
+    finally:
+        trace.disable()
+
+    summary = tracer.summary().splitlines()
+    assert summary[0].split("\t") == ["span", "n", "total_s", "mean_s", "max_s"]
+    assert {line.split("\t")[0]: line.split("\t")[1] for line in summary[1:3]} == {
+        "checkout": "2",
+        "inference": "1",
+    }
+    assert summary[-1] == "bytes_uploaded\t120"
+
+    tracer.write(str(tmp_path / "trace.jsonl"))
+    records = [json.loads(line) for line in open(tmp_path / "trace.jsonl")]
+    assert [record.get("span") for record in records[:3]] == [
+        "checkout",
+        "checkout",
+        "inference",
+    ]
+    assert records[0]["instance"] == "a" and records[0]["seconds"] >= 0
+    assert records[-1] == {"counter": "bytes_uploaded", "value": 120}
+
+    tracer.write(str(tmp_path / "trace.json"))
+    events = json.load(open(tmp_path / "trace.json"))["traceEvents"]
+    assert [event["ph"] for event in events] == ["X", "X", "X", "C"]
+    assert events[2]["args"] == {"instance": "a"}
+
+
+def test_trace_option_writes_file(tmp_path):
+    oracle = tmp_path / "oracle.json"
+    example = {
+        "id": "r-1",
+        "repo": "o/r",
+        "base_commit": "abc",
+        "patch_files": ["a.py"],
+        "test_patch_files": [],
+    }
+    oracle.write_text(json.dumps([example]))
+    hints = tmp_path / "hints.jsonl"
+    hints.write_text(json.dumps({"id": "r-1", "hint_files": ["a.py"]}) + "\n")
+    trace_file = tmp_path / "trace.jsonl"
+    result = CliRunner().invoke(
+        cli.app,
+        [
+            "--trace",
+            str(trace_file),
+            "eval",
+            "--hints",
+            str(hints),
+            "--oracle-file",
+            str(oracle),
+        ],
+    )
+    trace.disable()
+    assert result.exit_code == 0, result.output
+    spans = [json.loads(line)["span"] for line in open(trace_file)]
+    assert spans == ["score_hints"]
@@ -0,0 +1,30 @@
+import subprocess
+
+from swe_bench_util.index.file_util import git_blob_sha
+from swe_bench_util.index.upload_cache import UploadCache, upload_cache_key
+
+
+def test_git_blob_sha_matches_git(tmp_path):
+    path = tmp_path / "hello.py"
+    path.write_text("print('hello')\n")
+    expected = subprocess.run(
+        ["git", "hash-object", str(path)], check=True, capture_output=True, text=True
+    ).stdout.strip()
+    assert git_blob_sha(str(path)) == expected
+
+
+def test_upload_cache_persists_and_ignores_partial_line(tmp_path):
+    path = str(tmp_path / "uploads.jsonl")
+    cache = UploadCache(path)
+    key = upload_cache_key("abc123", "src/app.py")
+    assert cache.get(key) is None
+    cache.put(key, "file-1")
+    with open(path, "a") as f:
+        f.write('{"key": "def456 src/other.py", "fi')
+
+    reloaded = UploadCache(path)
+    assert reloaded.get(key) == "file-1"
+    assert reloaded.get(upload_cache_key("abc123", "src/copy.py")) is None
+    assert len(reloaded.file_ids) == 1
+    reloaded.put(upload_cache_key("def456", "src/other.py"), "file-2")
+    assert len(UploadCache(path).file_ids) == 2
@@ -0,0 +1,35 @@
+import os
+
+from swe_bench_util.index.upload_journal import UploadJournal
+
+
+def test_journal_replays_completed_uploads(tmp_path):
+    path = str(tmp_path / "inst-upload_journal.jsonl")
+    journal = UploadJournal(path)
+    journal.record("src/a.py", "file-1")
+    journal.record("src/b.py", "file-2")
+    # Crash in the middle of the third append
+    with open(path, "a") as f:
+        f.write('{"path": "src/c.py", "fi')
+
+    resumed = UploadJournal(path)
+    assert resumed.file_ids == {"src/a.py": "file-1", "src/b.py": "file-2"}
+    assert resumed.get("src/c.py") is None
+    resumed.record("src/c.py", "file-3")
+    assert UploadJournal(path).get("src/c.py") == "file-3"
+
+
+def test_journal_without_resume_starts_over(tmp_path):
+    path = str(tmp_path / "inst-upload_journal.jsonl")
+    UploadJournal(path).record("src/a.py", "file-1")
+    assert UploadJournal(path, resume=False).file_ids == {}
+    assert not os.path.exists(path)
+
+
+def test_journal_remove(tmp_path):
+    path = str(tmp_path / "inst-upload_journal.jsonl")
+    journal = UploadJournal(path)
+    journal.remove()
+    journal.record("src/a.py", "file-1")
+    journal.remove()
+    assert not os.path.exists(path)
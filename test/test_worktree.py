@@ -0,0 +1,43 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from swe_bench_util.worktree import WorktreePool
+
+
+def read(path):
+    with open(os.path.join(path, "hello.txt")) as f:
+        return f.read()
+
+
+def versions(*contents):
+    """One commit of hello.txt per content"""
+    return [{"hello.txt": content} for content in contents]
+
+
+def test_concurrent_worktrees_share_one_mirror(tmp_path, make_repo):
+    source = str(tmp_path / "source")
+    commits = make_repo(source, *versions("one", "two", "three"))
+    mirror = str(tmp_path / "mirror.git")
+    pool = WorktreePool()
+
+    def lease(i):
+        path = str(tmp_path / f"worktree-{i}")
+        with pool.lease(source, mirror, path, commits[i]) as leased:
+            return read(leased)
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        contents = list(executor.map(lease, range(3)))
+
+    assert contents == ["one", "two", "three"]
+    assert not os.path.exists(os.path.join(mirror, "hello.txt"))
+
+
+def test_worktree_is_reused_at_a_new_commit(tmp_path, make_repo):
+    source = str(tmp_path / "source")
+    commits = make_repo(source, *versions("one", "two"))
+    mirror = str(tmp_path / "mirror.git")
+    path = str(tmp_path / "worktree")
+    pool = WorktreePool()
+
+    assert read(pool.ensure(source, mirror, path, commits[0])) == "one"
+    assert read(pool.ensure(source, mirror, path, commits[1])) == "two"